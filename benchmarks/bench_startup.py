@@ -0,0 +1,217 @@
+"""
+Cold-start cost of every service: the time to import its entry module in a
+fresh interpreter, which is what Cloud Run (or Agent Engine) pays before the
+first request is served, with a `-X importtime` breakdown of where it goes.
+
+Each service is run with its own interpreter (`<service>/.venv/bin/python`,
+as created by `uv sync`; falls back to the current one) and dummy
+configuration, so nothing reaches GCP or WhatsApp. Background preloading of
+client libraries is turned off, the numbers show the import alone.
+
+Regression gate:
+  - `--save-baseline` writes the medians to startup_baseline.json.
+  - `--check` fails (exit code 1) when a median exceeds its baseline by more
+    than the tolerance, or when a module that must stay lazy (e.g. the
+    Dialogflow client with ROUTING_TARGET=AGENT_ENGINE) is imported at startup.
+    The lazy-import check needs no baseline.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_startup [--runs 10] [--top 12] [--only whatsapp-webhook]
+    python -m benchmarks.bench_startup --save-baseline
+    python -m benchmarks.bench_startup --check [--tolerance 0.25]
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+BASELINE_FILE = Path(__file__).resolve().parent / 'startup_baseline.json'
+
+# name -> service directory, entry module, environment, modules that must not be imported at startup
+TARGETS = {
+    'whatsapp-webhook': {
+        'directory': 'whatsapp-webhook',
+        'module': 'main',
+        'env': {'PROJECT_ID': 'bench-project', 'AGENT_ID': 'bench-agent', 'ROUTING_TARGET': 'AGENT_ENGINE'},
+        'lazy': ['google.cloud.dialogflowcx_v3', 'vertexai'],
+    },
+    'whatsapp-webhook (dialogflow)': {
+        'directory': 'whatsapp-webhook',
+        'module': 'main',
+        'env': {'PROJECT_ID': 'bench-project', 'AGENT_ID': 'bench-agent', 'ROUTING_TARGET': 'DIALOGFLOW'},
+        'lazy': ['google.cloud.dialogflowcx_v3', 'vertexai'],
+    },
+    'dialogflow-cx-to-agent-engine-forwarder': {
+        'directory': 'dialogflow-cx-to-agent-engine-forwarder',
+        'module': 'main',
+        'env': {'PROJECT_ID': 'bench-project', 'AGENT_ID': 'bench-agent'},
+        'lazy': ['vertexai'],
+    },
+    'purchase-orders-service': {
+        'directory': 'purchase-orders-service',
+        'module': 'main',
+        'env': {'STORAGE_BACKEND': 'memory'},
+        'lazy': ['firebase_admin', 'google.cloud.firestore'],
+    },
+    'purchase-orders-service (firestore)': {
+        'directory': 'purchase-orders-service',
+        'module': 'storage_firestore',
+        'env': {},
+        'lazy': [],
+    },
+    'whatsapp-agents': {
+        'directory': 'whatsapp-agents',
+        'module': 'agents.agent',
+        'env': {
+            'WHATSAPP_API_TOKEN': 'bench-token',
+            'WHATSAPP_PHONE_NUMBER_ID': '000000000000000',
+            'PURCHASE_ORDERS_SERVICE_URL': 'http://localhost:8990',
+            'USER_SERVICE_URL': 'http://localhost:8990',
+        },
+        'lazy': ['google.cloud.secretmanager'],
+    },
+}
+
+IMPORT_SNIPPET = """
+import importlib, json, sys, time
+started = time.perf_counter()
+importlib.import_module({module!r})
+elapsed = time.perf_counter() - started
+lazy = [name for name in {lazy!r} if name in sys.modules]
+print(json.dumps([elapsed, lazy]))
+"""
+
+# "import time: self [us] | cumulative | imported package"
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+
+def interpreter(directory: Path) -> str:
+    venv_python = directory / '.venv' / 'bin' / 'python'
+    return str(venv_python) if venv_python.exists() else sys.executable
+
+
+def target_env(target) -> dict:
+    env = dict(os.environ)
+    env.update(target['env'])
+    env['LOG_LEVEL'] = 'WARNING'
+    env['PRELOAD_CLIENTS'] = 'FALSE'
+    env.pop('PYTHONPROFILEIMPORTTIME', None)
+    return env
+
+
+def run_import(target, extra_args=()):
+    """Imports the target in a fresh interpreter. Returns (import seconds, lazy modules imported, process seconds, stderr)."""
+    directory = ROOT / target['directory']
+    snippet = IMPORT_SNIPPET.format(module=target['module'], lazy=target['lazy'])
+    started = time.perf_counter()
+    process = subprocess.run(
+        [interpreter(directory), *extra_args, '-c', snippet],
+        cwd=directory, env=target_env(target), capture_output=True, text=True,
+    )
+    wall = time.perf_counter() - started
+    if process.returncode != 0:
+        raise RuntimeError(process.stderr.strip().splitlines()[-1] if process.stderr.strip() else f"exit code {process.returncode}")
+    elapsed, lazy = json.loads(process.stdout.strip().splitlines()[-1])
+    return elapsed, lazy, wall, process.stderr
+
+
+def package_of(module: str) -> str:
+    """Groups the google and google.cloud namespaces one level deeper, everything else by its top level."""
+    parts = module.split('.')
+    depth = 1
+    while depth < len(parts) and '.'.join(parts[:depth]) in ('google', 'google.cloud'):
+        depth += 1
+    return '.'.join(parts[:depth])
+
+
+def importtime_breakdown(stderr: str, top: int):
+    """Self time summed per package, in microseconds, largest first."""
+    totals = defaultdict(int)
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            totals[package_of(match.group(4))] += int(match.group(1))
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)[:top]
+
+
+def measure(target, runs: int):
+    imports, walls, lazy = [], [], set()
+    for _ in range(runs):
+        elapsed, imported, wall, _ = run_import(target)
+        imports.append(elapsed)
+        walls.append(wall)
+        lazy.update(imported)
+    return imports, walls, sorted(lazy)
+
+
+def load_baseline():
+    if not BASELINE_FILE.exists():
+        return {}
+    return json.loads(BASELINE_FILE.read_text())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--top', type=int, default=12, help="packages shown in the -X importtime breakdown (0 to skip it)")
+    parser.add_argument('--only', action='append', choices=list(TARGETS), help="benchmark only these targets")
+    parser.add_argument('--check', action='store_true', help="fail on a startup regression or an eager import of a lazy module")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="allowed slowdown over the baseline, as a fraction")
+    parser.add_argument('--save-baseline', action='store_true', help=f"write the medians to {BASELINE_FILE.name}")
+    args = parser.parse_args()
+
+    baseline = load_baseline()
+    medians, failures = {}, []
+
+    for name in args.only or TARGETS:
+        target = TARGETS[name]
+        print(f"\n⏱️  {name}: import {target['module']} | {args.runs} fresh interpreters | {interpreter(ROOT / target['directory'])}")
+        try:
+            imports, walls, lazy = measure(target, args.runs)
+        except RuntimeError as e:
+            print(f"❌ Import failed: {e}")
+            failures.append(f"{name}: import failed")
+            continue
+
+        median = statistics.median(imports)
+        medians[name] = round(median * 1000, 1)
+        print(f"   import p50: {median * 1000:7.1f} ms | min: {min(imports) * 1000:7.1f} ms | process p50: {statistics.median(walls) * 1000:7.1f} ms")
+
+        if lazy:
+            print(f"   ⚠️  Imported at startup but should be lazy: {', '.join(lazy)}")
+            failures.append(f"{name}: eagerly imports {', '.join(lazy)}")
+
+        if name in baseline:
+            limit = baseline[name] * (1 + args.tolerance)
+            change = median * 1000 / baseline[name] - 1
+            print(f"   baseline: {baseline[name]:7.1f} ms | change: {change:+.1%} | limit: {limit:7.1f} ms")
+            if median * 1000 > limit:
+                failures.append(f"{name}: {median * 1000:.1f} ms over the {limit:.1f} ms limit")
+
+        if args.top:
+            _, _, _, stderr = run_import(target, ['-X', 'importtime'])
+            print("   -X importtime, self time per package:")
+            for package, microseconds in importtime_breakdown(stderr, args.top):
+                print(f"     {microseconds / 1000:8.1f} ms  {package}")
+
+    if args.save_baseline:
+        BASELINE_FILE.write_text(json.dumps({**baseline, **medians}, indent=2, sort_keys=True) + '\n')
+        print(f"\n💾 Baseline written to {BASELINE_FILE.relative_to(ROOT)}")
+
+    if args.check:
+        if not baseline:
+            print(f"\n⚠️  No {BASELINE_FILE.name} yet, only lazy imports were checked. Create it with --save-baseline.")
+        if failures:
+            print("\n❌ Startup check failed:")
+            for failure in failures:
+                print(f"   - {failure}")
+            sys.exit(1)
+        print("\n✅ Startup check passed")
@@ -11,6 +11,8 @@ class Config:
     HOST = os.environ.get('HOST', '0.0.0.0')
     DEBUG = os.environ.get('DEBUG', 'FALSE').upper() == 'TRUE'
     MAX_RETRIES = int(os.environ.get('MAX_RETRIES', 1))
+    # Import vertexai in the background at startup
+    PRELOAD_CLIENTS = os.environ.get('PRELOAD_CLIENTS', 'TRUE').upper() == 'TRUE'
 
     
     # GCP
@@ -2,8 +2,7 @@ import logging
 from flask import Flask, request, jsonify
 import re
 from pydantic import BaseModel
-import vertexai
-from vertexai import agent_engines
+import threading
 from concurrent.futures import ThreadPoolExecutor
 
 from config import Config
@@ -55,6 +54,8 @@ def get_vertex_agent():
     
     logger.info(f"Initializing Vertex AI Agent Engine: {agent_engine_resource_name}")
     try:
+        # Imported on first use, it takes seconds and would delay startup
+        import vertexai
         # Always create a fresh client to ensure it binds to the current (background) asyncio loop
         vertex_client = vertexai.Client(project=Config.PROJECT_ID, location=Config.LOCATION)
         return vertex_client.agent_engines.get(name=agent_engine_resource_name)
@@ -163,6 +164,16 @@ def forward_message():
         return jsonify({"error": str(e), "details": "Check logs for payload"}), 400
 
 
+def preload_vertexai() -> None:
+    """Imports vertexai in the background once the app is up, so the first message usually does not pay for it."""
+    try:
+        import vertexai
+    except Exception as e:
+        logger.warning(f"Failed to preload vertexai: {e}")
+
+if Config.PRELOAD_CLIENTS:
+    threading.Thread(target=preload_vertexai, daemon=True).start()
+
 
 if __name__ == '__main__':
     app.run(host=Config.HOST, port=Config.PORT, debug=Config.DEBUG)
@@ -0,0 +1,463 @@
+"""
+Async variant of the purchase orders API (FastAPI + Firestore AsyncClient).
+
+Exposes the same endpoints, parameters and payloads as main.py. Handlers never
+block a worker thread on Firestore: queries are awaited, independent sub-queries
+(the per-status aggregations of /orders/summary, the operations of /batch) run
+concurrently on the event loop. The listener-backed order cache is not used here.
+
+Run with:
+    uv run app_async.py
+"""
+
+import asyncio
+import datetime
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+from config import Config
+from keys import normalize_phone_number
+import order_mutations
+import timing
+from storage import ORDER_STATUSES
+from storage_async import create_async_repository
+from cache import LRUTTLCache
+from errors import ApiError
+from payloads import parse_limit, parse_since, parse_order_by, order_summary, filter_order_items, format_created_at, user_payload
+from responses import NDJSON_MIMETYPE, astream_records, dumps, stream_format, timed_dumps
+
+class JsonResponse(JSONResponse):
+    def render(self, content):
+        return timed_dumps(content).encode()
+
+app = FastAPI(title='Purchase Orders API', default_response_class=JsonResponse)
+
+if Config.COMPRESSION_ENABLED:
+    app.add_middleware(GZipMiddleware, minimum_size=Config.COMPRESSION_MIN_BYTES, compresslevel=Config.GZIP_LEVEL)
+
+# Storage backend selected by STORAGE_BACKEND (Firestore AsyncClient by default)
+repo = create_async_repository()
+
+# Read-through cache for user lookups, keyed by normalized phone number
+user_cache = LRUTTLCache(
+    'users',
+    ttl_seconds=Config.USER_CACHE_TTL_SECONDS,
+    max_entries=Config.USER_CACHE_MAX_ENTRIES,
+    max_bytes=Config.USER_CACHE_MAX_BYTES,
+)
+
+@app.middleware('http')
+async def request_timing(request, call_next):
+    timer = timing.start_request()
+    if timer is None:
+        return await call_next(request)
+
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        if Config.SERVER_TIMING_ENABLED:
+            response.headers['Server-Timing'] = timer.server_timing()
+        return response
+    finally:
+        # Streamed bodies are still being produced here, their phases are not observed
+        route = request.scope.get('route')
+        timing.finish_request(timer, request.method, route.path if route else 'unmatched', status_code)
+
+@app.exception_handler(ApiError)
+async def api_error_handler(request, e):
+    return JsonResponse({'error': e.message}, status_code=e.status_code)
+
+@app.exception_handler(Exception)
+async def error_handler(request, e):
+    print(f"Error handling {request.method} {request.url.path}: {e}")
+    return JsonResponse({'error': str(e)}, status_code=500)
+
+async def read_json(request):
+    try:
+        data = await request.json()
+    except ValueError:
+        data = None
+    return data if isinstance(data, dict) else {}
+
+async def iterate(values):
+    for value in values:
+        yield value
+
+def stream_response(records, fmt):
+    """Returns a streamed NDJSON or JSON array response of the records."""
+    media_type = NDJSON_MIMETYPE if fmt == 'ndjson' else 'application/json'
+    return StreamingResponse(astream_records(dumps, records, fmt), media_type=media_type)
+
+async def list_orders(email, status=None, cursor=None, limit=None, order_by=None, stream=False):
+    """Async counterpart of main.list_orders."""
+    if not email:
+        raise ApiError('User email is required.', 400)
+
+    try:
+        if stream:
+            limit = parse_limit(limit, default=Config.STREAM_MAX_LIMIT, maximum=Config.STREAM_MAX_LIMIT)
+        else:
+            limit = parse_limit(limit)
+        _, order_direction = parse_order_by(order_by)
+        with timing.phase('query'):
+            # Without streaming, fetch one extra order to know whether there is a next page.
+            found_orders = await repo.stream_orders(
+                email,
+                status=status,
+                direction=order_direction,
+                cursor=cursor,
+                limit=limit if stream else limit + 1,
+            )
+            if not stream:
+                found_orders = [entry async for entry in found_orders]
+    except ValueError as e:
+        raise ApiError(str(e), 400)
+
+    if stream:
+        return (order_summary(data) async for _, data in found_orders), None
+
+    has_more = len(found_orders) > limit
+    found_orders = found_orders[:limit]
+
+    with timing.phase('materialize'):
+        orders = [order_summary(data) for _, data in found_orders]
+    next_cursor = found_orders[-1][0] if has_more and found_orders else None
+    return orders, next_cursor
+
+@app.get('/orders')
+async def get_orders(request: Request):
+    args = request.query_params
+    email = args.get('email')
+    status = args.get('status')
+    cursor = args.get('cursor')
+    print(f"Email: {email}, Status: {status}, Cursor: {cursor}")
+
+    fmt = stream_format(args, request.headers)
+    orders, next_cursor = await list_orders(
+        email,
+        status=status,
+        cursor=cursor,
+        limit=args.get('limit'),
+        order_by=args.get('order_by'),
+        stream=fmt is not None,
+    )
+
+    if fmt:
+        return stream_response(orders, fmt)
+
+    headers = {'X-Next-Cursor': next_cursor} if next_cursor else None
+    return JsonResponse(orders, headers=headers)
+
+async def summarize_orders(email):
+    if not email:
+        raise ApiError('User email is required.', 400)
+
+    with timing.phase('query'):
+        summary, by_status = await repo.summarize_orders(email, ORDER_STATUSES)
+    return {
+        'email': email,
+        'totalOrders': summary['count'],
+        'totalAmount': summary['totalAmount'],
+        'byStatus': by_status,
+    }
+
+# Declared before /orders/{order_id} so 'summary' is not taken as an order ID
+@app.get('/orders/summary')
+async def get_orders_summary(request: Request):
+    email = request.query_params.get('email')
+    print(f"Summarizing orders for email {email}")
+    return await summarize_orders(email)
+
+async def read_order(email, order_id, order_doc=None):
+    if not email:
+        raise ApiError('User email is required.', 400)
+
+    if order_doc is None:
+        with timing.phase('query'):
+            order_doc = await repo.get_order(email, order_id)
+    elif not order_doc.exists or (order_doc.to_dict() or {}).get('userEmail') != email:
+        order_doc = None
+
+    if not order_doc:
+        raise ApiError('Order not found.', 404)
+
+    with timing.phase('materialize'):
+        order_data = order_doc.to_dict()
+        if order_data.get('createdAt'):
+            order_data['createdAt'] = format_created_at(order_data['createdAt'])
+        return order_data
+
+@app.get('/orders/{order_id}')
+async def get_order_by_id(order_id: str, request: Request):
+    email = request.query_params.get('email')
+    print(f"Fetching order {order_id} for email {email}")
+    return await read_order(email, order_id)
+
+async def list_items(email, order_id=None, status=None, since=None, limit=None, order_by=None, stream=False):
+    """Async counterpart of main.list_items."""
+    if not email:
+        raise ApiError('User email is required.', 400)
+
+    try:
+        if stream:
+            limit = parse_limit(limit, default=Config.STREAM_MAX_LIMIT, maximum=Config.STREAM_MAX_LIMIT)
+        else:
+            limit = parse_limit(limit, default=Config.ITEMS_DEFAULT_LIMIT, maximum=Config.ITEMS_MAX_LIMIT)
+        since = parse_since(since)
+        _, order_direction = parse_order_by(order_by)
+    except ValueError as e:
+        raise ApiError(str(e), 400)
+
+    if order_id:
+        with timing.phase('query'):
+            order_doc = await repo.get_order(email, order_id, field_paths=['orderId', 'createdAt', 'items'])
+        with timing.phase('materialize'):
+            orders = [order_doc.to_dict()] if order_doc else []
+            items = filter_order_items(orders, status, since, order_direction, limit)
+        return iterate(items) if stream else items
+
+    # Served from the items index so only the requested items are read
+    with timing.phase('query'):
+        items = await repo.stream_items(email, status=status, since=since, direction=order_direction, limit=limit)
+        return items if stream else [item async for item in items]
+
+@app.get('/items')
+async def get_items(request: Request):
+    args = request.query_params
+    email = args.get('email')
+    order_id = args.get('orderId')
+    status = args.get('status')
+    since = args.get('since')
+    print(f"Email: {email}, Order ID: {order_id}, Status: {status}, Since: {since}")
+
+    fmt = stream_format(args, request.headers)
+    items = await list_items(
+        email,
+        order_id=order_id,
+        status=status,
+        since=since,
+        limit=args.get('limit'),
+        order_by=args.get('order_by'),
+        stream=fmt is not None,
+    )
+
+    if fmt:
+        return stream_response(items, fmt)
+    return items
+
+async def read_item(email, product_id, order_id=None):
+    if not email:
+        raise ApiError('User email is required.', 400)
+
+    with timing.phase('query'):
+        item = await repo.get_item(email, product_id, order_id)
+    if item is None:
+        raise ApiError('Item not found.', 404)
+    return item
+
+@app.get('/items/{product_id}')
+async def get_item(product_id: str, request: Request):
+    args = request.query_params
+    return await read_item(args.get('email'), product_id, args.get('orderId'))
+
+@app.post('/orders/remove-item')
+async def remove_item(request: Request):
+    data = await read_json(request)
+    email = data.get('email')
+    order_id = data.get('orderId')
+    product_id = data.get('productId')
+
+    if not email or not order_id or not product_id:
+        raise ApiError('Email, orderId, and productId are required.', 400)
+
+    with timing.phase('query'):
+        message = await order_mutations.mutate_order_async(
+            repo, email, order_id, order_mutations.remove_item_mutation(product_id)
+        )
+    return {'message': message}
+
+@app.post('/orders/cancel')
+async def cancel_order(request: Request):
+    data = await read_json(request)
+    email = data.get('email')
+    order_id = data.get('orderId')
+
+    if not email or not order_id:
+        raise ApiError('Email and orderId are required.', 400)
+
+    with timing.phase('query'):
+        message = await order_mutations.mutate_order_async(
+            repo, email, order_id, order_mutations.cancel_order_mutation(order_id)
+        )
+    return {'message': message}
+
+@app.post('/orders/feedback')
+async def add_feedback(request: Request):
+    data = await read_json(request)
+    email = data.get('email')
+    order_id = data.get('orderId')
+    feedback = data.get('feedback')
+
+    if not email or not order_id or not feedback:
+        raise ApiError('Email, orderId, and feedback are required.', 400)
+
+    print(f"Feedback for order {order_id} by {email}: {feedback}")
+    return {'message': 'Feedback added successfully.'}
+
+@app.get('/date')
+async def get_date():
+    now = datetime.datetime.now()
+    return {
+        'iso': now.isoformat(),
+        'date': now.strftime('%d/%m/%Y'),
+        'time': now.strftime('%X'),
+    }
+
+@app.post('/users')
+async def create_user(request: Request):
+    data = await read_json(request)
+    phone_number = normalize_phone_number(data.get('phoneNumber'))
+    user_email = data.get('userEmail')
+    user_name = data.get('userName')
+
+    if not phone_number or not user_email or not user_name:
+        raise ApiError('phoneNumber, userEmail, and userName are required.', 400)
+
+    with timing.phase('query'):
+        created = await repo.save_user(phone_number, user_email, user_name)
+
+    if created:
+        return JsonResponse({'message': f'User {phone_number} created successfully.'}, status_code=201)
+
+    user_cache.invalidate(phone_number)
+    return {'message': f'User {phone_number} updated successfully.'}
+
+async def read_user(phone_number, user_doc=None):
+    phone_number = normalize_phone_number(phone_number)
+
+    if not phone_number:
+        raise ApiError('phoneNumber is required.', 400)
+
+    if user_doc is None:
+        if Config.USER_CACHE_ENABLED:
+            user_data = user_cache.get(phone_number)
+            if user_data is not None:
+                return user_data
+
+        print(f"Querying for user with phoneNumber: '{phone_number}'")
+
+        with timing.phase('query'):
+            user_doc = await repo.get_user(phone_number)
+
+    if not user_doc.exists:
+        raise ApiError('User not found.', 404)
+
+    with timing.phase('materialize'):
+        user_data = user_payload(user_doc.to_dict())
+
+    if Config.USER_CACHE_ENABLED:
+        user_cache.set(phone_number, user_data)
+
+    return user_data
+
+@app.get('/users')
+async def get_user(request: Request):
+    return await read_user(request.query_params.get('phoneNumber'))
+
+# Read operations accepted by POST /batch, mapped to their implementation
+BATCH_OPERATIONS = {
+    'getUser': lambda params, doc=None: read_user(params.get('phoneNumber'), user_doc=doc),
+    'getOrders': lambda params, doc=None: list_orders(
+        params.get('email'),
+        status=params.get('status'),
+        cursor=params.get('cursor'),
+        limit=params.get('limit'),
+        order_by=params.get('order_by'),
+    ),
+    'getOrder': lambda params, doc=None: read_order(params.get('email'), params.get('orderId'), order_doc=doc),
+    'getOrdersSummary': lambda params, doc=None: summarize_orders(params.get('email')),
+    'getItems': lambda params, doc=None: list_items(
+        params.get('email'),
+        order_id=params.get('orderId'),
+        status=params.get('status'),
+        since=params.get('since'),
+        limit=params.get('limit'),
+        order_by=params.get('order_by'),
+    ),
+    'getItem': lambda params, doc=None: read_item(params.get('email'), params.get('productId'), params.get('orderId')),
+}
+
+def batch_point_key(operation):
+    """Returns the storage key a batch operation would point-read, or None."""
+    op = operation.get('op')
+    params = operation.get('params') or {}
+    if op == 'getUser':
+        phone_number = normalize_phone_number(params.get('phoneNumber'))
+        if not phone_number or (Config.USER_CACHE_ENABLED and user_cache.contains(phone_number)):
+            return None
+        return ('users', phone_number)
+    if op == 'getOrder' and params.get('email') and params.get('orderId'):
+        return ('orders', params['orderId'])
+    return None
+
+async def run_batch_operation(operation, doc=None):
+    op = operation.get('op')
+    handler = BATCH_OPERATIONS.get(op)
+    result = {'id': operation.get('id'), 'op': op}
+    try:
+        if handler is None:
+            raise ApiError(f"Unsupported operation '{op}'.", 400)
+        body = await handler(operation.get('params') or {}, doc)
+        if op == 'getOrders':
+            body, next_cursor = body
+            if next_cursor:
+                result['nextCursor'] = next_cursor
+        result.update({'status': 200, 'body': body})
+    except ApiError as e:
+        result.update({'status': e.status_code, 'body': {'error': e.message}})
+    except Exception as e:
+        print(f"Error running batch operation {op}: {e}")
+        result.update({'status': 500, 'body': {'error': str(e)}})
+    return result
+
+@app.post('/batch')
+async def batch(request: Request):
+    """
+    Runs several read operations in one request.
+    Point reads are fetched together in one storage read, then every operation
+    runs concurrently on the event loop (e.g. a user and their orders in parallel).
+    """
+    data = await read_json(request)
+    operations = data.get('operations')
+
+    if not operations or not isinstance(operations, list) or not all(isinstance(op, dict) for op in operations):
+        raise ApiError('operations is required.', 400)
+    if len(operations) > Config.BATCH_MAX_OPERATIONS:
+        raise ApiError(f'At most {Config.BATCH_MAX_OPERATIONS} operations are allowed.', 400)
+
+    point_keys = [batch_point_key(operation) for operation in operations]
+    unique_keys = list(dict.fromkeys(key for key in point_keys if key is not None))
+    with timing.phase('query'):
+        documents = await repo.get_many(unique_keys) if unique_keys else {}
+
+    results = await asyncio.gather(*(
+        run_batch_operation(operation, documents.get(key) if key is not None else None)
+        for operation, key in zip(operations, point_keys)
+    ))
+    return {'results': results}
+
+@app.get('/cache/stats')
+async def get_cache_stats():
+    return {'users': user_cache.stats()}
+
+@app.get('/metrics')
+async def get_metrics():
+    payload, content_type = timing.metrics()
+    return Response(payload, media_type=content_type)
+
+if __name__ == "__main__":
+    uvicorn.run(app, host='0.0.0.0', port=Config.PORT)
@@ -0,0 +1,57 @@
+import firebase_admin
+from firebase_admin import firestore
+import sys
+
+from items_index import index_order_items
+
+# Initialize Firebase Admin SDK
+# Use Application Default Credentials
+if not firebase_admin._apps:
+    firebase_admin.initialize_app()
+
+db = firestore.client()
+
+# Firestore allows at most 500 writes per batch
+MAX_BATCH_WRITES = 500
+
+def backfill_items_index(email=None):
+    orders_ref = db.collection('orders')
+    query = orders_ref
+    if email:
+        query = orders_ref.where(filter=firestore.FieldFilter('userEmail', '==', email))
+
+    print("--- Starting Items Index Backfill ---")
+    print(f"Target Email: {email or 'all users'}")
+    print("-------------------------------------\n")
+
+    batch = db.batch()
+    pending_writes = 0
+    orders_count = 0
+    items_count = 0
+
+    for doc in query.stream():
+        order_data = doc.to_dict()
+        item_count = len(order_data.get('items') or [])
+
+        if pending_writes + item_count > MAX_BATCH_WRITES:
+            batch.commit()
+            batch = db.batch()
+            pending_writes = 0
+
+        index_order_items(batch, db, order_data)
+        pending_writes += item_count
+        orders_count += 1
+        items_count += item_count
+
+        if orders_count % 100 == 0:
+            print(f"[{orders_count}] orders indexed ({items_count} items)")
+
+    if pending_writes:
+        batch.commit()
+
+    print(f"\n✨ Indexed {items_count} items from {orders_count} orders.")
+
+if __name__ == "__main__":
+    # Usage: python backfill_items_index.py [email]
+    args = sys.argv[1:]
+    backfill_items_index(args[0] if args else None)
@@ -0,0 +1,161 @@
+"""
+Load comparison of the Flask app (main.py) and the async app (app_async.py) at equal CPU.
+
+Seeds users and orders, starts both servers pinned to the same CPU set with
+`taskset`, and drives each with the same closed-loop mix of reads (/orders,
+/orders/summary, /items, /users and a /batch fetching a user and their orders).
+Reports throughput, latency percentiles and errors per concurrency level.
+
+The servers run in their own processes, so the storage has to be shared:
+the Firestore emulator or a SQLite file.
+
+Usage (from purchase-orders-service/):
+    STORAGE_BACKEND=sqlite SQLITE_PATH=/tmp/bench.db python -m benchmarks.bench_async_load [seconds] [concurrency,...] [cpus]
+    FIRESTORE_EMULATOR_HOST=localhost:8085 python -m benchmarks.bench_async_load [seconds] [concurrency,...] [cpus]
+"""
+
+import json
+import os
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+
+from config import Config
+
+if Config.STORAGE_BACKEND == 'memory':
+    print("❌ The memory backend is per process. Use STORAGE_BACKEND=sqlite or the Firestore emulator.")
+    sys.exit(1)
+if Config.STORAGE_BACKEND == 'firestore' and not os.environ.get('FIRESTORE_EMULATOR_HOST'):
+    print("❌ FIRESTORE_EMULATOR_HOST is not set. This benchmark only runs against the emulator.")
+    sys.exit(1)
+
+os.environ.setdefault('GCLOUD_PROJECT', 'demo-purchase-orders')
+
+from storage import ORDER_STATUSES, create_repository
+
+NUM_USERS = 50
+ORDERS_PER_USER = 40
+SERVERS = {
+    'flask': ([sys.executable, 'main.py'], 8181),
+    'async': ([sys.executable, 'app_async.py'], 8182),
+}
+
+def seed():
+    repo = create_repository()
+    users = []
+    for index in range(NUM_USERS):
+        phone_number = f"+5730000{index:05d}"
+        email = f"load-{index}@example.com"
+        repo.save_user(phone_number, email, f"Usuario {index}")
+        repo.add_orders([{
+            'orderId': uuid.uuid4().hex,
+            'userEmail': email,
+            'status': random.choice(ORDER_STATUSES),
+            'items': [{
+                'productId': uuid.uuid4().hex[:10],
+                'name': f"Producto {i}",
+                'quantity': random.randint(1, 5),
+                'priceAtPurchase': round(random.uniform(10, 500), 2),
+                'status': random.choice(ORDER_STATUSES),
+            } for i in range(3)],
+            'itemCount': 3,
+            'totalAmount': round(random.uniform(10, 1500), 2),
+        } for _ in range(ORDERS_PER_USER)])
+        users.append((phone_number, email))
+    return users
+
+def request_mix(users):
+    phone_number, email = random.choice(users)
+    batch = json.dumps({'operations': [
+        {'id': 'user', 'op': 'getUser', 'params': {'phoneNumber': phone_number}},
+        {'id': 'orders', 'op': 'getOrders', 'params': {'email': email}},
+    ]}).encode()
+    return random.choice([
+        ('GET', f"/orders?email={email}", None),
+        ('GET', f"/orders/summary?email={email}", None),
+        ('GET', f"/items?email={email}", None),
+        ('GET', f"/users?phoneNumber={phone_number}", None),
+        ('POST', '/batch', batch),
+    ])
+
+def wait_until_ready(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/date", timeout=1).read()
+            return
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.2)
+    raise RuntimeError(f"Server on port {port} did not start")
+
+def run_load(port, users, concurrency, seconds):
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.monotonic() + seconds
+
+    def worker():
+        while time.monotonic() < deadline:
+            method, path, body = request_mix(users)
+            request = urllib.request.Request(
+                f"http://127.0.0.1:{port}{path}", data=body, method=method,
+                headers={'Content-Type': 'application/json'},
+            )
+            start = time.perf_counter()
+            try:
+                urllib.request.urlopen(request, timeout=30).read()
+                elapsed = time.perf_counter() - start
+                with lock:
+                    latencies.append(elapsed)
+            except Exception:
+                with lock:
+                    errors[0] += 1
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors[0]
+
+def report(name, concurrency, seconds, latencies, errors):
+    if not latencies:
+        print(f"{name:<6} c={concurrency:<4} no successful requests, errors: {errors}")
+        return
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(f"{name:<6} c={concurrency:<4} {len(latencies) / seconds:8.1f} req/s | "
+          f"p50: {quantiles[49] * 1000:7.1f} ms | p95: {quantiles[94] * 1000:7.1f} ms | "
+          f"p99: {quantiles[98] * 1000:7.1f} ms | errors: {errors}")
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    seconds = float(args[0]) if len(args) >= 1 else 20
+    concurrency_levels = [int(c) for c in args[1].split(',')] if len(args) >= 2 else [1, 10, 50]
+    cpus = args[2] if len(args) >= 3 else '0'
+
+    if not shutil.which('taskset'):
+        print("⚠️ taskset not found, servers will not be pinned to the same CPUs")
+
+    print(f"Seeding {NUM_USERS} users with {ORDERS_PER_USER} orders each...")
+    users = seed()
+
+    for name, (command, port) in SERVERS.items():
+        if shutil.which('taskset'):
+            command = ['taskset', '-c', cpus, *command]
+        env = {**os.environ, 'PORT': str(port)}
+        server = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            wait_until_ready(port)
+            for concurrency in concurrency_levels:
+                latencies, errors = run_load(port, users, concurrency, seconds)
+                report(name, concurrency, seconds, latencies, errors)
+        finally:
+            server.terminate()
+            server.wait()
@@ -0,0 +1,111 @@
+"""
+Concurrency benchmark for order mutations against the Firestore emulator or a
+local storage backend.
+
+Seeds one order with N items and removes every item from parallel threads, then
+cancels the order from parallel threads. Verifies no update is lost and reports
+throughput and the number of requests rejected after exhausting retries.
+
+Usage (from purchase-orders-service/):
+    gcloud emulators firestore start --host-port=localhost:8085
+    FIRESTORE_EMULATOR_HOST=localhost:8085 python -m benchmarks.bench_order_mutations [items] [threads]
+    STORAGE_BACKEND=memory python -m benchmarks.bench_order_mutations [items] [threads]
+"""
+
+import os
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from config import Config
+
+if Config.STORAGE_BACKEND == 'firestore' and not os.environ.get('FIRESTORE_EMULATOR_HOST'):
+    print("❌ FIRESTORE_EMULATOR_HOST is not set. This benchmark only runs against the emulator.")
+    sys.exit(1)
+
+os.environ.setdefault('GCLOUD_PROJECT', 'demo-purchase-orders')
+
+import order_mutations
+from order_mutations import MutationError
+from storage import create_repository
+
+repo = create_repository()
+
+EMAIL = 'bench@example.com'
+
+def seed_order(num_items):
+    order_id = uuid.uuid4().hex
+    items = [{
+        'productId': f"p{i:09d}",
+        'name': f"Producto {i}",
+        'quantity': 1,
+        'priceAtPurchase': 10.0,
+        'status': 'creada',
+    } for i in range(num_items)]
+    order_data = {
+        'orderId': order_id,
+        'userEmail': EMAIL,
+        'status': 'creada',
+        'items': items,
+        'itemCount': num_items,
+        'totalAmount': 10.0 * num_items,
+    }
+    repo.add_orders([order_data])
+    return order_id, [item['productId'] for item in items]
+
+def run_parallel(label, calls, threads):
+    def run(call):
+        try:
+            call()
+            return 'ok'
+        except MutationError as e:
+            return e.status_code
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        outcomes = list(executor.map(run, calls))
+    elapsed = time.perf_counter() - start
+
+    succeeded = outcomes.count('ok')
+    print(f"{label}: {len(calls)} requests in {elapsed:.2f}s ({len(calls) / elapsed:.1f} req/s) | "
+          f"succeeded: {succeeded} | rejected: {len(calls) - succeeded} {sorted(set(o for o in outcomes if o != 'ok'))}")
+    return outcomes
+
+def bench_remove_items(num_items, threads):
+    order_id, product_ids = seed_order(num_items)
+    outcomes = run_parallel(
+        'remove-item',
+        [lambda pid=pid: order_mutations.remove_item(repo, EMAIL, order_id, pid) for pid in product_ids],
+        threads,
+    )
+
+    removed = {pid for pid, outcome in zip(product_ids, outcomes) if outcome == 'ok'}
+    order_data = repo.get_order(EMAIL, order_id).to_dict()
+    remaining = {item['productId'] for item in order_data['items']}
+    indexed = {pid for pid in product_ids if repo.get_item(EMAIL, pid, order_id) is not None}
+
+    expected_remaining = set(product_ids) - removed
+    assert remaining == expected_remaining, f"Lost update: {len(remaining)} items remain, expected {len(expected_remaining)}"
+    assert order_data['itemCount'] == len(expected_remaining), "itemCount out of sync"
+    assert order_data['totalAmount'] == round(10.0 * len(expected_remaining), 2), "totalAmount out of sync"
+    assert indexed == expected_remaining, "Items index out of sync"
+    print("✅ remove-item: order, counters and items index are consistent")
+
+def bench_cancel(threads):
+    order_id, _ = seed_order(1)
+    run_parallel(
+        'cancel',
+        [lambda: order_mutations.cancel_order(repo, EMAIL, order_id) for _ in range(threads)],
+        threads,
+    )
+    assert repo.get_order(EMAIL, order_id).to_dict().get('status') == 'cancelada'
+    print("✅ cancel: order is cancelled")
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    num_items = int(args[0]) if len(args) >= 1 else 50
+    threads = int(args[1]) if len(args) >= 2 else 10
+
+    bench_remove_items(num_items, threads)
+    bench_cancel(threads)
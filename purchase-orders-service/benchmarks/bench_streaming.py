@@ -0,0 +1,97 @@
+"""
+Memory and latency benchmark of buffered vs streamed /orders and /items against
+the Firestore emulator or a local storage backend.
+
+Seeds one user with N orders and requests the full listing through the Flask test
+client as a buffered JSON array, as a streamed NDJSON / JSON array and with gzip.
+Reports time to first byte, total time, response size and peak traced memory.
+
+Usage (from purchase-orders-service/):
+    gcloud emulators firestore start --host-port=localhost:8085
+    FIRESTORE_EMULATOR_HOST=localhost:8085 python -m benchmarks.bench_streaming [orders] [items_per_order]
+    STORAGE_BACKEND=memory python -m benchmarks.bench_streaming [orders] [items_per_order]
+"""
+
+import os
+import random
+import sys
+import time
+import tracemalloc
+import uuid
+
+if os.environ.get('STORAGE_BACKEND', 'firestore') == 'firestore' and not os.environ.get('FIRESTORE_EMULATOR_HOST'):
+    print("❌ FIRESTORE_EMULATOR_HOST is not set. This benchmark only runs against the emulator.")
+    sys.exit(1)
+
+os.environ.setdefault('GCLOUD_PROJECT', 'demo-purchase-orders')
+# Let the buffered endpoints return every order so both modes produce the same payload
+os.environ.setdefault('ORDERS_MAX_LIMIT', '100000')
+os.environ.setdefault('ITEMS_MAX_LIMIT', '100000')
+os.environ.setdefault('STREAM_MAX_LIMIT', '100000')
+
+from main import app, repo
+
+EMAIL = 'bench-streaming@example.com'
+STATUSES = ['creada', 'procesando', 'enviada', 'entregada', 'cancelada']
+
+def seed_orders(num_orders, items_per_order):
+    orders = []
+    for _ in range(num_orders):
+        order_id = uuid.uuid4().hex
+        items = [{
+            'productId': uuid.uuid4().hex[:10],
+            'name': f"Producto {i}",
+            'quantity': random.randint(1, 5),
+            'priceAtPurchase': round(random.uniform(10, 500), 2),
+            'status': random.choice(STATUSES),
+        } for i in range(items_per_order)]
+        orders.append({
+            'orderId': order_id,
+            'userEmail': EMAIL,
+            'status': random.choice(STATUSES),
+            'items': items,
+            'itemCount': len(items),
+            'totalAmount': round(sum(item['priceAtPurchase'] * item['quantity'] for item in items), 2),
+        })
+    repo.add_orders(orders)
+
+def measure(client, label, url, headers=None):
+    tracemalloc.start()
+    start = time.perf_counter()
+    response = client.get(url, headers=headers or {}, buffered=False)
+
+    first_byte = None
+    size = 0
+    for chunk in response.response:
+        if first_byte is None:
+            first_byte = time.perf_counter() - start
+        size += len(chunk)
+    total = time.perf_counter() - start
+    response.close()
+
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<22} status: {response.status_code} | ttfb: {(first_byte or total) * 1000:8.1f} ms | "
+          f"total: {total * 1000:8.1f} ms | size: {size / 1024:9.1f} KiB | peak memory: {peak / 1024 / 1024:7.2f} MiB")
+
+def bench(path):
+    client = app.test_client()
+    url = f"{path}?email={EMAIL}&limit=100000"
+    print(f"--- {path}")
+    measure(client, 'buffered', url)
+    measure(client, 'buffered + gzip', url, {'Accept-Encoding': 'gzip'})
+    measure(client, 'stream ndjson', f"{url}&stream=ndjson")
+    measure(client, 'stream json array', f"{url}&stream=json")
+    measure(client, 'stream ndjson + gzip', f"{url}&stream=ndjson", {'Accept-Encoding': 'gzip'})
+    measure(client, 'stream ndjson + br', f"{url}&stream=ndjson", {'Accept-Encoding': 'br'})
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    num_orders = int(args[0]) if len(args) >= 1 else 5000
+    items_per_order = int(args[1]) if len(args) >= 2 else 3
+
+    print(f"Seeding {num_orders} orders with {items_per_order} items each...")
+    seed_orders(num_orders, items_per_order)
+
+    bench('/orders')
+    bench('/items')
@@ -0,0 +1,56 @@
+import os
+
+class Config:
+    # General
+    PORT = int(os.environ.get('PORT', 8080))
+
+    # Storage backend: firestore, memory or sqlite
+    # memory and sqlite run the full API locally, without GCP credentials.
+    STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'firestore')
+    SQLITE_PATH = os.environ.get('SQLITE_PATH', 'purchase_orders.db')
+
+    # Orders listing
+    # WhatsApp list messages can only render 10 rows, so that is the default page size.
+    ORDERS_DEFAULT_LIMIT = int(os.environ.get('ORDERS_DEFAULT_LIMIT', 10))
+    ORDERS_MAX_LIMIT = int(os.environ.get('ORDERS_MAX_LIMIT', 100))
+
+    # Items listing
+    ITEMS_DEFAULT_LIMIT = int(os.environ.get('ITEMS_DEFAULT_LIMIT', 10))
+    ITEMS_MAX_LIMIT = int(os.environ.get('ITEMS_MAX_LIMIT', 100))
+
+    # Order mutations (optimistic concurrency on remove-item / cancel)
+    ORDER_MUTATION_MAX_ATTEMPTS = int(os.environ.get('ORDER_MUTATION_MAX_ATTEMPTS', 5))
+    ORDER_MUTATION_BACKOFF_SECONDS = float(os.environ.get('ORDER_MUTATION_BACKOFF_SECONDS', 0.05))
+
+    # User lookup cache (GET /users)
+    # Entries are invalidated locally by POST /users. Other instances only see the change
+    # after the TTL, unless the Firestore listener is enabled.
+    USER_CACHE_ENABLED = os.environ.get('USER_CACHE_ENABLED', 'TRUE').upper() == 'TRUE'
+    USER_CACHE_TTL_SECONDS = float(os.environ.get('USER_CACHE_TTL_SECONDS', 300))
+    USER_CACHE_MAX_ENTRIES = int(os.environ.get('USER_CACHE_MAX_ENTRIES', 10000))
+    USER_CACHE_MAX_BYTES = int(os.environ.get('USER_CACHE_MAX_BYTES', 8 * 1024 * 1024))
+    USER_CACHE_LISTENER = os.environ.get('USER_CACHE_LISTENER', 'FALSE').upper() == 'TRUE'
+
+    # Hot cache of active users' orders, kept fresh by Firestore listeners
+    # Listeners need CPU between requests, deploy with --no-cpu-throttling when enabled.
+    ORDER_CACHE_ENABLED = os.environ.get('ORDER_CACHE_ENABLED', 'FALSE').upper() == 'TRUE'
+    ORDER_CACHE_IDLE_SECONDS = float(os.environ.get('ORDER_CACHE_IDLE_SECONDS', 600))
+    ORDER_CACHE_MAX_USERS = int(os.environ.get('ORDER_CACHE_MAX_USERS', 100))
+    ORDER_CACHE_MAX_BYTES = int(os.environ.get('ORDER_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+    ORDER_CACHE_SNAPSHOT_TIMEOUT_SECONDS = float(os.environ.get('ORDER_CACHE_SNAPSHOT_TIMEOUT_SECONDS', 5))
+
+    # POST /batch
+    BATCH_MAX_OPERATIONS = int(os.environ.get('BATCH_MAX_OPERATIONS', 10))
+
+    # Response encoding
+    # Streaming (?stream=ndjson|json) is limited by STREAM_MAX_LIMIT instead of the page limits.
+    FAST_JSON_ENABLED = os.environ.get('FAST_JSON_ENABLED', 'TRUE').upper() == 'TRUE'
+    STREAM_MAX_LIMIT = int(os.environ.get('STREAM_MAX_LIMIT', 10000))
+    COMPRESSION_ENABLED = os.environ.get('COMPRESSION_ENABLED', 'TRUE').upper() == 'TRUE'
+    COMPRESSION_MIN_BYTES = int(os.environ.get('COMPRESSION_MIN_BYTES', 1024))
+    GZIP_LEVEL = int(os.environ.get('GZIP_LEVEL', 6))
+    BROTLI_QUALITY = int(os.environ.get('BROTLI_QUALITY', 5))
+
+    # Request timing: per-phase histograms on /metrics and Server-Timing response headers
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'TRUE').upper() == 'TRUE'
+    SERVER_TIMING_ENABLED = os.environ.get('SERVER_TIMING_ENABLED', 'TRUE').upper() == 'TRUE'
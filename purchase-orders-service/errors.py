@@ -0,0 +1,6 @@
+class ApiError(Exception):
+    """An error that maps to an HTTP error response: `{'error': message}` with `status_code`."""
+    def __init__(self, message, status_code):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
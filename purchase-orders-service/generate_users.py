@@ -1,63 +1,45 @@
+"""
+Generates mock users 0..<numUsers>-1.
+
+Users are deterministic for a given --seed and share their emails with the
+orders generate_orders.py --users creates for the same seed. Written with a
+Firestore BulkWriter (or parallel batched commits with --writer batch) from
+--workers processes, or into a local storage engine with --target sqlite.
+Set FIRESTORE_EMULATOR_HOST to target the emulator.
+
+Examples:
+    python generate_users.py 50
+    python generate_users.py 100000 --seed 7 --workers 8
+"""
+
+import argparse
+import os
+
+from seed_data import run_parallel
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Generate mock users.')
+    parser.add_argument('num_users', nargs='?', type=int, default=5, help='number of users (default 5)')
+    parser.add_argument('--seed', type=int, default=0, help='random seed (default 0)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='writer processes (default: CPU count)')
+    parser.add_argument('--target', choices=['firestore', 'sqlite'], default='firestore')
+    parser.add_argument('--writer', choices=['bulk', 'batch'], default='bulk', help='Firestore BulkWriter or parallel batched commits')
+    parser.add_argument('--threads', type=int, default=8, help='commit threads per process with --writer batch (default 8)')
+    parser.add_argument('--ops-per-second', type=int, help='BulkWriter rate (default: the SDK ramp-up from 500 ops/s)')
+    return parser.parse_args()
 
-import firebase_admin
-from firebase_admin import credentials, firestore
-from faker import Faker
-import random
-import sys
-import datetime
-
-# Initialize Firebase Admin SDK
-# Use Application Default Credentials
-if not firebase_admin._apps:
-    firebase_admin.initialize_app()
-
-db = firestore.client()
-
-# Initialize Faker with Mexico locale
-fake = Faker('es_MX')
-
-def generate_mock_users(num_users):
-    users_ref = db.collection('users')
+if __name__ == "__main__":
+    args = parse_args()
+    sink_options = {
+        'target': args.target,
+        'writer': args.writer,
+        'threads': args.threads,
+        'ops_per_second': args.ops_per_second,
+    }
 
     print("--- Starting User Generation ---")
-    print(f"Count: {num_users} users")
+    print(f"Count: {args.num_users} users | Target: {args.target} | Workers: {args.workers} | Seed: {args.seed}")
     print("---------------------------\n")
 
-    for i in range(num_users):
-        phone_number = fake.phone_number()
-        user_email = fake.email()
-        user_name = fake.name()
-        
-        # Ensure unique phone number (basic check not needed for mock data usually, but good practice)
-        # For simplicity in mock generation, we trust Faker's randomness or just proceed.
-
-        user_data = {
-            'phoneNumber': phone_number,
-            'userEmail': user_email,
-            'userName': user_name,
-            'createdAt': datetime.datetime.now()
-        }
-
-        try:
-            # Add to Firestore
-            users_ref.add(user_data)
-            print(f"[{i + 1}/{num_users}] ✅ Created user: {user_name} ({phone_number})")
-        except Exception as e:
-            print(f"❌ Error inserting user {i}: {e}")
-
-    print("\n✨ All users have been successfully inserted.")
-
-if __name__ == "__main__":
-    # Usage: python test_users.py <numUsers>
-    args = sys.argv[1:]
-    
-    # Defaults
-    num_users = 5
-
-    if len(args) >= 1:
-        try:
-            num_users = int(args[0])
-        except ValueError:
-            pass
-    
-    generate_mock_users(num_users)
+    written, seconds = run_parallel('users', args.num_users, args.seed, sink_options, workers=args.workers)
+    print(f"\n✨ Inserted {written} users in {seconds:.1f}s ({written / seconds if seconds else 0:.0f} users/s).")
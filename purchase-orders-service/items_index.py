@@ -0,0 +1,50 @@
+"""
+Denormalized product-level index of order items.
+
+Every item of every order is mirrored into the `order_items` collection under the
+document ID `<userEmail>:<orderId>:<productId>`, so a single item can be fetched
+with one direct read instead of scanning all of a user's orders. The same product
+bought in several orders has one entry per order; without an orderId, lookups
+query the user's entries of the product and take the latest purchase.
+"""
+
+ITEMS_INDEX_COLLECTION = 'order_items'
+
+# Fields stored on index entries that are not part of the item payload.
+INDEX_ONLY_FIELDS = ('userEmail', 'orderCreatedAt')
+
+def item_index_id(email, order_id, product_id):
+    """Returns the index document ID for a product of one of a user's orders."""
+    return f"{email}:{order_id}:{product_id}"
+
+def item_index_ref(db, email, order_id, product_id):
+    return db.collection(ITEMS_INDEX_COLLECTION).document(item_index_id(email, order_id, product_id))
+
+def entry_index_id(entry):
+    """Returns the document ID an index entry belongs under."""
+    return item_index_id(entry.get('userEmail'), entry.get('orderId'), entry.get('productId'))
+
+def build_item_index_entry(order_data, item):
+    """Builds the index document for one item of an order."""
+    entry = dict(item)
+    entry['orderId'] = order_data.get('orderId')
+    entry['userEmail'] = order_data.get('userEmail')
+    entry['orderCreatedAt'] = order_data.get('createdAt')
+    return entry
+
+def index_entry_to_item(entry):
+    """Strips index-only fields so the entry matches the /items payload."""
+    return {key: value for key, value in entry.items() if key not in INDEX_ONLY_FIELDS}
+
+def index_order_items(batch, db, order_data):
+    """Adds a set() for every item of the order to the given batch/transaction."""
+    email = order_data.get('userEmail')
+    for item in order_data.get('items') or []:
+        product_id = item.get('productId')
+        if not email or not product_id:
+            continue
+        batch.set(item_index_ref(db, email, order_data.get('orderId'), product_id), build_item_index_entry(order_data, item))
+
+def unindex_item(batch, db, email, order_id, product_id):
+    """Adds a delete() of the item's index entry to the given batch/transaction."""
+    batch.delete(item_index_ref(db, email, order_id, product_id))
@@ -0,0 +1,30 @@
+"""
+Keyed storage layout.
+
+Orders are stored under their `orderId` and users under their normalized phone
+number, so lookups and mutations are direct document reads/writes instead of
+`where(...).limit(1)` queries.
+"""
+
+def normalize_phone_number(phone_number):
+    """Normalizes a phone number to E.164-like form: '+' followed by digits only."""
+    digits = ''.join(ch for ch in str(phone_number or '') if ch.isdigit())
+    return f"+{digits}" if digits else ''
+
+def order_ref(db, order_id):
+    return db.collection('orders').document(order_id)
+
+def user_ref(db, phone_number):
+    return db.collection('users').document(normalize_phone_number(phone_number))
+
+def get_user_order_doc(db, email, order_id, field_paths=None):
+    """
+    Reads an order with a single point read.
+    Returns None when the order does not exist or belongs to another user.
+    """
+    if field_paths is not None and 'userEmail' not in field_paths:
+        field_paths = [*field_paths, 'userEmail']
+    doc = order_ref(db, order_id).get(field_paths=field_paths)
+    if not doc.exists or (doc.to_dict() or {}).get('userEmail') != email:
+        return None
+    return doc
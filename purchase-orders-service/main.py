@@ -1,147 +1,385 @@
 import os
 import datetime
-from flask import Flask, request, jsonify
-import firebase_admin
-from firebase_admin import credentials, firestore
-
-# Initialize Firebase Admin SDK
-# Inherits credentials from the environment (Cloud Run)
-firebase_admin.initialize_app()
-db = firestore.client()
+from concurrent.futures import ThreadPoolExecutor
+from flask import Flask, Response, request, jsonify, stream_with_context
+
+from config import Config
+from keys import normalize_phone_number
+import order_mutations
+import timing
+from storage import EPOCH, ORDER_STATUSES, create_repository, summarize_order_data
+from cache import LRUTTLCache
+from order_cache import UserOrdersCache
+from errors import ApiError
+from payloads import (
+    format_created_at, parse_limit, parse_since, parse_order_by, order_summary, order_items, filter_order_items,
+    user_payload,
+)
+from responses import NDJSON_MIMETYPE, init_json_provider, stream_format, stream_records, compress_response
+
+# Storage backend selected by STORAGE_BACKEND (Firestore by default)
+repo = create_repository()
 
 app = Flask(__name__)
+init_json_provider(app)
+
+@app.before_request
+def before_request():
+    timing.start_request()
+
+@app.after_request
+def after_request(response):
+    response = compress_response(request, response)
+
+    timer = timing.current()
+    if timer is not None:
+        if Config.SERVER_TIMING_ENABLED:
+            response.headers['Server-Timing'] = timer.server_timing()
+        # Observed once the body is sent, so streamed responses are fully timed
+        method, route = request.method, request.url_rule.rule if request.url_rule else 'unmatched'
+        response.call_on_close(lambda: timing.finish_request(timer, method, route, response.status_code))
+    return response
+
+# Pool for /batch operations, which may themselves fan out inside the repository
+batch_executor = ThreadPoolExecutor(max_workers=Config.BATCH_MAX_OPERATIONS)
+
+# Read-through cache for user lookups, keyed by normalized phone number
+user_cache = LRUTTLCache(
+    'users',
+    ttl_seconds=Config.USER_CACHE_TTL_SECONDS,
+    max_entries=Config.USER_CACHE_MAX_ENTRIES,
+    max_bytes=Config.USER_CACHE_MAX_BYTES,
+)
+
+def on_users_changes(changes):
+    """Invalidates cached users modified or removed by any writer."""
+    for change_type, doc_id, _ in changes:
+        if change_type in ('MODIFIED', 'REMOVED'):
+            user_cache.invalidate(doc_id)
+
+if Config.USER_CACHE_ENABLED and Config.USER_CACHE_LISTENER:
+    users_watch = repo.watch_users(on_users_changes)
+
+# Listener-backed cache of active users' orders, serves every read endpoint when enabled
+order_cache = UserOrdersCache(
+    repo,
+    idle_seconds=Config.ORDER_CACHE_IDLE_SECONDS,
+    max_users=Config.ORDER_CACHE_MAX_USERS,
+    max_bytes=Config.ORDER_CACHE_MAX_BYTES,
+    snapshot_timeout_seconds=Config.ORDER_CACHE_SNAPSHOT_TIMEOUT_SECONDS,
+) if Config.ORDER_CACHE_ENABLED else None
+
+def get_cached_orders(email):
+    """Returns the user's cached `{document ID: order data}` or None to fall back to storage."""
+    if order_cache is None:
+        return None
+    return order_cache.get_orders(email)
+
+def select_cached_orders(cached_orders, order_id=None):
+    """Returns the cached orders, narrowed to one order when order_id is given."""
+    if not order_id:
+        return list(cached_orders.values())
+    order_data = cached_orders.get(order_id)
+    return [order_data] if order_data else []
+
+def on_order_commit(email):
+    """Returns the on_commit hook that keeps the order cache read-your-writes consistent."""
+    if order_cache is None:
+        return None
+    return lambda doc_id, updates: order_cache.apply_local_update(email, doc_id, updates)
+
+def page_cached_orders(cached_orders, status, order_direction, cursor, limit):
+    """
+    Filters, sorts and paginates cached orders like the Firestore /orders query.
+    Returns `(page, next_cursor)` where page is a list of `(document ID, order data)`.
+    """
+    entries = [
+        (doc_id, data) for doc_id, data in cached_orders.items()
+        if not status or data.get('status') == status
+    ]
+    entries.sort(
+        key=lambda entry: (entry[1].get('createdAt') or EPOCH, entry[0]),
+        reverse=order_direction == 'desc',
+    )
+
+    start = 0
+    if cursor:
+        positions = [index for index, (doc_id, _) in enumerate(entries) if doc_id == cursor]
+        if not positions:
+            raise ValueError('Invalid cursor.')
+        start = positions[0] + 1
+
+    page = entries[start:start + limit]
+    next_cursor = page[-1][0] if page and start + limit < len(entries) else None
+    return page, next_cursor
+
+def list_orders(email, status=None, cursor=None, limit=None, order_by=None, stream=False):
+    """
+    Returns one page of a user's orders as `(orders, next_cursor)`.
+    The cursor is the document ID of the last order of the previous page.
+
+    With `stream=True` orders is a generator reading straight from the storage
+    stream, the limit may go up to STREAM_MAX_LIMIT and no next cursor is returned.
+    """
+    if not email:
+        raise ApiError('User email is required.', 400)
+
+    try:
+        if stream:
+            limit = parse_limit(limit, default=Config.STREAM_MAX_LIMIT, maximum=Config.STREAM_MAX_LIMIT)
+        else:
+            limit = parse_limit(limit)
+        _, order_direction = parse_order_by(order_by)
+    except ValueError as e:
+        raise ApiError(str(e), 400)
+
+    cached_orders = get_cached_orders(email)
+    if cached_orders is not None:
+        try:
+            with timing.phase('materialize'):
+                page, next_cursor = page_cached_orders(cached_orders, status, order_direction, cursor, limit)
+        except ValueError as e:
+            raise ApiError(str(e), 400)
+        if stream:
+            return (order_summary(data) for _, data in page), None
+        with timing.phase('materialize'):
+            return [order_summary(data) for _, data in page], next_cursor
+
+    try:
+        with timing.phase('query'):
+            # Without streaming, fetch one extra order to know whether there is a next page.
+            found_orders = repo.stream_orders(
+                email,
+                status=status,
+                direction=order_direction,
+                cursor=cursor,
+                limit=limit if stream else limit + 1,
+            )
+            if not stream:
+                found_orders = list(found_orders)
+    except ValueError as e:
+        raise ApiError(str(e), 400)
+
+    if stream:
+        return (order_summary(data) for _, data in found_orders), None
+
+    has_more = len(found_orders) > limit
+    found_orders = found_orders[:limit]
+
+    with timing.phase('materialize'):
+        orders = [order_summary(data) for _, data in found_orders]
+    next_cursor = found_orders[-1][0] if has_more and found_orders else None
+    return orders, next_cursor
+
+def stream_response(records, fmt):
+    """Returns a streamed NDJSON or JSON array response of the records."""
+    mimetype = NDJSON_MIMETYPE if fmt == 'ndjson' else 'application/json'
+    return Response(stream_with_context(stream_records(app.json.encode, records, fmt)), mimetype=mimetype)
 
 @app.route('/orders', methods=['GET'])
 def get_orders():
     try:
         email = request.args.get('email')
         status = request.args.get('status')
-        print(f"Email: {email}, Status: {status}")
-
-        if not email:
-            return jsonify({'error': 'User email is required.'}), 400
-
-        orders_ref = db.collection('orders')
-        query = orders_ref.where(filter=firestore.FieldFilter('userEmail', '==', email))
-
-        if status:
-            query = query.where(filter=firestore.FieldFilter('status', '==', status))
-
-        docs = query.stream()
-        orders = []
-        
-        # Check if empty - stream() doesn't have an empty property easily checkable without consuming
-        # So we just consume it.
-        found_docs = list(docs)
-        
-        if not found_docs:
-             return jsonify([]), 200
-
-        for doc in found_docs:
-            data = doc.to_dict()
-            # Handle createdAt - assuming it's a Firestore Timestamp
-            created_at = data.get('createdAt')
-            if created_at:
-                # Firestore timestamp to datetime
-                dt = created_at
-                if hasattr(created_at, 'date'): # Logic if it's already a datetime or Timestamp
-                     pass # it is datetime-like
-                else:
-                     # Fallback if it's not a datetime object (unlikely with firestore client)
-                     pass
-                
-                # Format: YYYY-MM-DD HH:MM
-                formatted_created_at = created_at.strftime('%Y-%m-%d %H:%M')
-            else:
-                formatted_created_at = None
-
-            orders.append({
-                'orderId': data.get('orderId'),
-                'status': data.get('status'),
-                'createdAt': formatted_created_at,
-                'itemCount': len(data.get('items', [])),
-                'totalAmount': data.get('totalAmount'),
-            })
-
-        return jsonify(orders), 200
+        cursor = request.args.get('cursor')
+        print(f"Email: {email}, Status: {status}, Cursor: {cursor}")
+
+        fmt = stream_format(request.args, request.headers)
+        orders, next_cursor = list_orders(
+            email,
+            status=status,
+            cursor=cursor,
+            limit=request.args.get('limit'),
+            order_by=request.args.get('order_by'),
+            stream=fmt is not None,
+        )
+
+        if fmt:
+            return stream_response(orders, fmt)
+
+        response = jsonify(orders)
+        if next_cursor:
+            response.headers['X-Next-Cursor'] = next_cursor
+        return response, 200
+
+    except ApiError as e:
+        return jsonify({'error': e.message}), e.status_code
 
     except Exception as e:
         print(f"Error fetching orders: {e}")
         return jsonify({'error': str(e)}), 500
 
+def summarize_orders(email):
+    """Returns order counts and summed totalAmount per status for a user."""
+    if not email:
+        raise ApiError('User email is required.', 400)
+
+    cached_orders = get_cached_orders(email)
+    if cached_orders is not None:
+        with timing.phase('materialize'):
+            summary, by_status = summarize_order_data(cached_orders.values(), ORDER_STATUSES)
+    else:
+        with timing.phase('query'):
+            summary, by_status = repo.summarize_orders(email, ORDER_STATUSES)
+
+    return {
+        'email': email,
+        'totalOrders': summary['count'],
+        'totalAmount': summary['totalAmount'],
+        'byStatus': by_status,
+    }
+
+@app.route('/orders/summary', methods=['GET'])
+def get_orders_summary():
+    try:
+        email = request.args.get('email')
+        print(f"Summarizing orders for email {email}")
+
+        return jsonify(summarize_orders(email)), 200
+
+    except ApiError as e:
+        return jsonify({'error': e.message}), e.status_code
+
+    except Exception as e:
+        print(f"Error summarizing orders: {e}")
+        return jsonify({'error': str(e)}), 500
+
+def read_order(email, order_id, order_doc=None):
+    """
+    Returns one order of a user. `order_doc` can carry a snapshot already
+    fetched (e.g. by a batched get_all) to skip the point read.
+    """
+    if not email:
+        raise ApiError('User email is required.', 400)
+
+    cached_orders = get_cached_orders(email) if order_doc is None else None
+    if cached_orders is not None:
+        order_data = cached_orders.get(order_id)
+        if order_data is None:
+            raise ApiError('Order not found.', 404)
+        order_data = dict(order_data)
+    else:
+        if order_doc is None:
+            with timing.phase('query'):
+                order_doc = repo.get_order(email, order_id)
+        elif not order_doc.exists or (order_doc.to_dict() or {}).get('userEmail') != email:
+            order_doc = None
+
+        if not order_doc:
+            raise ApiError('Order not found.', 404)
+
+        with timing.phase('materialize'):
+            order_data = order_doc.to_dict()
+
+    # Handle createdAt serialization
+    if order_data.get('createdAt'):
+        order_data['createdAt'] = format_created_at(order_data['createdAt'])
+
+    return order_data
+
 @app.route('/orders/<order_id>', methods=['GET'])
 def get_order_by_id(order_id):
     try:
         email = request.args.get('email')
-        
-        if not email:
-            return jsonify({'error': 'User email is required.'}), 400
-
         print(f"Fetching order {order_id} for email {email}")
 
-        orders_ref = db.collection('orders')
-        query = orders_ref.where(filter=firestore.FieldFilter('userEmail', '==', email))\
-                          .where(filter=firestore.FieldFilter('orderId', '==', order_id))\
-                          .limit(1)
-        
-        docs = list(query.stream())
-
-        if not docs:
-            return jsonify({'error': 'Order not found.'}), 404
-
-        order_data = docs[0].to_dict()
-        
-        # Handle createdAt serialization
-        created_at = order_data.get('createdAt')
-        if created_at:
-             # Assuming it's a datetime/Timestamp object
-             if hasattr(created_at, 'strftime'):
-                order_data['createdAt'] = created_at.strftime('%Y-%m-%d %H:%M')
-             else:
-                order_data['createdAt'] = str(created_at)
-
-        return jsonify(order_data), 200
+        return jsonify(read_order(email, order_id)), 200
+
+    except ApiError as e:
+        return jsonify({'error': e.message}), e.status_code
 
     except Exception as e:
         print(f"Error fetching order: {e}")
         return jsonify({'error': str(e)}), 500
 
+def list_items(email, order_id=None, status=None, since=None, limit=None, order_by=None, stream=False):
+    """
+    Returns the purchased items of a user, optionally narrowed to one order,
+    filtered by item status and order creation date, sorted by order creation date.
+
+    With `stream=True` items from the index are returned as a generator over the
+    storage stream and the limit may go up to STREAM_MAX_LIMIT.
+    """
+    if not email:
+        raise ApiError('User email is required.', 400)
+
+    try:
+        if stream:
+            limit = parse_limit(limit, default=Config.STREAM_MAX_LIMIT, maximum=Config.STREAM_MAX_LIMIT)
+        else:
+            limit = parse_limit(limit, default=Config.ITEMS_DEFAULT_LIMIT, maximum=Config.ITEMS_MAX_LIMIT)
+        since = parse_since(since)
+        _, order_direction = parse_order_by(order_by)
+    except ValueError as e:
+        raise ApiError(str(e), 400)
+
+    cached_orders = get_cached_orders(email)
+    if cached_orders is not None:
+        with timing.phase('materialize'):
+            return filter_order_items(select_cached_orders(cached_orders, order_id), status, since, order_direction, limit)
+
+    if order_id:
+        with timing.phase('query'):
+            order_doc = repo.get_order(email, order_id, field_paths=['orderId', 'createdAt', 'items'])
+        with timing.phase('materialize'):
+            orders = [order_doc.to_dict()] if order_doc else []
+            return filter_order_items(orders, status, since, order_direction, limit)
+
+    # Served from the items index so only the requested items are read
+    with timing.phase('query'):
+        items = repo.stream_items(email, status=status, since=since, direction=order_direction, limit=limit)
+        return items if stream else list(items)
 
 @app.route('/items', methods=['GET'])
 def get_items():
     try:
         email = request.args.get('email')
         order_id = request.args.get('orderId')
-        print(f"Email: {email}, Order ID: {order_id}")
+        status = request.args.get('status')
+        since = request.args.get('since')
+        print(f"Email: {email}, Order ID: {order_id}, Status: {status}, Since: {since}")
+
+        fmt = stream_format(request.args, request.headers)
+        items = list_items(
+            email,
+            order_id=order_id,
+            status=status,
+            since=since,
+            limit=request.args.get('limit'),
+            order_by=request.args.get('order_by'),
+            stream=fmt is not None,
+        )
 
-        if not email:
-            return jsonify({'error': 'User email is required.'}), 400
+        if fmt:
+            return stream_response(items, fmt)
+        return jsonify(items), 200
 
-        orders_ref = db.collection('orders')
-        query = orders_ref.where(filter=firestore.FieldFilter('userEmail', '==', email))
+    except ApiError as e:
+        return jsonify({'error': e.message}), e.status_code
 
-        if order_id:
-            query = query.where(filter=firestore.FieldFilter('orderId', '==', order_id))
+    except Exception as e:
+        print(f"Error fetching purchased items: {e}")
+        return jsonify({'error': str(e)}), 500
 
-        docs = list(query.stream())
-        if not docs:
-            return jsonify([]), 200
+def read_item(email, product_id, order_id=None):
+    """Returns one purchased item of a user."""
+    if not email:
+        raise ApiError('User email is required.', 400)
 
-        purchased_items = []
-        for doc in docs:
-            order_data = doc.to_dict()
-            items = order_data.get('items')
-            if items and isinstance(items, list):
-                for item in items:
-                    item_copy = item.copy()
-                    item_copy['orderId'] = order_data.get('orderId')
-                    purchased_items.append(item_copy)
+    cached_orders = get_cached_orders(email)
+    if cached_orders is not None:
+        for order_data in select_cached_orders(cached_orders, order_id):
+            for item in order_items(order_data):
+                if item.get('productId') == product_id:
+                    return item
+        raise ApiError('Item not found.', 404)
 
-        return jsonify(purchased_items), 200
+    with timing.phase('query'):
+        item = repo.get_item(email, product_id, order_id)
+    if item is None:
+        raise ApiError('Item not found.', 404)
 
-    except Exception as e:
-        print(f"Error fetching purchased items: {e}")
-        return jsonify({'error': str(e)}), 500
+    return item
 
 @app.route('/items/<product_id>', methods=['GET'])
 def get_item(product_id):
@@ -149,27 +387,10 @@ def get_item(product_id):
         email = request.args.get('email')
         order_id = request.args.get('orderId')
 
-        if not email:
-            return jsonify({'error': 'User email is required.'}), 400
+        return jsonify(read_item(email, product_id, order_id)), 200
 
-        orders_ref = db.collection('orders')
-        query = orders_ref.where(filter=firestore.FieldFilter('userEmail', '==', email))
-
-        if order_id:
-            query = query.where(filter=firestore.FieldFilter('orderId', '==', order_id))
-
-        docs = query.stream()
-
-        for doc in docs:
-            order_data = doc.to_dict()
-            items = order_data.get('items', [])
-            for item in items:
-                if item.get('productId') == product_id:
-                    item_copy = item.copy()
-                    item_copy['orderId'] = order_data.get('orderId')
-                    return jsonify(item_copy), 200
-
-        return jsonify({'error': 'Item not found.'}), 404
+    except ApiError as e:
+        return jsonify({'error': e.message}), e.status_code
 
     except Exception as e:
         print(f"Error fetching item: {e}")
@@ -186,39 +407,13 @@ def remove_item():
         if not email or not order_id or not product_id:
             return jsonify({'error': 'Email, orderId, and productId are required.'}), 400
 
-        orders_ref = db.collection('orders')
-        query = orders_ref.where(filter=firestore.FieldFilter('userEmail', '==', email))\
-                          .where(filter=firestore.FieldFilter('orderId', '==', order_id))\
-                          .limit(1)
-        
-        docs = list(query.stream())
-
-        if not docs:
-            return jsonify({'error': 'Order not found.'}), 404
-
-        order_doc = docs[0]
-        order_data = order_doc.to_dict()
-        items = order_data.get('items', [])
-
-        item_to_remove = next((item for item in items if item.get('productId') == product_id), None)
-
-        if not item_to_remove:
-            return jsonify({'error': 'Item not found in order.'}), 404
+        with timing.phase('query'):
+            message = order_mutations.remove_item(repo, email, order_id, product_id, on_commit=on_order_commit(email))
 
-        new_items = [item for item in items if item.get('productId') != product_id]
-        
-        # Recalculate total amount
-        new_total_amount = sum(
-            float(item.get('priceAtPurchase', 0)) * int(item.get('quantity', 0))
-            for item in new_items
-        )
-
-        order_doc.reference.update({
-            'items': new_items,
-            'totalAmount': round(new_total_amount, 2)
-        })
+        return jsonify({'message': message}), 200
 
-        return jsonify({'message': 'Item removed successfully.'}), 200
+    except ApiError as e:
+        return jsonify({'error': e.message}), e.status_code
 
     except Exception as e:
         print(f"Error removing item from order: {e}")
@@ -234,25 +429,13 @@ def cancel_order():
         if not email or not order_id:
              return jsonify({'error': 'Email and orderId are required.'}), 400
 
-        orders_ref = db.collection('orders')
-        query = orders_ref.where(filter=firestore.FieldFilter('userEmail', '==', email))\
-                          .where(filter=firestore.FieldFilter('orderId', '==', order_id))\
-                          .limit(1)
-        
-        docs = list(query.stream())
-
-        if not docs:
-            return jsonify({'error': 'Order not found.'}), 404
-
-        order_doc = docs[0]
-        order_data = order_doc.to_dict()
-
-        if order_data.get('status') == 'cancelada':
-             return jsonify({'message': 'Order is already cancelled.'}), 200
+        with timing.phase('query'):
+            message = order_mutations.cancel_order(repo, email, order_id, on_commit=on_order_commit(email))
 
-        order_doc.reference.update({'status': 'cancelada'})
+        return jsonify({'message': message}), 200
 
-        return jsonify({'message': f'Order {order_id} cancelled successfully.'}), 200
+    except ApiError as e:
+        return jsonify({'error': e.message}), e.status_code
 
     except Exception as e:
         print(f"Error cancelling order: {e}")
@@ -293,68 +476,173 @@ def get_date():
 def create_user():
     try:
         data = request.get_json()
-        phone_number = data.get('phoneNumber')
+        phone_number = normalize_phone_number(data.get('phoneNumber'))
         user_email = data.get('userEmail')
         user_name = data.get('userName')
 
         if not phone_number or not user_email or not user_name:
             return jsonify({'error': 'phoneNumber, userEmail, and userName are required.'}), 400
 
-        # Check if user already exists
-        users_ref = db.collection('users')
-        query = users_ref.where(filter=firestore.FieldFilter('phoneNumber', '==', phone_number)).limit(1)
-        docs = list(query.stream())
-
-        if docs:
-            # Update existing user
-            user_doc = docs[0]
-            user_doc.reference.update({
-                'userEmail': user_email,
-                'userName': user_name
-            })
-            return jsonify({'message': f'User {phone_number} updated successfully.'}), 200
-        else:
-            # Create new user
-            users_ref.add({
-                'phoneNumber': phone_number,
-                'userEmail': user_email,
-                'userName': user_name,
-                'createdAt': firestore.SERVER_TIMESTAMP
-            })
+        with timing.phase('query'):
+            created = repo.save_user(phone_number, user_email, user_name)
+
+        if created:
             return jsonify({'message': f'User {phone_number} created successfully.'}), 201
 
+        user_cache.invalidate(phone_number)
+        return jsonify({'message': f'User {phone_number} updated successfully.'}), 200
+
     except Exception as e:
         print(f"Error creating/updating user: {e}")
         return jsonify({'error': str(e)}), 500
 
+def read_user(phone_number, user_doc=None):
+    """
+    Returns a user by phone number through the user cache. `user_doc` can carry a
+    snapshot already fetched (e.g. by a batched get_all) to skip the point read.
+    """
+    phone_number = normalize_phone_number(phone_number)
+
+    if not phone_number:
+        raise ApiError('phoneNumber is required.', 400)
+
+    if user_doc is None:
+        if Config.USER_CACHE_ENABLED:
+            user_data = user_cache.get(phone_number)
+            if user_data is not None:
+                return user_data
+
+        print(f"Querying for user with phoneNumber: '{phone_number}'")
+
+        with timing.phase('query'):
+            user_doc = repo.get_user(phone_number)
+
+    if not user_doc.exists:
+        raise ApiError('User not found.', 404)
+
+    with timing.phase('materialize'):
+        user_data = user_payload(user_doc.to_dict())
+
+    if Config.USER_CACHE_ENABLED:
+        user_cache.set(phone_number, user_data)
+
+    return user_data
+
 @app.route('/users', methods=['GET'])
 def get_user():
     try:
-        phone_number = request.args.get('phoneNumber')
-        
-        if not phone_number:
-            return jsonify({'error': 'phoneNumber is required.'}), 400
-            
-        print(f"Querying for user with phoneNumber: '{phone_number}'")
+        return jsonify(read_user(request.args.get('phoneNumber'))), 200
+
+    except ApiError as e:
+        return jsonify({'error': e.message}), e.status_code
+
+    except Exception as e:
+        print(f"Error fetching user: {e}")
+        return jsonify({'error': str(e)}), 500
 
-        users_ref = db.collection('users')
-        query = users_ref.where(filter=firestore.FieldFilter('phoneNumber', '==', phone_number)).limit(1)
-        docs = list(query.stream())
+# Read operations accepted by POST /batch, mapped to their implementation
+BATCH_OPERATIONS = {
+    'getUser': lambda params, doc=None: read_user(params.get('phoneNumber'), user_doc=doc),
+    'getOrders': lambda params, doc=None: list_orders(
+        params.get('email'),
+        status=params.get('status'),
+        cursor=params.get('cursor'),
+        limit=params.get('limit'),
+        order_by=params.get('order_by'),
+    ),
+    'getOrder': lambda params, doc=None: read_order(params.get('email'), params.get('orderId'), order_doc=doc),
+    'getOrdersSummary': lambda params, doc=None: summarize_orders(params.get('email')),
+    'getItems': lambda params, doc=None: list_items(
+        params.get('email'),
+        order_id=params.get('orderId'),
+        status=params.get('status'),
+        since=params.get('since'),
+        limit=params.get('limit'),
+        order_by=params.get('order_by'),
+    ),
+    'getItem': lambda params, doc=None: read_item(params.get('email'), params.get('productId'), params.get('orderId')),
+}
+
+def batch_point_key(operation):
+    """
+    Returns the storage key a batch operation would point-read, or None
+    when the operation is not a point read or is served from a cache.
+    """
+    op = operation.get('op')
+    params = operation.get('params') or {}
+    if op == 'getUser':
+        phone_number = normalize_phone_number(params.get('phoneNumber'))
+        if not phone_number or (Config.USER_CACHE_ENABLED and user_cache.contains(phone_number)):
+            return None
+        return ('users', phone_number)
+    if op == 'getOrder' and order_cache is None and params.get('email') and params.get('orderId'):
+        return ('orders', params['orderId'])
+    return None
+
+def run_batch_operation(operation, doc=None):
+    op = operation.get('op')
+    handler = BATCH_OPERATIONS.get(op)
+    result = {'id': operation.get('id'), 'op': op}
+    try:
+        if handler is None:
+            raise ApiError(f"Unsupported operation '{op}'.", 400)
+        body = handler(operation.get('params') or {}, doc)
+        if op == 'getOrders':
+            body, next_cursor = body
+            if next_cursor:
+                result['nextCursor'] = next_cursor
+        result.update({'status': 200, 'body': body})
+    except ApiError as e:
+        result.update({'status': e.status_code, 'body': {'error': e.message}})
+    except Exception as e:
+        print(f"Error running batch operation {op}: {e}")
+        result.update({'status': 500, 'body': {'error': str(e)}})
+    return result
+
+@app.route('/batch', methods=['POST'])
+def batch():
+    """
+    Runs several read operations in one request.
+    Point reads (users and orders by key) are fetched together in one storage read
+    (one get_all on Firestore), the remaining operations run concurrently.
+    """
+    try:
+        data = request.get_json()
+        operations = data.get('operations') if data else None
 
-        if not docs:
-             return jsonify({'error': 'User not found.'}), 404
+        if not operations or not isinstance(operations, list) or not all(isinstance(op, dict) for op in operations):
+            return jsonify({'error': 'operations is required.'}), 400
+        if len(operations) > Config.BATCH_MAX_OPERATIONS:
+            return jsonify({'error': f'At most {Config.BATCH_MAX_OPERATIONS} operations are allowed.'}), 400
 
-        user_data = docs[0].to_dict()
-        # Convert timestamp to string if present
-        if 'createdAt' in user_data:
-             user_data['createdAt'] = str(user_data['createdAt'])
+        # Fetch every point read in a single round trip
+        point_keys = [batch_point_key(operation) for operation in operations]
+        unique_keys = list(dict.fromkeys(key for key in point_keys if key is not None))
+        with timing.phase('query'):
+            documents = repo.get_many(unique_keys) if unique_keys else {}
 
-        return jsonify(user_data), 200
+        futures = [
+            batch_executor.submit(run_batch_operation, operation, documents.get(key) if key is not None else None)
+            for operation, key in zip(operations, point_keys)
+        ]
+
+        return jsonify({'results': [future.result() for future in futures]}), 200
 
     except Exception as e:
-        print(f"Error fetching user: {e}")
+        print(f"Error running batch: {e}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/cache/stats', methods=['GET'])
+def get_cache_stats():
+    stats = {'users': user_cache.stats()}
+    if order_cache is not None:
+        stats['orders'] = order_cache.stats()
+    return jsonify(stats), 200
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    payload, content_type = timing.metrics()
+    return Response(payload, content_type=content_type)
+
 if __name__ == "__main__":
-    port = int(os.environ.get("PORT", 8080))
-    app.run(host='0.0.0.0', port=port)
+    app.run(host='0.0.0.0', port=Config.PORT)
@@ -0,0 +1,135 @@
+"""
+Migrates orders to the normalized schema (see order_schema.py): numeric item
+`quantity` and `priceAtPurchase`, and a stored `itemCount`.
+
+The orders collection is split into document ID ranges that are migrated in
+parallel, a page at a time. Each order is rewritten together with its items
+index entries, conditioned on the version that was read, so concurrent writes
+from the service are never overwritten; conflicting orders are re-read and
+retried. Progress is checkpointed after every page, so an interrupted run
+resumes where it stopped. Orders that are already normalized are not written,
+so rerunning a finished migration only reads.
+
+Run it before deploying a service version that expects the normalized schema.
+
+Usage:
+    python migrate_item_types.py [--workers N] [--page-size N] [--checkpoint PATH] [--dry-run]
+    STORAGE_BACKEND=sqlite SQLITE_PATH=purchase_orders.db python migrate_item_types.py
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config import Config
+from order_mutations import backoff_seconds
+from order_schema import normalization_updates
+from storage import WriteConflict, create_repository
+
+# Document ID boundaries of the ranges migrated in parallel. Order IDs are hex,
+# other IDs still fall into one of the ranges.
+RANGE_BOUNDARIES = list('123456789abcdef')
+
+def id_ranges():
+    bounds = [None, *RANGE_BOUNDARIES, None]
+    return [(bounds[i], bounds[i + 1]) for i in range(len(bounds) - 1)]
+
+def range_key(start, end):
+    return f"{start or ''}..{end or ''}"
+
+class Checkpoint:
+    """Per-range progress (last migrated document ID, done flag and counters) in a JSON file."""
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.ranges = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                self.ranges = json.load(f)['ranges']
+
+    def get(self, key):
+        with self.lock:
+            return dict(self.ranges.get(key) or {'after': None, 'done': False, 'scanned': 0, 'migrated': 0})
+
+    def update(self, key, progress):
+        with self.lock:
+            self.ranges[key] = progress
+            # Write to a temporary file and rename, so a crash never leaves a truncated checkpoint
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump({'backend': Config.STORAGE_BACKEND, 'ranges': self.ranges}, f, indent=2)
+            os.replace(tmp_path, self.path)
+
+def migrate_order(repo, order_doc, max_attempts, dry_run):
+    """Normalizes one order. Returns True when it was (or would be) rewritten."""
+    for attempt in range(1, max_attempts + 1):
+        data = order_doc.to_dict()
+        updates = normalization_updates(data)
+        if updates is None:
+            return False
+        if dry_run:
+            return True
+        try:
+            repo.update_order(order_doc, updates, reindex_items=True)
+            return True
+        except WriteConflict:
+            if attempt < max_attempts:
+                time.sleep(backoff_seconds(attempt))
+                order_doc = repo.get_order(data.get('userEmail'), order_doc.id)
+                if order_doc is None:
+                    return False
+    raise WriteConflict(order_doc.id)
+
+def migrate_range(repo, checkpoint, start, end, page_size, max_attempts, dry_run):
+    key = range_key(start, end)
+    progress = checkpoint.get(key)
+    while not progress['done']:
+        page = repo.scan_orders(start=start, end=end, after=progress['after'], limit=page_size)
+        for order_doc in page:
+            if migrate_order(repo, order_doc, max_attempts, dry_run):
+                progress['migrated'] += 1
+        progress['scanned'] += len(page)
+        if page:
+            progress['after'] = page[-1].id
+        progress['done'] = len(page) < page_size
+        if not dry_run:
+            checkpoint.update(key, progress)
+        print(f"[{key}] scanned: {progress['scanned']} | migrated: {progress['migrated']}"
+              f"{' | done' if progress['done'] else ''}")
+    return progress
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Migrate orders to numeric item fields and a stored itemCount.')
+    parser.add_argument('--workers', type=int, default=8, help='ID ranges migrated concurrently (default 8)')
+    parser.add_argument('--page-size', type=int, default=300, help='orders read per page (default 300)')
+    parser.add_argument('--checkpoint', default='migrate_item_types.checkpoint.json', help='progress file')
+    parser.add_argument('--dry-run', action='store_true', help='count the orders to migrate without writing')
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    if Config.STORAGE_BACKEND == 'memory':
+        raise SystemExit("❌ The memory backend is per process, there is nothing to migrate.")
+
+    repo = create_repository()
+    checkpoint = Checkpoint(args.checkpoint)
+    started = time.perf_counter()
+
+    print(f"--- Migrating orders on {repo.name} {'(dry run) ' if args.dry_run else ''}---")
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        futures = [
+            executor.submit(
+                migrate_range, repo, checkpoint, start, end,
+                args.page_size, Config.ORDER_MUTATION_MAX_ATTEMPTS, args.dry_run,
+            )
+            for start, end in id_ranges()
+        ]
+        results = [future.result() for future in futures]
+
+    scanned = sum(result['scanned'] for result in results)
+    migrated = sum(result['migrated'] for result in results)
+    print(f"\n✨ {'Would migrate' if args.dry_run else 'Migrated'} {migrated} of {scanned} orders "
+          f"in {time.perf_counter() - started:.1f}s.")
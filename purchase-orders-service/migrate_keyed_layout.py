@@ -0,0 +1,79 @@
+import firebase_admin
+from firebase_admin import firestore
+import sys
+
+from keys import normalize_phone_number
+
+# Initialize Firebase Admin SDK
+# Use Application Default Credentials
+if not firebase_admin._apps:
+    firebase_admin.initialize_app()
+
+db = firestore.client()
+
+# Each moved document costs two writes (set + delete), Firestore allows 500 per batch
+MAX_DOCS_PER_BATCH = 250
+
+def migrate_collection(collection_name, key_for, normalize=None, dry_run=False):
+    """
+    Moves every document of a collection to the document ID returned by `key_for(data)`.
+    Documents already stored under their key are left untouched.
+    """
+    collection_ref = db.collection(collection_name)
+
+    print(f"--- Migrating '{collection_name}' ---")
+
+    batch = db.batch()
+    pending = 0
+    moved = skipped = conflicts = 0
+    claimed_keys = set()
+
+    for doc in collection_ref.stream():
+        data = doc.to_dict()
+        key = key_for(data)
+
+        if not key:
+            print(f"⚠️  {collection_name}/{doc.id} has no key, skipping.")
+            skipped += 1
+            continue
+        if doc.id == key:
+            skipped += 1
+            continue
+
+        target_ref = collection_ref.document(key)
+        if key in claimed_keys or target_ref.get(field_paths=[]).exists:
+            print(f"❌ {collection_name}/{doc.id} conflicts with existing {collection_name}/{key}, skipping.")
+            conflicts += 1
+            continue
+
+        claimed_keys.add(key)
+        if normalize:
+            data = normalize(data)
+
+        if dry_run:
+            print(f"[dry-run] {collection_name}/{doc.id} -> {collection_name}/{key}")
+        else:
+            batch.set(target_ref, data)
+            batch.delete(doc.reference)
+            pending += 1
+            if pending >= MAX_DOCS_PER_BATCH:
+                batch.commit()
+                batch = db.batch()
+                pending = 0
+        moved += 1
+
+    if pending:
+        batch.commit()
+
+    print(f"✨ {collection_name}: {moved} moved, {skipped} already keyed or skipped, {conflicts} conflicts.\n")
+
+def normalize_user(data):
+    data['phoneNumber'] = normalize_phone_number(data.get('phoneNumber'))
+    return data
+
+if __name__ == "__main__":
+    # Usage: python migrate_keyed_layout.py [--dry-run]
+    dry_run = '--dry-run' in sys.argv[1:]
+
+    migrate_collection('orders', lambda data: data.get('orderId'), dry_run=dry_run)
+    migrate_collection('users', lambda data: normalize_phone_number(data.get('phoneNumber')), normalize=normalize_user, dry_run=dry_run)
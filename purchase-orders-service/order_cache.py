@@ -0,0 +1,158 @@
+"""
+Hot cache of active users' orders.
+
+The first read for an email attaches a storage watch (a Firestore `on_snapshot`
+listener on the firestore backend) to that user's orders and waits for the initial snapshot. From then on every read endpoint
+is served from memory while the listener keeps the copy up to date. Users idle for
+longer than the configured time are evicted and their listener is closed, and the
+least recently used users are evicted when the memory budget is exceeded.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from cache import estimate_size
+
+class _UserOrders:
+    def __init__(self, email):
+        self.email = email
+        self.orders = {}  # document ID -> order data
+        self.sizes = {}  # document ID -> estimated size in bytes
+        self.bytes = 0
+        self.ready = threading.Event()
+        self.last_access = time.monotonic()
+        self.watch = None
+
+class UserOrdersCache:
+    def __init__(self, repo, idle_seconds, max_users, max_bytes, snapshot_timeout_seconds):
+        self.repo = repo
+        self.idle_seconds = idle_seconds
+        self.max_users = max_users
+        self.max_bytes = max_bytes
+        self.snapshot_timeout_seconds = snapshot_timeout_seconds
+        self._users = OrderedDict()  # email -> _UserOrders
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        reaper = threading.Thread(target=self._reap_idle_users, name='order-cache-reaper', daemon=True)
+        reaper.start()
+
+    def get_orders(self, email):
+        """
+        Returns a snapshot `{document ID: order data}` of the user's orders,
+        or None when the listener could not deliver its first snapshot in time.
+        The returned order dicts are shared and must not be mutated.
+        """
+        with self._lock:
+            entry = self._users.get(email)
+            if entry is not None:
+                self._users.move_to_end(email)
+                # Waiting on a listener that has not delivered yet is no hit
+                if entry.ready.is_set():
+                    self.hits += 1
+                else:
+                    self.misses += 1
+            else:
+                entry = _UserOrders(email)
+                self._users[email] = entry
+                self.misses += 1
+                self._evict_over_budget()
+            entry.last_access = time.monotonic()
+
+        if entry.watch is None:
+            self._listen(entry)
+
+        if not entry.ready.wait(self.snapshot_timeout_seconds):
+            print(f"Order cache snapshot for {email} not ready after {self.snapshot_timeout_seconds}s")
+            # Drop the stuck listener, so the next request attaches a new one instead of waiting on it
+            with self._lock:
+                if self._users.get(email) is entry:
+                    self._evict(email)
+            return None
+
+        with self._lock:
+            return dict(entry.orders)
+
+    def apply_local_update(self, email, doc_id, updates):
+        """Applies a committed write immediately, ahead of the listener event."""
+        with self._lock:
+            entry = self._users.get(email)
+            if entry is None or doc_id not in entry.orders:
+                return
+            self._store(entry, doc_id, {**entry.orders[doc_id], **updates})
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'name': 'orders',
+                'users': len(self._users),
+                'bytes': self._bytes,
+                'maxUsers': self.max_users,
+                'maxBytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hitRate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+            }
+
+    def _listen(self, entry):
+        with self._lock:
+            if entry.watch is not None or self._users.get(entry.email) is not entry:
+                return
+
+            def on_changes(changes):
+                with self._lock:
+                    for change_type, doc_id, data in changes:
+                        if change_type == 'REMOVED':
+                            self._discard(entry, doc_id)
+                        else:
+                            self._store(entry, doc_id, data)
+                    self._evict_over_budget()
+                entry.ready.set()
+
+            entry.watch = self.repo.watch_user_orders(entry.email, on_changes)
+
+    def _store(self, entry, doc_id, data):
+        self._discard(entry, doc_id)
+        size = estimate_size(data)
+        entry.orders[doc_id] = data
+        entry.sizes[doc_id] = size
+        entry.bytes += size
+        if self._users.get(entry.email) is entry:
+            self._bytes += size
+
+    def _discard(self, entry, doc_id):
+        size = entry.sizes.pop(doc_id, 0)
+        entry.orders.pop(doc_id, None)
+        entry.bytes -= size
+        if self._users.get(entry.email) is entry:
+            self._bytes -= size
+
+    def _evict(self, email):
+        entry = self._users.pop(email)
+        self._bytes -= entry.bytes
+        self.evictions += 1
+        if entry.watch is not None:
+            # Closing a watch joins its consumer thread, which may be the caller
+            threading.Thread(target=entry.watch.unsubscribe, daemon=True).start()
+
+    def _evict_over_budget(self):
+        # Always keep the most recently used user, even if it alone exceeds the budget
+        while len(self._users) > 1 and (len(self._users) > self.max_users or self._bytes > self.max_bytes):
+            self._evict(next(iter(self._users)))
+
+    def _reap_idle_users(self):
+        while True:
+            time.sleep(max(self.idle_seconds / 2, 1))
+            now = time.monotonic()
+            with self._lock:
+                idle = [email for email, entry in self._users.items() if now - entry.last_access > self.idle_seconds]
+                for email in idle:
+                    self._evict(email)
+            if idle:
+                print(f"Order cache evicted {len(idle)} idle users")
@@ -0,0 +1,111 @@
+"""
+Contention-safe order mutations.
+
+Every mutation reads the order, computes the new state and commits it with a
+precondition on the version that was read (`last_update_time` on Firestore). If
+another writer changed the order in between, the commit fails with WriteConflict
+and the mutation is retried on a fresh read, up to a bounded number of attempts.
+"""
+
+import asyncio
+import random
+import time
+
+from config import Config
+from errors import ApiError
+from storage import WriteConflict
+
+class MutationError(ApiError):
+    pass
+
+def backoff_seconds(attempt):
+    """Exponential backoff with jitter to spread competing writers."""
+    return random.uniform(0, Config.ORDER_MUTATION_BACKOFF_SECONDS * (2 ** (attempt - 1)))
+
+def mutate_order(repo, email, order_id, mutation, max_attempts=None, on_commit=None):
+    """
+    Applies `mutation(order_data)` to an order with optimistic concurrency.
+
+    `mutation` returns `(updates, message)`. When `updates` is None nothing is written.
+    The repository removes the index entries of items dropped from `items` atomically
+    with the order update. `on_commit(doc_id, updates)` is called after a successful commit.
+    """
+    max_attempts = max_attempts or Config.ORDER_MUTATION_MAX_ATTEMPTS
+
+    for attempt in range(1, max_attempts + 1):
+        order_doc = repo.get_order(email, order_id)
+        if not order_doc:
+            raise MutationError('Order not found.', 404)
+
+        updates, message = mutation(order_doc.to_dict())
+        if updates is None:
+            return message
+
+        try:
+            repo.update_order(order_doc, updates)
+            if on_commit:
+                on_commit(order_doc.id, updates)
+            return message
+        except WriteConflict:
+            print(f"Order {order_id} changed concurrently (attempt {attempt}/{max_attempts})")
+            if attempt < max_attempts:
+                time.sleep(backoff_seconds(attempt))
+
+    raise MutationError('Order was modified concurrently, please retry.', 409)
+
+async def mutate_order_async(repo, email, order_id, mutation, max_attempts=None):
+    """mutate_order for async repositories."""
+    max_attempts = max_attempts or Config.ORDER_MUTATION_MAX_ATTEMPTS
+
+    for attempt in range(1, max_attempts + 1):
+        order_doc = await repo.get_order(email, order_id)
+        if not order_doc:
+            raise MutationError('Order not found.', 404)
+
+        updates, message = mutation(order_doc.to_dict())
+        if updates is None:
+            return message
+
+        try:
+            await repo.update_order(order_doc, updates)
+            return message
+        except WriteConflict:
+            print(f"Order {order_id} changed concurrently (attempt {attempt}/{max_attempts})")
+            if attempt < max_attempts:
+                await asyncio.sleep(backoff_seconds(attempt))
+
+    raise MutationError('Order was modified concurrently, please retry.', 409)
+
+def remove_item_mutation(product_id):
+    def mutation(order_data):
+        items = order_data.get('items', [])
+
+        if not any(item.get('productId') == product_id for item in items):
+            raise MutationError('Item not found in order.', 404)
+
+        new_items = [item for item in items if item.get('productId') != product_id]
+
+        # Recalculate total amount
+        new_total_amount = sum(item.get('priceAtPurchase', 0) * item.get('quantity', 0) for item in new_items)
+
+        return {
+            'items': new_items,
+            'itemCount': len(new_items),
+            'totalAmount': round(new_total_amount, 2)
+        }, 'Item removed successfully.'
+
+    return mutation
+
+def cancel_order_mutation(order_id):
+    def mutation(order_data):
+        if order_data.get('status') == 'cancelada':
+            return None, 'Order is already cancelled.'
+        return {'status': 'cancelada'}, f'Order {order_id} cancelled successfully.'
+
+    return mutation
+
+def remove_item(repo, email, order_id, product_id, on_commit=None):
+    return mutate_order(repo, email, order_id, remove_item_mutation(product_id), on_commit=on_commit)
+
+def cancel_order(repo, email, order_id, on_commit=None):
+    return mutate_order(repo, email, order_id, cancel_order_mutation(order_id), on_commit=on_commit)
@@ -0,0 +1,35 @@
+"""
+Normalized order schema.
+
+Item `quantity` is stored as an integer and `priceAtPurchase` as a number, and
+every order carries its `itemCount`. Orders written by older generators with
+string-typed numbers are rewritten by migrate_item_types.py; the service only
+reads and writes the normalized form.
+"""
+
+def normalize_item(item):
+    """Returns the item with numeric quantity and priceAtPurchase."""
+    normalized = dict(item)
+    if 'quantity' in normalized:
+        normalized['quantity'] = int(float(normalized['quantity'] or 0))
+    if 'priceAtPurchase' in normalized:
+        normalized['priceAtPurchase'] = float(normalized['priceAtPurchase'] or 0)
+    return normalized
+
+def is_normalized_item(item):
+    quantity = item.get('quantity', 0)
+    price = item.get('priceAtPurchase', 0.0)
+    return (
+        isinstance(quantity, int) and not isinstance(quantity, bool)
+        and isinstance(price, (int, float)) and not isinstance(price, bool)
+    )
+
+def normalization_updates(order_data):
+    """Returns the updates that normalize an order, or None when it already is."""
+    items = order_data.get('items') or []
+    updates = {}
+    if not all(is_normalized_item(item) for item in items):
+        updates['items'] = [normalize_item(item) for item in items]
+    if order_data.get('itemCount') != len(items):
+        updates['itemCount'] = len(items)
+    return updates or None
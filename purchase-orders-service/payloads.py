@@ -0,0 +1,98 @@
+"""
+Request parameter parsing and response payloads shared by the Flask app and the
+async app.
+"""
+
+import datetime
+
+from config import Config
+from storage import EPOCH
+
+ORDER_BY_DIRECTIONS = ['asc', 'desc']
+
+def format_created_at(created_at):
+    """Formats a Firestore timestamp as YYYY-MM-DD HH:MM."""
+    if not created_at:
+        return None
+    if hasattr(created_at, 'strftime'):
+        return created_at.strftime('%Y-%m-%d %H:%M')
+    return str(created_at)
+
+def parse_limit(value, default=Config.ORDERS_DEFAULT_LIMIT, maximum=Config.ORDERS_MAX_LIMIT):
+    """Parses the `limit` query parameter, clamping it to the configured maximum."""
+    if value is None:
+        return default
+    limit = int(value)
+    if limit < 1:
+        raise ValueError('limit must be a positive integer.')
+    return min(limit, maximum)
+
+def parse_since(value):
+    """Parses the `since` query parameter (ISO date or datetime, UTC when no offset is given)."""
+    if not value:
+        return None
+    try:
+        since = datetime.datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError('since must be an ISO 8601 date or datetime.')
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=datetime.timezone.utc)
+    return since
+
+def order_summary(data):
+    """Builds the /orders listing entry of an order."""
+    return {
+        'orderId': data.get('orderId'),
+        'status': data.get('status'),
+        'createdAt': format_created_at(data.get('createdAt')),
+        'itemCount': data.get('itemCount'),
+        'totalAmount': data.get('totalAmount'),
+    }
+
+def order_items(order_data):
+    """Returns copies of an order's items tagged with their orderId."""
+    purchased_items = []
+    items = order_data.get('items')
+    if items and isinstance(items, list):
+        for item in items:
+            item_copy = item.copy()
+            item_copy['orderId'] = order_data.get('orderId')
+            purchased_items.append(item_copy)
+    return purchased_items
+
+def parse_order_by(value):
+    """Parses the `order_by` query parameter (e.g. 'createdAt desc')."""
+    parts = (value or 'createdAt desc').split()
+    # A blank value (e.g. `order_by=%20`) leaves no field to check
+    field = parts[0] if parts else None
+    direction = parts[1].lower() if len(parts) > 1 else 'asc'
+    if field != 'createdAt' or direction not in ORDER_BY_DIRECTIONS or len(parts) > 2:
+        raise ValueError("order_by must be 'createdAt asc' or 'createdAt desc'.")
+    return field, direction
+
+def filter_order_items(orders, status, since, order_direction, limit):
+    """
+    Flattens in-memory orders into items newest order first (or oldest first),
+    applying the same filters as the items index query.
+    """
+    orders = sorted(
+        (data for data in orders if not since or (data.get('createdAt') and data['createdAt'] >= since)),
+        key=lambda data: data.get('createdAt') or EPOCH,
+        reverse=order_direction == 'desc',
+    )
+    purchased_items = []
+    for order_data in orders:
+        for item in order_items(order_data):
+            if status and item.get('status') != status:
+                continue
+            purchased_items.append(item)
+            if len(purchased_items) >= limit:
+                return purchased_items
+    return purchased_items
+
+def user_payload(user_data):
+    """Returns the /users payload of a user document."""
+    # Convert timestamp to string if present
+    if 'createdAt' in user_data:
+        user_data['createdAt'] = str(user_data['createdAt'])
+    return user_data
@@ -0,0 +1,249 @@
+"""
+Response encoding: fast JSON provider, NDJSON / chunked JSON array streaming and
+gzip / brotli compression negotiation.
+"""
+
+import datetime
+import gzip
+import json
+import time
+import zlib
+
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.http import http_date
+
+try:
+    import orjson
+except ImportError:  # Falls back to Flask's stdlib encoder
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # Only gzip is negotiated
+    brotli = None
+
+import timing
+from config import Config
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+# Records are buffered into chunks of this size before being written (and compressed)
+STREAM_CHUNK_BYTES = 16 * 1024
+
+def json_default(value):
+    """
+    Encodes values JSON has no type for. Shared by the Flask and async apps and by
+    the orjson and stdlib encoders, so datetimes read the same on every path: as
+    HTTP dates, like Flask's default provider. Anything else is rendered with str().
+    """
+    if isinstance(value, datetime.date):
+        return http_date(value)
+    return str(value)
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """
+    Flask's default JSON provider, recording encoding time in the serialize phase.
+    `encode` skips the recording, for callers timing many small payloads themselves.
+    """
+    default = staticmethod(json_default)
+
+    def encode(self, obj):
+        return super().dumps(obj)
+
+    def dumps(self, obj, **kwargs):
+        with timing.phase('serialize'):
+            return super().dumps(obj, **kwargs)
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    JSON provider backed by orjson. Keeps Flask's output format: sorted keys and
+    datetimes rendered by json_default (HTTP date strings).
+    """
+    default = staticmethod(json_default)
+
+    def encode(self, obj):
+        return orjson.dumps(
+            obj,
+            default=self.default,
+            option=orjson.OPT_SORT_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS,
+        ).decode()
+
+    def dumps(self, obj, **kwargs):
+        with timing.phase('serialize'):
+            return self.encode(obj)
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+def dumps(obj):
+    """Serializes a payload to JSON text, with orjson when available."""
+    if orjson is not None and Config.FAST_JSON_ENABLED:
+        return orjson.dumps(
+            obj, default=json_default, option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS,
+        ).decode()
+    return json.dumps(obj, default=json_default)
+
+def timed_dumps(obj):
+    """dumps, recording encoding time in the serialize phase."""
+    with timing.phase('serialize'):
+        return dumps(obj)
+
+def init_json_provider(app):
+    if orjson is not None and Config.FAST_JSON_ENABLED:
+        app.json = OrjsonProvider(app)
+    else:
+        app.json = TimedJSONProvider(app)
+
+def stream_format(args, headers):
+    """Returns 'ndjson', 'json' or None (buffered) from `?stream=` or the Accept header."""
+    requested = args.get('stream')
+    if requested in ('ndjson', 'json'):
+        return requested
+    if NDJSON_MIMETYPE in headers.get('Accept', ''):
+        return 'ndjson'
+    return None
+
+class RecordChunker:
+    """Encodes records as NDJSON or as JSON array text, grouped into chunks of STREAM_CHUNK_BYTES."""
+    def __init__(self, dumps, fmt):
+        self.dumps = dumps
+        self.fmt = fmt
+        self.buffer = ['['] if fmt == 'json' else []
+        self.buffered_bytes = 0
+        self.first = True
+
+    def add(self, record):
+        """Buffers one record, returning a chunk once enough bytes are buffered."""
+        encoded = self.dumps(record)
+        if self.fmt == 'ndjson':
+            encoded += '\n'
+        elif not self.first:
+            encoded = ',' + encoded
+        self.first = False
+
+        self.buffer.append(encoded)
+        self.buffered_bytes += len(encoded)
+        if self.buffered_bytes >= STREAM_CHUNK_BYTES:
+            return self.flush()
+        return None
+
+    def flush(self):
+        chunk = ''.join(self.buffer)
+        self.buffer = []
+        self.buffered_bytes = 0
+        return chunk
+
+    def finish(self):
+        if self.fmt == 'json':
+            self.buffer.append(']')
+        return self.flush()
+
+def stream_records(dumps, records, fmt):
+    """
+    Encodes records as NDJSON or as a chunked JSON array while they are produced.
+    Errors raised by the producer after the first byte cannot change the status
+    code anymore, so they end the stream early (leaving an unterminated JSON array).
+
+    Time spent waiting on the producer is recorded as the query phase and encoding
+    time as the serialize phase; `dumps` must not record phases itself.
+    """
+    chunker = RecordChunker(dumps, fmt)
+    records = iter(records)
+    query_seconds = serialize_seconds = 0.0
+    try:
+        while True:
+            started = time.perf_counter()
+            try:
+                record = next(records)
+            except StopIteration:
+                break
+            encoding = time.perf_counter()
+            query_seconds += encoding - started
+            chunk = chunker.add(record)
+            serialize_seconds += time.perf_counter() - encoding
+            if chunk:
+                yield chunk
+    except Exception as e:
+        print(f"Error while streaming response: {e}")
+        chunk = chunker.flush()
+        if chunk:
+            yield chunk
+        return
+    finally:
+        timing.record('query', query_seconds)
+        timing.record('serialize', serialize_seconds)
+
+    chunk = chunker.finish()
+    if chunk:
+        yield chunk
+
+async def astream_records(dumps, records, fmt):
+    """stream_records for async iterators."""
+    chunker = RecordChunker(dumps, fmt)
+    try:
+        async for record in records:
+            chunk = chunker.add(record)
+            if chunk:
+                yield chunk
+    except Exception as e:
+        print(f"Error while streaming response: {e}")
+        chunk = chunker.flush()
+        if chunk:
+            yield chunk
+        return
+
+    chunk = chunker.finish()
+    if chunk:
+        yield chunk
+
+def negotiate_encoding(accept_encoding):
+    """Picks 'br' or 'gzip' from an Accept-Encoding header, or None."""
+    accepted = {token.split(';')[0].strip().lower() for token in (accept_encoding or '').split(',')}
+    if brotli is not None and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted:
+        return 'gzip'
+    return None
+
+def compress_stream(chunks, encoding):
+    """Compresses a streamed body chunk by chunk, flushing so each chunk is sent right away."""
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=Config.BROTLI_QUALITY)
+        for chunk in chunks:
+            data = chunk.encode() if isinstance(chunk, str) else chunk
+            yield compressor.process(data) + compressor.flush()
+        yield compressor.finish()
+    else:
+        compressor = zlib.compressobj(Config.GZIP_LEVEL, zlib.DEFLATED, 31)
+        for chunk in chunks:
+            data = chunk.encode() if isinstance(chunk, str) else chunk
+            yield compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        yield compressor.flush()
+
+def compress_response(request, response):
+    """after_request hook negotiating gzip / br for buffered and streamed responses."""
+    if not Config.COMPRESSION_ENABLED or response.direct_passthrough or 'Content-Encoding' in response.headers:
+        return response
+    if response.status_code < 200 or response.status_code == 204:
+        return response
+
+    encoding = negotiate_encoding(request.headers.get('Accept-Encoding'))
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        response.response = compress_stream(response.response, encoding)
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < Config.COMPRESSION_MIN_BYTES:
+            return response
+        with timing.phase('compress'):
+            if encoding == 'br':
+                response.set_data(brotli.compress(data, quality=Config.BROTLI_QUALITY))
+            else:
+                response.set_data(gzip.compress(data, compresslevel=Config.GZIP_LEVEL))
+
+    response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    return response
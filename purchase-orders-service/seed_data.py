@@ -0,0 +1,402 @@
+"""
+Deterministic synthetic users and orders for load and performance testing.
+
+For a given seed, user N always gets the same phone number, email, name and
+orders, however the users are split across worker processes, so runs are
+reproducible and can be split or repeated freely. Faker is only used to build
+small pools of names and addresses once; per-order values come from a random.Random
+seeded per user, which keeps generation fast enough for millions of orders.
+
+Writes go through a sink:
+    FirestoreSink    BulkWriter (default) or parallel batched commits
+    RepositorySink   any storage backend (memory, sqlite or firestore), chunked add_orders
+
+run_parallel splits the user range across worker processes, each with its own sink.
+"""
+
+import datetime
+import hashlib
+import random
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from faker import Faker
+
+from items_index import ITEMS_INDEX_COLLECTION, build_item_index_entry, entry_index_id
+from keys import normalize_phone_number
+from storage import OrderExists
+
+STATUS_OPTIONS = ['creada', 'procesando', 'enviada', 'entregada', 'cancelada']
+CARRIER_OPTIONS = ['Estafeta', 'GOMSA', 'Rangel', 'Axionlog']
+ALPHANUMERIC = 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789'
+TRACKING_CHARACTERS = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+# gRPC status code of a create() on a document that exists
+ALREADY_EXISTS = 6
+# Attempts per BulkWriter write on other errors, as the SDK's default error handler
+BULK_WRITER_MAX_ATTEMPTS = 15
+
+REALISTIC_PRODUCTS = [
+    # Electronics
+    {"name": "Laptop Pro 15", "image": "https://images.unsplash.com/photo-1496181133206-80ce9b88a853?w=200"},
+    {"name": "Smartphone X", "image": "https://images.unsplash.com/photo-1511707171634-5f897ff02aa9?w=200"},
+    {"name": "Auriculares Bluetooth", "image": "https://images.unsplash.com/photo-1505740420928-5e560c06d30e?w=200"},
+    {"name": "Reloj Inteligente", "image": "https://images.unsplash.com/photo-1523275335684-37898b6baf30?w=200"},
+    {"name": "Cámara Mirrorless", "image": "https://images.unsplash.com/photo-1516035069371-29a1b244cc32?w=200"},
+    {"name": "Tablet Air", "image": "https://images.unsplash.com/photo-1544244015-0df4b3ffc6b0?w=200"},
+    {"name": "Consola de Videojuegos", "image": "https://images.unsplash.com/photo-1486401899868-0e435ed85128?w=200"},
+    {"name": "Altavoz Inteligente", "image": "https://images.unsplash.com/photo-1589492477829-5e65395b66cc?w=200"},
+    {"name": "Drone 4K", "image": "https://images.unsplash.com/photo-1507582020474-9a35b7d455d9?w=200"},
+    {"name": "Teclado Mecánico", "image": "https://images.unsplash.com/photo-1511467687858-23d96c32e4ae?w=200"},
+
+    # Clothing
+    {"name": "Camiseta Algodón", "image": "https://images.unsplash.com/photo-1521572163474-6864f9cf17ab?w=200"},
+    {"name": "Jeans Clásicos", "image": "https://images.unsplash.com/photo-1542272454315-4c01d7abdf4a?w=200"},
+    {"name": "Zapatillas Running", "image": "https://images.unsplash.com/photo-1542291026-7eec264c27ff?w=200"},
+    {"name": "Chaqueta de Cuero", "image": "https://images.unsplash.com/photo-1551028919-ac66e613ec65?w=200"},
+    {"name": "Vestido de Verano", "image": "https://images.unsplash.com/photo-1572804013309-59a88b7e92f1?w=200"},
+    {"name": "Gorra Deportiva", "image": "https://images.unsplash.com/photo-1588850561407-ed78c282e89b?w=200"},
+    {"name": "Bufanda de Lana", "image": "https://images.unsplash.com/photo-1520903920248-269e3a628172?w=200"},
+    {"name": "Guantes de Invierno", "image": "https://images.unsplash.com/photo-1517260739837-13359146141b?w=200"},
+    {"name": "Mochila Urbana", "image": "https://images.unsplash.com/photo-1553062407-98eeb64c6a62?w=200"},
+    {"name": "Gafas de Sol", "image": "https://images.unsplash.com/photo-1511499767150-a48a237f0083?w=200"},
+
+    # Home
+    {"name": "Cafetera Express", "image": "https://images.unsplash.com/photo-1514432324607-a09d9b4aefdd?w=200"},
+    {"name": "Lámpara de Mesa", "image": "https://images.unsplash.com/photo-1507473888900-52e1adad5468?w=200"},
+    {"name": "Planta Decorativa", "image": "https://images.unsplash.com/photo-1485955900006-10f4d324d411?w=200"},
+    {"name": "Cojín Suave", "image": "https://images.unsplash.com/photo-1584100936595-c0654b55a2e2?w=200"},
+    {"name": "Juego de Sábanas", "image": "https://images.unsplash.com/photo-1522771753035-0a15395376b5?w=200"},
+    {"name": "Espejo Redondo", "image": "https://images.unsplash.com/photo-1618220179428-22790b461013?w=200"},
+    {"name": "Reloj de Pared", "image": "https://images.unsplash.com/photo-1563861826100-9cb868fdbe1c?w=200"},
+    {"name": "Alfombra Moderna", "image": "https://images.unsplash.com/photo-1575412629239-2a0753f7f093?w=200"},
+    {"name": "Veladora Aromática", "image": "https://images.unsplash.com/photo-1602037299865-4dd136ac5ae4?w=200"},
+    {"name": "Mesa Auxiliar", "image": "https://images.unsplash.com/photo-1532372320572-cda25653a26d?w=200"},
+
+    # Sports
+    {"name": "Balón de Fútbol", "image": "https://images.unsplash.com/photo-1579952363873-27f3bade9f55?w=200"},
+    {"name": "Raqueta de Tenis", "image": "https://images.unsplash.com/photo-1622279457486-62dcc4a431d6?w=200"},
+    {"name": "Pesas de Gimnasio", "image": "https://images.unsplash.com/photo-1584735935682-2f2b69dff9d2?w=200"},
+    {"name": "Esterilla de Yoga", "image": "https://images.unsplash.com/photo-1592432678016-e910b452f9a2?w=200"},
+    {"name": "Botella Deportiva", "image": "https://images.unsplash.com/photo-1602143407151-ca11143ea27d?w=200"}
+]
+
+# Faker values are drawn once into pools of this size
+POOL_SIZE = 1000
+
+# Orders are spread over this period before `until`
+ORDER_HISTORY_DAYS = 365
+
+def parse_distribution(spec):
+    """
+    Parses an orders-per-user distribution and returns `sample(rng) -> int`:
+        fixed:N              every user gets N orders
+        uniform:MIN:MAX      uniform between MIN and MAX
+        exponential:MEAN     exponential with the given mean (many light users, a few heavy ones)
+        pareto:ALPHA:MAX     Pareto long tail, capped at MAX
+    """
+    kind, *params = spec.split(':')
+    try:
+        if kind == 'fixed' and len(params) == 1:
+            count = int(params[0])
+            return lambda rng: count
+        if kind == 'uniform' and len(params) == 2:
+            low, high = int(params[0]), int(params[1])
+            return lambda rng: rng.randint(low, high)
+        if kind == 'exponential' and len(params) == 1:
+            mean = float(params[0])
+            return lambda rng: int(rng.expovariate(1 / mean))
+        if kind == 'pareto' and len(params) == 2:
+            alpha, cap = float(params[0]), int(params[1])
+            return lambda rng: min(int(rng.paretovariate(alpha)), cap)
+    except ValueError:
+        pass
+    raise ValueError(f"Invalid distribution '{spec}'. Use fixed:N, uniform:MIN:MAX, exponential:MEAN or pareto:ALPHA:MAX.")
+
+class Pools:
+    """Faker-generated names, phone numbers and addresses, seeded for reproducibility."""
+    def __init__(self, seed):
+        fake = Faker('es_MX')
+        fake.seed_instance(seed)
+        self.names = [fake.name() for _ in range(POOL_SIZE)]
+        self.phones = [fake.phone_number() for _ in range(POOL_SIZE)]
+        self.addresses = [f"{fake.street_address()}, {fake.city()}" for _ in range(POOL_SIZE)]
+
+def user_rng(seed, user_index):
+    # String seeds are hashed with SHA-512, so they are stable across processes
+    return random.Random(f"{seed}:{user_index}")
+
+def order_id(seed, user_index, email, order_index):
+    """
+    orderId of the Nth order of a synthetic user: 96 bits derived from the inputs,
+    so ids are reproducible and millions of orders do not collide.
+    """
+    key = f"{seed}:{user_index}:{email}:{order_index}".encode()
+    return hashlib.blake2b(key, digest_size=12).hexdigest()
+
+def user_identity(seed, user_index, pools, email=None):
+    """Returns the user document of synthetic user N."""
+    rng = user_rng(seed, f"user:{user_index}")
+    return {
+        'phoneNumber': normalize_phone_number(f"52{user_index:010d}"),
+        'userEmail': email or f"user{user_index:07d}@example.com",
+        'userName': rng.choice(pools.names),
+    }
+
+def build_order(rng, order_id, email, max_items, until, pools):
+    """Builds one order with 1..max_items items, created within ORDER_HISTORY_DAYS before `until`."""
+    created_at = until - datetime.timedelta(seconds=rng.uniform(0, ORDER_HISTORY_DAYS * 86400))
+    items = []
+    total_amount = 0.0
+
+    for _ in range(rng.randint(1, max_items)):
+        price = round(rng.uniform(5, 150), 2)
+        qty = rng.randint(1, 3)
+        item_status = rng.choice(STATUS_OPTIONS)
+        is_shipped = item_status in ['enviada', 'entregada']
+        product_data = rng.choice(REALISTIC_PRODUCTS)
+
+        items.append({
+            'productId': ''.join(rng.choices(ALPHANUMERIC, k=10)),
+            'name': product_data['name'],
+            'quantity': qty,
+            'priceAtPurchase': price,
+            'image': product_data['image'],
+            'status': item_status,
+            'carrier': rng.choice(CARRIER_OPTIONS),
+            'trackingNumber': ''.join(rng.choices(TRACKING_CHARACTERS, k=12)) if is_shipped else "",
+            'shippedAt': created_at + datetime.timedelta(days=rng.randint(1, 5)) if is_shipped else ""
+        })
+        total_amount += price * qty
+
+    return {
+        'orderId': order_id,
+        'userEmail': email,
+        'userPhone': rng.choice(pools.phones),
+        'status': rng.choice(STATUS_OPTIONS),
+        'totalAmount': round(total_amount, 2),
+        'createdAt': created_at,
+        'shippingAddress': rng.choice(pools.addresses),
+        'items': items,
+        'itemCount': len(items),
+    }
+
+def user_orders(seed, user_index, email, sample_count, max_items, until, pools):
+    """Yields the orders of synthetic user N."""
+    # The email is part of the seed: explicit emails all map to the first user indexes
+    rng = user_rng(seed, f"orders:{user_index}:{email}")
+    for order_index in range(sample_count(rng)):
+        yield build_order(rng, order_id(seed, user_index, email, order_index), email, max_items, until, pools)
+
+class FirestoreSink:
+    """
+    Writes to Firestore with a BulkWriter ('bulk') or with 500-write batches
+    committed from a thread pool ('batch'). Neither groups an order with its index
+    entries atomically, which is fine for seeding.
+
+    Orders and index entries are written with create(), so an orderId that is
+    already taken fails the run with OrderExists instead of overwriting the
+    order, possibly another user's. With the BulkWriter, the index entries of
+    the colliding orders are deleted again on close.
+    """
+    def __init__(self, writer='bulk', threads=8, ops_per_second=None):
+        from google.cloud.firestore_v1.bulk_writer import BulkWriterOptions
+        from storage_firestore import FirestoreRepository, MAX_BATCH_WRITES
+
+        self.db = FirestoreRepository().db
+        self.max_batch_writes = MAX_BATCH_WRITES
+        self.bulk = None
+        if writer == 'bulk':
+            # The default ramp-up (500 ops/s, +50% every 5 minutes) protects production
+            # databases; raise it for the emulator or a fresh test database.
+            options = BulkWriterOptions(
+                initial_ops_per_second=ops_per_second, max_ops_per_second=ops_per_second,
+            ) if ops_per_second else BulkWriterOptions()
+            self.bulk = self.db.bulk_writer(options=options)
+            self.bulk.on_write_error(self._on_bulk_error)
+            self._failures_lock = threading.Lock()
+            self.collided_orders = {}  # orderId -> order data
+            self.existing_entries = set()  # paths of index entries that were already there
+        else:
+            self.threads = threads
+            self.executor = ThreadPoolExecutor(max_workers=threads)
+            self.pending = set()
+            self.batch = self.db.batch()
+            self.batch_writes = 0
+
+    def _write(self, ref, data, create=False):
+        if self.bulk is not None:
+            (self.bulk.create if create else self.bulk.set)(ref, data)
+            return
+        (self.batch.create if create else self.batch.set)(ref, data)
+        self.batch_writes += 1
+        if self.batch_writes == self.max_batch_writes:
+            self._submit_batch()
+
+    def _on_bulk_error(self, failure, bulk_writer):
+        if failure.code != ALREADY_EXISTS:
+            return failure.attempts < BULK_WRITER_MAX_ATTEMPTS
+        ref = failure.operation.reference
+        with self._failures_lock:
+            if ref.parent.id == 'orders':
+                self.collided_orders[ref.id] = failure.operation.document_data
+            else:
+                self.existing_entries.add(ref.path)
+        return False
+
+    def _commit_result(self, future):
+        from google.api_core.exceptions import AlreadyExists
+        try:
+            future.result()
+        except AlreadyExists as e:
+            # The whole batch was rejected, nothing of it was written
+            raise OrderExists(e.message)
+
+    def _submit_batch(self):
+        # Bound the commits in flight so generation does not run ahead of the writers
+        if len(self.pending) >= self.threads * 2:
+            done, self.pending = wait(self.pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                self._commit_result(future)
+        self.pending.add(self.executor.submit(self.batch.commit))
+        self.batch = self.db.batch()
+        self.batch_writes = 0
+
+    def add_orders(self, orders):
+        for order_data in orders:
+            self._write(self.db.collection('orders').document(order_data['orderId']), order_data, create=True)
+            for item in order_data['items']:
+                entry = build_item_index_entry(order_data, item)
+                self._write(self.db.collection(ITEMS_INDEX_COLLECTION).document(entry_index_id(entry)), entry, create=True)
+
+    def add_users(self, users):
+        for user_data in users:
+            self._write(self.db.collection('users').document(user_data['phoneNumber']), user_data)
+
+    def close(self):
+        if self.bulk is not None:
+            self.bulk.flush()
+            # Entries created for orders that were not: they would show items of another order
+            for order_data in self.collided_orders.values():
+                for item in order_data['items']:
+                    ref = self.db.collection(ITEMS_INDEX_COLLECTION).document(entry_index_id(build_item_index_entry(order_data, item)))
+                    if ref.path not in self.existing_entries:
+                        self.bulk.delete(ref)
+            self.bulk.close()
+            if self.collided_orders:
+                raise OrderExists(', '.join(sorted(self.collided_orders)))
+            return
+        if self.batch_writes:
+            self._submit_batch()
+        for future in self.pending:
+            self._commit_result(future)
+        self.executor.shutdown()
+
+class RepositorySink:
+    """Writes through a storage repository in chunks."""
+    def __init__(self, repo, chunk_size=1000):
+        self.repo = repo
+        self.chunk_size = chunk_size
+        self.orders = []
+
+    def add_orders(self, orders):
+        for order_data in orders:
+            self.orders.append(order_data)
+            if len(self.orders) >= self.chunk_size:
+                self.repo.add_orders(self.orders)
+                self.orders = []
+
+    def add_users(self, users):
+        self.repo.add_users(list(users))
+
+    def close(self):
+        if self.orders:
+            self.repo.add_orders(self.orders)
+            self.orders = []
+
+class Progress:
+    def __init__(self, label, every=10000):
+        self.label = label
+        self.every = every
+        self.count = 0
+        self.started = time.perf_counter()
+
+    def add(self, count=1):
+        before = self.count
+        self.count += count
+        if self.count // self.every > before // self.every:
+            self.report()
+
+    def report(self):
+        elapsed = time.perf_counter() - self.started
+        print(f"{self.label}: {self.count} in {elapsed:.1f}s ({self.count / elapsed if elapsed else 0:.0f}/s)")
+
+def seed_orders(sink, seed, user_indexes, distribution, max_items, until, emails=None, label='orders'):
+    """
+    Writes the orders of the given synthetic users to the sink. `emails` maps user
+    indexes to explicit emails, otherwise the synthetic email is used.
+    Returns the number of orders written.
+    """
+    pools = Pools(seed)
+    sample_count = parse_distribution(distribution)
+    progress = Progress(label)
+    for user_index in user_indexes:
+        email = emails[user_index] if emails else user_identity(seed, user_index, pools)['userEmail']
+        orders = list(user_orders(seed, user_index, email, sample_count, max_items, until, pools))
+        sink.add_orders(orders)
+        progress.add(len(orders))
+    sink.close()
+    return progress.count
+
+def seed_users(sink, seed, user_indexes, label='users'):
+    """Writes the given synthetic users to the sink. Returns the number of users written."""
+    pools = Pools(seed)
+    progress = Progress(label)
+    chunk = []
+    for user_index in user_indexes:
+        chunk.append({**user_identity(seed, user_index, pools), 'createdAt': datetime.datetime.now(datetime.timezone.utc)})
+        if len(chunk) >= 1000:
+            sink.add_users(chunk)
+            progress.add(len(chunk))
+            chunk = []
+    if chunk:
+        sink.add_users(chunk)
+        progress.add(len(chunk))
+    sink.close()
+    return progress.count
+
+def open_sink(target, writer='bulk', threads=8, ops_per_second=None):
+    """Opens the sink for a target: 'firestore' (production or emulator), 'sqlite' or 'memory'."""
+    if target == 'firestore':
+        return FirestoreSink(writer, threads, ops_per_second)
+    from storage import create_repository
+    return RepositorySink(create_repository(target))
+
+def _seed_range(kind, sink_options, seed, start, stop, options):
+    sink = open_sink(**sink_options)
+    label = f"{kind} [{start}, {stop})"
+    if kind == 'users':
+        return seed_users(sink, seed, range(start, stop), label=label)
+    return seed_orders(sink, seed, range(start, stop), label=label, **options)
+
+def run_parallel(kind, user_count, seed, sink_options, workers=1, **options):
+    """
+    Seeds 'users' or 'orders' for users 0..user_count-1 split across worker
+    processes. Returns `(written, seconds)`.
+    """
+    started = time.perf_counter()
+    workers = max(1, min(workers, user_count))
+    bounds = [user_count * worker // workers for worker in range(workers + 1)]
+    ranges = [(bounds[i], bounds[i + 1]) for i in range(workers)]
+
+    if workers == 1:
+        written = _seed_range(kind, sink_options, seed, 0, user_count, options)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(_seed_range, kind, sink_options, seed, start, stop, options)
+                for start, stop in ranges
+            ]
+            written = sum(future.result() for future in futures)
+    return written, time.perf_counter() - started
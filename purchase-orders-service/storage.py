@@ -0,0 +1,232 @@
+"""
+Storage backends.
+
+Every route reads and writes through an `OrdersRepository`, selected with
+STORAGE_BACKEND:
+    firestore  Firestore (default, production)
+    memory     indexed in-process store, empty at startup
+    sqlite     SQLite file at SQLITE_PATH
+
+The local engines keep the same data model (keyed orders and users plus the
+product-level items index) and the same ordering and cursor semantics as the
+Firestore queries, so the API behaves the same on every engine.
+"""
+
+import datetime
+import threading
+
+from config import Config
+
+ORDER_STATUSES = ['creada', 'procesando', 'enviada', 'entregada', 'cancelada']
+
+# Fields returned by order listings. Item payloads are intentionally left out,
+# the item count is served from the stored `itemCount` counter instead.
+ORDER_LIST_FIELDS = ['orderId', 'status', 'createdAt', 'itemCount', 'totalAmount']
+
+# Sort value of documents without createdAt
+EPOCH = datetime.datetime.min.replace(tzinfo=datetime.timezone.utc)
+
+class WriteConflict(Exception):
+    """Raised when a document changed since it was read."""
+
+class OrderExists(Exception):
+    """Raised by add_orders when an orderId is already taken. Nothing is overwritten."""
+
+class Document:
+    """
+    Result of a point read on the local engines. Exposes the subset of the
+    Firestore DocumentSnapshot API used by the service.
+    """
+    def __init__(self, doc_id, data, version=None):
+        self.id = doc_id
+        self._data = data
+        self.version = version
+
+    @property
+    def exists(self):
+        return self._data is not None
+
+    def to_dict(self):
+        return dict(self._data) if self._data is not None else None
+
+def now():
+    return datetime.datetime.now(datetime.timezone.utc)
+
+def removed_product_ids(previous_data, updates):
+    """Returns the product IDs an order update removes from the order's items."""
+    if 'items' not in updates:
+        return set()
+    before = {item.get('productId') for item in (previous_data or {}).get('items') or []}
+    after = {item.get('productId') for item in updates['items'] or []}
+    return before - after
+
+def summarize_order_data(orders, statuses=ORDER_STATUSES):
+    """Computes `(summary, by_status)` counts and summed totalAmount from order dicts."""
+    summary = {'count': 0, 'totalAmount': 0.0}
+    by_status = {status: {'count': 0, 'totalAmount': 0.0} for status in statuses}
+    for data in orders:
+        amount = float(data.get('totalAmount') or 0)
+        summary['count'] += 1
+        summary['totalAmount'] += amount
+        status_summary = by_status.setdefault(data.get('status'), {'count': 0, 'totalAmount': 0.0})
+        status_summary['count'] += 1
+        status_summary['totalAmount'] += amount
+    for entry in [summary, *by_status.values()]:
+        entry['totalAmount'] = round(entry['totalAmount'], 2)
+    return summary, by_status
+
+class _LocalWatch:
+    def __init__(self, watchers, lock, key, callback):
+        self._watchers = watchers
+        self._lock = lock
+        self._key = key
+        self._callback = callback
+
+    def unsubscribe(self):
+        with self._lock:
+            callbacks = self._watchers.get(self._key)
+            if callbacks and self._callback in callbacks:
+                callbacks.remove(self._callback)
+                if not callbacks:
+                    del self._watchers[self._key]
+
+class OrdersRepository:
+    """
+    Storage operations used by the service.
+
+    Listings take `direction` as 'asc' or 'desc' and `cursor` as the document ID
+    of the last order of the previous page; they raise ValueError on an invalid
+    cursor. Watch callbacks receive a list of `(change type, document ID, data)`
+    with change types 'ADDED', 'MODIFIED' and 'REMOVED'.
+
+    The base class implements watches for writes made through this process,
+    which is all the local engines can observe.
+    """
+    name = None
+
+    def __init__(self):
+        self._watchers = {}  # 'users' or ('orders', email) -> [callback]
+        self._watch_lock = threading.Lock()
+
+    # Users
+
+    def get_user(self, phone_number):
+        """Returns the user document keyed by normalized phone number."""
+        raise NotImplementedError
+
+    def save_user(self, phone_number, user_email, user_name):
+        """Creates the user or updates its email and name. Returns True when created."""
+        raise NotImplementedError
+
+    def add_users(self, users):
+        """Writes user documents (keyed by normalized phone number), replacing existing ones."""
+        raise NotImplementedError
+
+    # Orders
+
+    def get_order(self, email, order_id, field_paths=None):
+        """Point read of an order. Returns None when missing or owned by another user."""
+        raise NotImplementedError
+
+    def get_many(self, keys):
+        """
+        Reads several documents at once. Keys are `('users', phone number)` or
+        `('orders', order ID)`; returns `{key: document}`.
+        """
+        raise NotImplementedError
+
+    def stream_orders(self, email, status=None, direction='desc', cursor=None, limit=None):
+        """
+        Returns an iterator of `(document ID, data)` with ORDER_LIST_FIELDS of a
+        user's orders, sorted by createdAt. The cursor is validated eagerly.
+        """
+        raise NotImplementedError
+
+    def summarize_orders(self, email, statuses=ORDER_STATUSES):
+        """Returns `(summary, by_status)` as built by summarize_order_data."""
+        raise NotImplementedError
+
+    def update_order(self, order_doc, updates, reindex_items=False):
+        """
+        Applies updates to an order read with get_order, failing with WriteConflict
+        when the order changed since. Index entries of removed items are deleted
+        in the same write; with `reindex_items` the entries of the remaining items
+        are rewritten too.
+        """
+        raise NotImplementedError
+
+    def scan_orders(self, start=None, end=None, after=None, limit=500):
+        """
+        Returns up to `limit` order documents (as read by get_order) sorted by
+        document ID, with IDs in `[start, end)` and greater than `after`.
+        Used by maintenance jobs that walk the whole collection.
+        """
+        raise NotImplementedError
+
+    def add_orders(self, orders):
+        """
+        Writes new orders (keyed by orderId) together with their items index
+        entries. Fails with OrderExists when an orderId is taken; orders are
+        never overwritten, as orderIds are global document keys.
+        """
+        raise NotImplementedError
+
+    # Items index
+
+    def stream_items(self, email, status=None, since=None, direction='desc', limit=None):
+        """Returns an iterator of a user's items sorted by their order's createdAt."""
+        raise NotImplementedError
+
+    def get_item(self, email, product_id, order_id=None):
+        """
+        Returns one item of a user from the items index, or None. Without
+        `order_id`, the item of the latest order containing the product.
+        """
+        raise NotImplementedError
+
+    # Watches
+
+    def watch_users(self, callback):
+        return self._subscribe('users', callback)
+
+    def watch_user_orders(self, email, callback):
+        watch = self._subscribe(('orders', email), callback)
+        # Deliver the initial snapshot off the caller's thread, like Firestore listeners
+        initial = threading.Thread(
+            target=lambda: callback([('ADDED', doc_id, data) for doc_id, data in self._user_orders(email)]),
+            daemon=True,
+        )
+        initial.start()
+        return watch
+
+    def _user_orders(self, email):
+        """Returns `(document ID, data)` of all of a user's orders, for watch snapshots."""
+        raise NotImplementedError
+
+    def _subscribe(self, key, callback):
+        with self._watch_lock:
+            self._watchers.setdefault(key, []).append(callback)
+        return _LocalWatch(self._watchers, self._watch_lock, key, callback)
+
+    def _notify(self, key, changes):
+        with self._watch_lock:
+            callbacks = list(self._watchers.get(key, []))
+        for callback in callbacks:
+            try:
+                callback(changes)
+            except Exception as e:
+                print(f"Error in storage watch callback: {e}")
+
+def create_repository(backend=None):
+    """Builds the repository selected by STORAGE_BACKEND."""
+    backend = (backend or Config.STORAGE_BACKEND).lower()
+    if backend == 'firestore':
+        from storage_firestore import FirestoreRepository
+        return FirestoreRepository()
+    if backend == 'memory':
+        from storage_memory import MemoryRepository
+        return MemoryRepository()
+    if backend == 'sqlite':
+        from storage_sqlite import SQLiteRepository
+        return SQLiteRepository(Config.SQLITE_PATH)
+    raise ValueError(f"Unknown STORAGE_BACKEND '{backend}'.")
@@ -0,0 +1,64 @@
+"""
+Async storage backends for the async app.
+
+Same operations as OrdersRepository, as coroutines. `stream_orders` and
+`stream_items` resolve to async iterators once the query is validated.
+Firestore uses `AsyncClient`; the local engines run their synchronous
+repository on worker threads.
+"""
+
+import asyncio
+
+from config import Config
+from storage import ORDER_STATUSES, create_repository
+
+async def _iterate(values):
+    for value in values:
+        yield value
+
+class ThreadedAsyncRepository:
+    """Runs a synchronous OrdersRepository on worker threads."""
+    def __init__(self, repo):
+        self.repo = repo
+        self.name = repo.name
+
+    async def get_user(self, phone_number):
+        return await asyncio.to_thread(self.repo.get_user, phone_number)
+
+    async def save_user(self, phone_number, user_email, user_name):
+        return await asyncio.to_thread(self.repo.save_user, phone_number, user_email, user_name)
+
+    async def get_order(self, email, order_id, field_paths=None):
+        return await asyncio.to_thread(self.repo.get_order, email, order_id, field_paths)
+
+    async def get_many(self, keys):
+        return await asyncio.to_thread(self.repo.get_many, keys)
+
+    async def stream_orders(self, email, status=None, direction='desc', cursor=None, limit=None):
+        orders = await asyncio.to_thread(
+            lambda: list(self.repo.stream_orders(email, status=status, direction=direction, cursor=cursor, limit=limit))
+        )
+        return _iterate(orders)
+
+    async def summarize_orders(self, email, statuses=ORDER_STATUSES):
+        return await asyncio.to_thread(self.repo.summarize_orders, email, statuses)
+
+    async def update_order(self, order_doc, updates, reindex_items=False):
+        return await asyncio.to_thread(self.repo.update_order, order_doc, updates, reindex_items)
+
+    async def stream_items(self, email, status=None, since=None, direction='desc', limit=None):
+        items = await asyncio.to_thread(
+            lambda: list(self.repo.stream_items(email, status=status, since=since, direction=direction, limit=limit))
+        )
+        return _iterate(items)
+
+    async def get_item(self, email, product_id, order_id=None):
+        return await asyncio.to_thread(self.repo.get_item, email, product_id, order_id)
+
+def create_async_repository(backend=None):
+    """Builds the async repository selected by STORAGE_BACKEND."""
+    backend = (backend or Config.STORAGE_BACKEND).lower()
+    if backend == 'firestore':
+        from storage_firestore_async import AsyncFirestoreRepository
+        return AsyncFirestoreRepository()
+    return ThreadedAsyncRepository(create_repository(backend))
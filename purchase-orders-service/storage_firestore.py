@@ -0,0 +1,216 @@
+"""
+Firestore storage backend.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import firebase_admin
+from firebase_admin import firestore
+from google.api_core.exceptions import AlreadyExists, FailedPrecondition
+
+from keys import normalize_phone_number, order_ref, user_ref, get_user_order_doc
+from items_index import ITEMS_INDEX_COLLECTION, item_index_ref, index_entry_to_item, index_order_items, unindex_item
+from storage import (
+    ORDER_LIST_FIELDS, ORDER_STATUSES, OrderExists, OrdersRepository, WriteConflict, removed_product_ids,
+)
+
+DIRECTIONS = {
+    'asc': firestore.Query.ASCENDING,
+    'desc': firestore.Query.DESCENDING,
+}
+
+# Firestore batches accept at most 500 writes
+MAX_BATCH_WRITES = 500
+
+def aggregate_orders(query):
+    """Runs count() and sum(totalAmount) server-side, without downloading any order."""
+    aggregation = query.count(alias='count').sum('totalAmount', alias='totalAmount')
+    results = {result.alias: result.value for result in aggregation.get()[0]}
+    return {
+        'count': int(results.get('count') or 0),
+        'totalAmount': round(float(results.get('totalAmount') or 0), 2),
+    }
+
+def snapshot_changes(changes):
+    return [(change.type.name, change.document.id, change.document.to_dict()) for change in changes]
+
+class FirestoreRepository(OrdersRepository):
+    name = 'firestore'
+
+    def __init__(self):
+        super().__init__()
+        # Inherits credentials from the environment (Cloud Run)
+        if not firebase_admin._apps:
+            firebase_admin.initialize_app()
+        self.db = firestore.client()
+        # ThreadPool for fanning out independent Firestore queries within a request
+        self.executor = ThreadPoolExecutor(max_workers=10)
+
+    def get_user(self, phone_number):
+        return user_ref(self.db, phone_number).get()
+
+    def save_user(self, phone_number, user_email, user_name):
+        user_doc_ref = user_ref(self.db, phone_number)
+        try:
+            # Create new user, failing if the document already exists
+            user_doc_ref.create({
+                'phoneNumber': normalize_phone_number(phone_number),
+                'userEmail': user_email,
+                'userName': user_name,
+                'createdAt': firestore.SERVER_TIMESTAMP
+            })
+            return True
+        except AlreadyExists:
+            user_doc_ref.update({
+                'userEmail': user_email,
+                'userName': user_name
+            })
+            return False
+
+    def add_users(self, users):
+        batch = self.db.batch()
+        writes = 0
+        for user_data in users:
+            if writes == MAX_BATCH_WRITES:
+                batch.commit()
+                batch = self.db.batch()
+                writes = 0
+            batch.set(user_ref(self.db, user_data['phoneNumber']), {'createdAt': firestore.SERVER_TIMESTAMP, **user_data})
+            writes += 1
+        if writes:
+            batch.commit()
+
+    def get_order(self, email, order_id, field_paths=None):
+        return get_user_order_doc(self.db, email, order_id, field_paths=field_paths)
+
+    def get_many(self, keys):
+        refs = {}
+        for key in keys:
+            collection, doc_id = key
+            ref = user_ref(self.db, doc_id) if collection == 'users' else order_ref(self.db, doc_id)
+            refs[ref.path] = (key, ref)
+        if not refs:
+            return {}
+        snapshots = self.db.get_all([ref for _, ref in refs.values()])
+        return {refs[snapshot.reference.path][0]: snapshot for snapshot in snapshots}
+
+    def stream_orders(self, email, status=None, direction='desc', cursor=None, limit=None):
+        orders_ref = self.db.collection('orders')
+        query = orders_ref.where(filter=firestore.FieldFilter('userEmail', '==', email))
+
+        if status:
+            query = query.where(filter=firestore.FieldFilter('status', '==', status))
+
+        query = query.order_by('createdAt', direction=DIRECTIONS[direction]).select(ORDER_LIST_FIELDS)
+
+        if cursor:
+            cursor_doc = orders_ref.document(cursor).get(field_paths=['createdAt'])
+            if not cursor_doc.exists:
+                raise ValueError('Invalid cursor.')
+            query = query.start_after(cursor_doc)
+
+        if limit:
+            query = query.limit(limit)
+
+        return ((doc.id, doc.to_dict()) for doc in query.stream())
+
+    def summarize_orders(self, email, statuses=ORDER_STATUSES):
+        user_query = self.db.collection('orders').where(filter=firestore.FieldFilter('userEmail', '==', email))
+
+        # One aggregation for the totals plus one per status, run concurrently
+        total_future = self.executor.submit(aggregate_orders, user_query)
+        status_futures = {
+            status: self.executor.submit(
+                aggregate_orders,
+                user_query.where(filter=firestore.FieldFilter('status', '==', status)),
+            )
+            for status in statuses
+        }
+        summary = total_future.result()
+        by_status = {status: future.result() for status, future in status_futures.items()}
+        return summary, by_status
+
+    def update_order(self, order_doc, updates, reindex_items=False):
+        email = (order_doc.to_dict() or {}).get('userEmail')
+        batch = self.db.batch()
+        for product_id in removed_product_ids(order_doc.to_dict(), updates):
+            unindex_item(batch, self.db, email, order_doc.id, product_id)
+        if reindex_items:
+            index_order_items(batch, self.db, {**order_doc.to_dict(), **updates})
+        batch.update(order_doc.reference, updates, option=self.db.write_option(last_update_time=order_doc.update_time))
+        try:
+            batch.commit()
+        except FailedPrecondition:
+            raise WriteConflict(order_doc.id)
+
+    def scan_orders(self, start=None, end=None, after=None, limit=500):
+        orders_ref = self.db.collection('orders')
+        document_id = firestore.FieldPath.document_id()
+        query = orders_ref.order_by(document_id)
+        for op, value in [('>=', start), ('<', end), ('>', after)]:
+            if value is not None:
+                query = query.where(filter=firestore.FieldFilter(document_id, op, orders_ref.document(value)))
+        return list(query.limit(limit).stream())
+
+    def add_orders(self, orders):
+        batch = self.db.batch()
+        writes = 0
+        for order_data in orders:
+            order_data = {'createdAt': firestore.SERVER_TIMESTAMP, **order_data}
+            if writes + 1 + len(order_data.get('items') or []) > MAX_BATCH_WRITES:
+                self._commit_new_orders(batch)
+                batch = self.db.batch()
+                writes = 0
+            # create() fails the whole batch if the orderId is taken, instead of overwriting it
+            batch.create(order_ref(self.db, order_data['orderId']), order_data)
+            index_order_items(batch, self.db, order_data)
+            writes += 1 + len(order_data.get('items') or [])
+        if writes:
+            self._commit_new_orders(batch)
+
+    def _commit_new_orders(self, batch):
+        try:
+            batch.commit()
+        except AlreadyExists as e:
+            raise OrderExists(e.message)
+
+    def stream_items(self, email, status=None, since=None, direction='desc', limit=None):
+        # Served from the items index so only the requested items are read
+        query = self.db.collection(ITEMS_INDEX_COLLECTION).where(filter=firestore.FieldFilter('userEmail', '==', email))
+        if status:
+            query = query.where(filter=firestore.FieldFilter('status', '==', status))
+        if since:
+            query = query.where(filter=firestore.FieldFilter('orderCreatedAt', '>=', since))
+        query = query.order_by('orderCreatedAt', direction=DIRECTIONS[direction])
+        if limit:
+            query = query.limit(limit)
+
+        return (index_entry_to_item(doc.to_dict()) for doc in query.stream())
+
+    def get_item(self, email, product_id, order_id=None):
+        if order_id:
+            # Single direct read on the items index
+            index_doc = item_index_ref(self.db, email, order_id, product_id).get()
+            return index_entry_to_item(index_doc.to_dict()) if index_doc.exists else None
+        # The latest purchase of the product
+        query = (
+            self.db.collection(ITEMS_INDEX_COLLECTION)
+            .where(filter=firestore.FieldFilter('userEmail', '==', email))
+            .where(filter=firestore.FieldFilter('productId', '==', product_id))
+            .order_by('orderCreatedAt', direction=DIRECTIONS['desc'])
+            .limit(1)
+        )
+        for doc in query.stream():
+            return index_entry_to_item(doc.to_dict())
+        return None
+
+    def watch_users(self, callback):
+        return self.db.collection('users').on_snapshot(
+            lambda col_snapshot, changes, read_time: callback(snapshot_changes(changes))
+        )
+
+    def watch_user_orders(self, email, callback):
+        query = self.db.collection('orders').where(filter=firestore.FieldFilter('userEmail', '==', email))
+        return query.on_snapshot(
+            lambda col_snapshot, changes, read_time: callback(snapshot_changes(changes))
+        )
@@ -0,0 +1,152 @@
+"""
+Firestore storage backend on `AsyncClient`, for the async app.
+"""
+
+import asyncio
+
+import firebase_admin
+from firebase_admin import firestore, firestore_async
+from google.api_core.exceptions import AlreadyExists, FailedPrecondition
+
+from keys import normalize_phone_number, order_ref, user_ref
+from items_index import ITEMS_INDEX_COLLECTION, item_index_ref, index_entry_to_item, index_order_items, unindex_item
+from storage import ORDER_LIST_FIELDS, ORDER_STATUSES, WriteConflict, removed_product_ids
+from storage_firestore import DIRECTIONS
+
+def where(query, field, op, value):
+    return query.where(filter=firestore.FieldFilter(field, op, value))
+
+class AsyncFirestoreRepository:
+    name = 'firestore'
+
+    def __init__(self):
+        # Inherits credentials from the environment (Cloud Run)
+        if not firebase_admin._apps:
+            firebase_admin.initialize_app()
+        self.db = firestore_async.client()
+
+    async def get_user(self, phone_number):
+        return await user_ref(self.db, phone_number).get()
+
+    async def save_user(self, phone_number, user_email, user_name):
+        user_doc_ref = user_ref(self.db, phone_number)
+        try:
+            # Create new user, failing if the document already exists
+            await user_doc_ref.create({
+                'phoneNumber': normalize_phone_number(phone_number),
+                'userEmail': user_email,
+                'userName': user_name,
+                'createdAt': firestore.SERVER_TIMESTAMP
+            })
+            return True
+        except AlreadyExists:
+            await user_doc_ref.update({
+                'userEmail': user_email,
+                'userName': user_name
+            })
+            return False
+
+    async def get_order(self, email, order_id, field_paths=None):
+        if field_paths is not None and 'userEmail' not in field_paths:
+            field_paths = [*field_paths, 'userEmail']
+        doc = await order_ref(self.db, order_id).get(field_paths=field_paths)
+        if not doc.exists or (doc.to_dict() or {}).get('userEmail') != email:
+            return None
+        return doc
+
+    async def get_many(self, keys):
+        refs = {}
+        for key in keys:
+            collection, doc_id = key
+            ref = user_ref(self.db, doc_id) if collection == 'users' else order_ref(self.db, doc_id)
+            refs[ref.path] = (key, ref)
+        if not refs:
+            return {}
+        documents = {}
+        async for snapshot in self.db.get_all([ref for _, ref in refs.values()]):
+            documents[refs[snapshot.reference.path][0]] = snapshot
+        return documents
+
+    async def stream_orders(self, email, status=None, direction='desc', cursor=None, limit=None):
+        orders_ref = self.db.collection('orders')
+        query = where(orders_ref, 'userEmail', '==', email)
+
+        if status:
+            query = where(query, 'status', '==', status)
+
+        query = query.order_by('createdAt', direction=DIRECTIONS[direction]).select(ORDER_LIST_FIELDS)
+
+        if cursor:
+            cursor_doc = await orders_ref.document(cursor).get(field_paths=['createdAt'])
+            if not cursor_doc.exists:
+                raise ValueError('Invalid cursor.')
+            query = query.start_after(cursor_doc)
+
+        if limit:
+            query = query.limit(limit)
+
+        async def orders():
+            async for doc in query.stream():
+                yield doc.id, doc.to_dict()
+
+        return orders()
+
+    async def _aggregate(self, query):
+        """Runs count() and sum(totalAmount) server-side, without downloading any order."""
+        aggregation = query.count(alias='count').sum('totalAmount', alias='totalAmount')
+        results = {result.alias: result.value for result in (await aggregation.get())[0]}
+        return {
+            'count': int(results.get('count') or 0),
+            'totalAmount': round(float(results.get('totalAmount') or 0), 2),
+        }
+
+    async def summarize_orders(self, email, statuses=ORDER_STATUSES):
+        user_query = where(self.db.collection('orders'), 'userEmail', '==', email)
+
+        # One aggregation for the totals plus one per status, run concurrently
+        summary, *status_results = await asyncio.gather(
+            self._aggregate(user_query),
+            *(self._aggregate(where(user_query, 'status', '==', status)) for status in statuses),
+        )
+        return summary, dict(zip(statuses, status_results))
+
+    async def update_order(self, order_doc, updates, reindex_items=False):
+        email = (order_doc.to_dict() or {}).get('userEmail')
+        batch = self.db.batch()
+        for product_id in removed_product_ids(order_doc.to_dict(), updates):
+            unindex_item(batch, self.db, email, order_doc.id, product_id)
+        if reindex_items:
+            index_order_items(batch, self.db, {**order_doc.to_dict(), **updates})
+        batch.update(order_doc.reference, updates, option=self.db.write_option(last_update_time=order_doc.update_time))
+        try:
+            await batch.commit()
+        except FailedPrecondition:
+            raise WriteConflict(order_doc.id)
+
+    async def stream_items(self, email, status=None, since=None, direction='desc', limit=None):
+        # Served from the items index so only the requested items are read
+        query = where(self.db.collection(ITEMS_INDEX_COLLECTION), 'userEmail', '==', email)
+        if status:
+            query = where(query, 'status', '==', status)
+        if since:
+            query = where(query, 'orderCreatedAt', '>=', since)
+        query = query.order_by('orderCreatedAt', direction=DIRECTIONS[direction])
+        if limit:
+            query = query.limit(limit)
+
+        async def items():
+            async for doc in query.stream():
+                yield index_entry_to_item(doc.to_dict())
+
+        return items()
+
+    async def get_item(self, email, product_id, order_id=None):
+        if order_id:
+            # Single direct read on the items index
+            index_doc = await item_index_ref(self.db, email, order_id, product_id).get()
+            return index_entry_to_item(index_doc.to_dict()) if index_doc.exists else None
+        # The latest purchase of the product
+        query = where(where(self.db.collection(ITEMS_INDEX_COLLECTION), 'userEmail', '==', email), 'productId', '==', product_id)
+        async for doc in query.order_by('orderCreatedAt', direction=DIRECTIONS['desc']).limit(1).stream():
+            return index_entry_to_item(doc.to_dict())
+        return None
@@ -0,0 +1,277 @@
+"""
+Indexed in-memory storage backend.
+
+Orders and items index entries are kept in sorted indexes per user and per
+(user, status), mirroring the Firestore composite indexes, so listings are
+bisect range scans instead of full scans. Data lives only in this process.
+"""
+
+import bisect
+import copy
+import threading
+
+from keys import normalize_phone_number
+from items_index import build_item_index_entry, entry_index_id, index_entry_to_item, item_index_id
+from storage import (
+    EPOCH, ORDER_LIST_FIELDS, ORDER_STATUSES, Document, OrderExists, OrdersRepository, WriteConflict,
+    now, removed_product_ids, summarize_order_data,
+)
+
+class SortedIndex:
+    """Sorted list of `(sort value, document ID)` keys."""
+    def __init__(self):
+        self._keys = []
+
+    def __len__(self):
+        return len(self._keys)
+
+    def add(self, key):
+        bisect.insort(self._keys, key)
+
+    def remove(self, key):
+        position = bisect.bisect_left(self._keys, key)
+        if position < len(self._keys) and self._keys[position] == key:
+            del self._keys[position]
+
+    def scan(self, descending=False, after=None, lower_bound=None):
+        """
+        Yields keys in ascending or descending order, starting after the key `after`
+        and stopping at sort values below `lower_bound`.
+        """
+        keys = self._keys
+        low = bisect.bisect_left(keys, (lower_bound,)) if lower_bound is not None else 0
+        if descending:
+            high = bisect.bisect_left(keys, after) if after is not None else len(keys)
+            for position in range(high - 1, low - 1, -1):
+                yield keys[position]
+        else:
+            if after is not None:
+                low = max(low, bisect.bisect_right(keys, after))
+            for position in range(low, len(keys)):
+                yield keys[position]
+
+def sort_value(value):
+    return value or EPOCH
+
+def index_keys(email, status):
+    """Keys of the per-user and per-(user, status) indexes a document belongs to."""
+    if not status:
+        # A document without status is only in the per-user index, once
+        return [(email, None)]
+    return [(email, None), (email, status)]
+
+class MemoryRepository(OrdersRepository):
+    name = 'memory'
+
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.RLock()
+        self._users = {}  # normalized phone number -> user data
+        self._orders = {}  # document ID -> order data
+        self._versions = {}  # document ID -> write counter
+        self._order_index = {}  # (email, status or None) -> SortedIndex of (createdAt, document ID)
+        self._items = {}  # index document ID -> index entry
+        self._item_index = {}  # (email, status or None) -> SortedIndex of (orderCreatedAt, index document ID)
+        self._product_index = {}  # (email, product ID) -> SortedIndex of (orderCreatedAt, index document ID)
+
+    # Users
+
+    def get_user(self, phone_number):
+        phone_number = normalize_phone_number(phone_number)
+        with self._lock:
+            data = self._users.get(phone_number)
+            return Document(phone_number, copy.deepcopy(data))
+
+    def save_user(self, phone_number, user_email, user_name):
+        phone_number = normalize_phone_number(phone_number)
+        with self._lock:
+            existing = self._users.get(phone_number)
+            if existing is None:
+                data = {
+                    'phoneNumber': phone_number,
+                    'userEmail': user_email,
+                    'userName': user_name,
+                    'createdAt': now(),
+                }
+            else:
+                data = {**existing, 'userEmail': user_email, 'userName': user_name}
+            self._users[phone_number] = data
+        self._notify('users', [('ADDED' if existing is None else 'MODIFIED', phone_number, copy.deepcopy(data))])
+        return existing is None
+
+    def add_users(self, users):
+        changes = []
+        with self._lock:
+            for user_data in users:
+                phone_number = normalize_phone_number(user_data['phoneNumber'])
+                data = {'createdAt': now(), **copy.deepcopy(user_data), 'phoneNumber': phone_number}
+                changes.append(('MODIFIED' if phone_number in self._users else 'ADDED', phone_number, copy.deepcopy(data)))
+                self._users[phone_number] = data
+        self._notify('users', changes)
+
+    # Orders
+
+    def get_order(self, email, order_id, field_paths=None):
+        with self._lock:
+            data = self._orders.get(order_id)
+            if data is None or data.get('userEmail') != email:
+                return None
+            return Document(order_id, copy.deepcopy(data), self._versions[order_id])
+
+    def get_many(self, keys):
+        with self._lock:
+            documents = {}
+            for key in keys:
+                collection, doc_id = key
+                if collection == 'users':
+                    documents[key] = self.get_user(doc_id)
+                else:
+                    data = self._orders.get(doc_id)
+                    documents[key] = Document(doc_id, copy.deepcopy(data), self._versions.get(doc_id))
+            return documents
+
+    def stream_orders(self, email, status=None, direction='desc', cursor=None, limit=None):
+        with self._lock:
+            after = None
+            if cursor:
+                cursor_data = self._orders.get(cursor)
+                if cursor_data is None:
+                    raise ValueError('Invalid cursor.')
+                after = (sort_value(cursor_data.get('createdAt')), cursor)
+
+            index = self._order_index.get((email, status or None))
+            if index is None:
+                return iter([])
+
+            page = []
+            for _, doc_id in index.scan(descending=direction == 'desc', after=after):
+                data = self._orders[doc_id]
+                page.append((doc_id, {field: data.get(field) for field in ORDER_LIST_FIELDS}))
+                if limit and len(page) >= limit:
+                    break
+            return iter(page)
+
+    def summarize_orders(self, email, statuses=ORDER_STATUSES):
+        with self._lock:
+            index = self._order_index.get((email, None))
+            orders = [self._orders[doc_id] for _, doc_id in index.scan()] if index else []
+            return summarize_order_data(orders, statuses)
+
+    def update_order(self, order_doc, updates, reindex_items=False):
+        doc_id = order_doc.id
+        with self._lock:
+            if self._versions.get(doc_id) != order_doc.version:
+                raise WriteConflict(doc_id)
+            current = self._orders[doc_id]
+            email = current.get('userEmail')
+            for product_id in removed_product_ids(current, updates):
+                self._remove_item_entry(item_index_id(email, doc_id, product_id))
+            self._unindex_order(doc_id, current)
+            data = {**current, **copy.deepcopy(updates)}
+            self._store_order(doc_id, data)
+            if reindex_items:
+                for item in data.get('items') or []:
+                    if email and item.get('productId'):
+                        self._store_item_entry(build_item_index_entry(data, copy.deepcopy(item)))
+        self._notify(('orders', email), [('MODIFIED', doc_id, copy.deepcopy(data))])
+
+    def scan_orders(self, start=None, end=None, after=None, limit=500):
+        with self._lock:
+            doc_ids = sorted(
+                doc_id for doc_id in self._orders
+                if (start is None or doc_id >= start) and (end is None or doc_id < end)
+                and (after is None or doc_id > after)
+            )[:limit]
+            return [Document(doc_id, copy.deepcopy(self._orders[doc_id]), self._versions[doc_id]) for doc_id in doc_ids]
+
+    def add_orders(self, orders):
+        changes = {}
+        with self._lock:
+            # All or nothing, like a Firestore batch of create()s
+            order_ids = [order_data['orderId'] for order_data in orders]
+            taken = [order_id for order_id in order_ids if order_id in self._orders]
+            if taken or len(set(order_ids)) < len(order_ids):
+                raise OrderExists(', '.join(taken) or 'duplicate orderId in the batch')
+            for order_data in orders:
+                order_data = copy.deepcopy(order_data)
+                order_data.setdefault('createdAt', now())
+                doc_id = order_data['orderId']
+                self._store_order(doc_id, order_data)
+                email = order_data.get('userEmail')
+                for item in order_data.get('items') or []:
+                    if email and item.get('productId'):
+                        self._store_item_entry(build_item_index_entry(order_data, item))
+                changes.setdefault(email, []).append(('ADDED', doc_id, copy.deepcopy(order_data)))
+        for email, email_changes in changes.items():
+            self._notify(('orders', email), email_changes)
+
+    def _user_orders(self, email):
+        with self._lock:
+            index = self._order_index.get((email, None))
+            if index is None:
+                return []
+            return [(doc_id, copy.deepcopy(self._orders[doc_id])) for _, doc_id in index.scan()]
+
+    def _store_order(self, doc_id, data):
+        self._orders[doc_id] = data
+        self._versions[doc_id] = self._versions.get(doc_id, 0) + 1
+        key = (sort_value(data.get('createdAt')), doc_id)
+        email = data.get('userEmail')
+        for index_key in index_keys(email, data.get('status')):
+            self._order_index.setdefault(index_key, SortedIndex()).add(key)
+
+    def _unindex_order(self, doc_id, data):
+        key = (sort_value(data.get('createdAt')), doc_id)
+        email = data.get('userEmail')
+        for index_key in index_keys(email, data.get('status')):
+            index = self._order_index.get(index_key)
+            if index is not None:
+                index.remove(key)
+
+    # Items index
+
+    def stream_items(self, email, status=None, since=None, direction='desc', limit=None):
+        with self._lock:
+            index = self._item_index.get((email, status or None))
+            if index is None:
+                return iter([])
+
+            items = []
+            for _, entry_id in index.scan(descending=direction == 'desc', lower_bound=since):
+                items.append(index_entry_to_item(self._items[entry_id]))
+                if limit and len(items) >= limit:
+                    break
+            return iter(copy.deepcopy(items))
+
+    def get_item(self, email, product_id, order_id=None):
+        with self._lock:
+            if order_id:
+                entry = self._items.get(item_index_id(email, order_id, product_id))
+            else:
+                # The latest purchase of the product
+                index = self._product_index.get((email, product_id))
+                latest = next(index.scan(descending=True), None) if index else None
+                entry = self._items[latest[1]] if latest else None
+            return index_entry_to_item(copy.deepcopy(entry)) if entry is not None else None
+
+    def _store_item_entry(self, entry):
+        entry_id = entry_index_id(entry)
+        self._remove_item_entry(entry_id)
+        self._items[entry_id] = entry
+        key = (sort_value(entry.get('orderCreatedAt')), entry_id)
+        for index_key in index_keys(entry['userEmail'], entry.get('status')):
+            self._item_index.setdefault(index_key, SortedIndex()).add(key)
+        self._product_index.setdefault((entry['userEmail'], entry['productId']), SortedIndex()).add(key)
+
+    def _remove_item_entry(self, entry_id):
+        entry = self._items.pop(entry_id, None)
+        if entry is None:
+            return
+        key = (sort_value(entry.get('orderCreatedAt')), entry_id)
+        for index_key in index_keys(entry['userEmail'], entry.get('status')):
+            index = self._item_index.get(index_key)
+            if index is not None:
+                index.remove(key)
+        index = self._product_index.get((entry['userEmail'], entry['productId']))
+        if index is not None:
+            index.remove(key)
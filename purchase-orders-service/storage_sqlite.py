@@ -0,0 +1,363 @@
+"""
+SQLite storage backend.
+
+Orders, users and items index entries are stored as JSON documents next to the
+columns that are filtered and sorted on, with the same composite indexes as
+firestore.indexes.json. Timestamps are stored as UTC ISO strings so they sort
+lexicographically; timestamps nested in a JSON body (e.g. an item's `shippedAt`)
+are stored as `{"$timestamp": <ISO string>}` and read back as datetimes, like the
+other engines return them. Optimistic concurrency uses a per-order version column.
+"""
+
+import datetime
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from keys import normalize_phone_number
+from items_index import build_item_index_entry, entry_index_id, index_entry_to_item, item_index_id
+from storage import (
+    ORDER_STATUSES, Document, OrderExists, OrdersRepository, WriteConflict, now, removed_product_ids,
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    phone_number TEXT PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS orders (
+    doc_id TEXT PRIMARY KEY,
+    user_email TEXT NOT NULL,
+    status TEXT,
+    created_at TEXT NOT NULL,
+    item_count INTEGER NOT NULL,
+    total_amount REAL,
+    version INTEGER NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS orders_by_user ON orders (user_email, created_at, doc_id);
+CREATE INDEX IF NOT EXISTS orders_by_user_status ON orders (user_email, status, created_at, doc_id);
+CREATE TABLE IF NOT EXISTS order_items (
+    entry_id TEXT PRIMARY KEY,
+    user_email TEXT NOT NULL,
+    product_id TEXT NOT NULL,
+    status TEXT,
+    order_created_at TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS items_by_user ON order_items (user_email, order_created_at, entry_id);
+CREATE INDEX IF NOT EXISTS items_by_user_status ON order_items (user_email, status, order_created_at, entry_id);
+CREATE INDEX IF NOT EXISTS items_by_product ON order_items (user_email, product_id, order_created_at);
+"""
+
+# Marks a timestamp nested in a JSON body
+TIMESTAMP_KEY = '$timestamp'
+
+def encode_timestamp(value):
+    """UTC ISO string with a fixed width, '' when missing (sorts first, like the Firestore epoch)."""
+    if not value:
+        return ''
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=datetime.timezone.utc)
+    return value.astimezone(datetime.timezone.utc).isoformat(timespec='microseconds')
+
+def decode_timestamp(value):
+    return datetime.datetime.fromisoformat(value) if value else None
+
+def encode_json_value(value):
+    if isinstance(value, datetime.datetime):
+        return {TIMESTAMP_KEY: encode_timestamp(value)}
+    raise TypeError(f"{type(value).__name__} values cannot be stored in SQLite documents")
+
+def decode_json_object(obj):
+    if len(obj) == 1 and TIMESTAMP_KEY in obj:
+        return decode_timestamp(obj[TIMESTAMP_KEY])
+    return obj
+
+def encode_body(data):
+    return json.dumps(data, default=encode_json_value)
+
+def decode_body(body):
+    return json.loads(body, object_hook=decode_json_object)
+
+def encode_document(data, timestamp_field):
+    """Splits a document into its timestamp column and JSON body."""
+    body = {key: value for key, value in data.items() if key != timestamp_field}
+    return encode_timestamp(data.get(timestamp_field)), encode_body(body)
+
+def decode_document(timestamp, body, timestamp_field):
+    data = decode_body(body)
+    data[timestamp_field] = decode_timestamp(timestamp)
+    return data
+
+class SQLiteRepository(OrdersRepository):
+    name = 'sqlite'
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        self._local = threading.local()
+        self._connection().executescript(SCHEMA)
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            # One connection per thread, transactions are managed explicitly
+            connection = sqlite3.connect(self.path, isolation_level=None, timeout=30)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+        return connection
+
+    @contextmanager
+    def _transaction(self):
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            yield connection
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+
+    # Users
+
+    def get_user(self, phone_number):
+        phone_number = normalize_phone_number(phone_number)
+        row = self._connection().execute(
+            'SELECT created_at, data FROM users WHERE phone_number = ?', (phone_number,)
+        ).fetchone()
+        return Document(phone_number, decode_document(row[0], row[1], 'createdAt') if row else None)
+
+    def save_user(self, phone_number, user_email, user_name):
+        phone_number = normalize_phone_number(phone_number)
+        with self._transaction() as connection:
+            row = connection.execute(
+                'SELECT created_at, data FROM users WHERE phone_number = ?', (phone_number,)
+            ).fetchone()
+            if row is None:
+                data = {
+                    'phoneNumber': phone_number,
+                    'userEmail': user_email,
+                    'userName': user_name,
+                    'createdAt': now(),
+                }
+            else:
+                data = {**decode_document(row[0], row[1], 'createdAt'), 'userEmail': user_email, 'userName': user_name}
+            created_at, body = encode_document(data, 'createdAt')
+            connection.execute(
+                'INSERT OR REPLACE INTO users (phone_number, created_at, data) VALUES (?, ?, ?)',
+                (phone_number, created_at, body),
+            )
+        self._notify('users', [('ADDED' if row is None else 'MODIFIED', phone_number, data)])
+        return row is None
+
+    def add_users(self, users):
+        rows = []
+        for user_data in users:
+            phone_number = normalize_phone_number(user_data['phoneNumber'])
+            created_at, body = encode_document(
+                {'createdAt': now(), **user_data, 'phoneNumber': phone_number}, 'createdAt'
+            )
+            rows.append((phone_number, created_at, body))
+        with self._transaction() as connection:
+            connection.executemany(
+                'INSERT OR REPLACE INTO users (phone_number, created_at, data) VALUES (?, ?, ?)', rows
+            )
+
+    # Orders
+
+    def _read_order(self, connection, doc_id):
+        row = connection.execute(
+            'SELECT created_at, data, version FROM orders WHERE doc_id = ?', (doc_id,)
+        ).fetchone()
+        if row is None:
+            return Document(doc_id, None)
+        return Document(doc_id, decode_document(row[0], row[1], 'createdAt'), row[2])
+
+    def get_order(self, email, order_id, field_paths=None):
+        order_doc = self._read_order(self._connection(), order_id)
+        if not order_doc.exists or order_doc.to_dict().get('userEmail') != email:
+            return None
+        return order_doc
+
+    def get_many(self, keys):
+        connection = self._connection()
+        documents = {}
+        for key in keys:
+            collection, doc_id = key
+            documents[key] = self.get_user(doc_id) if collection == 'users' else self._read_order(connection, doc_id)
+        return documents
+
+    def stream_orders(self, email, status=None, direction='desc', cursor=None, limit=None):
+        connection = self._connection()
+        conditions = ['user_email = ?']
+        params = [email]
+        if status:
+            conditions.append('status = ?')
+            params.append(status)
+        if cursor:
+            row = connection.execute('SELECT created_at FROM orders WHERE doc_id = ?', (cursor,)).fetchone()
+            if row is None:
+                raise ValueError('Invalid cursor.')
+            conditions.append(f"(created_at, doc_id) {'<' if direction == 'desc' else '>'} (?, ?)")
+            params.extend([row[0], cursor])
+
+        sql_direction = 'DESC' if direction == 'desc' else 'ASC'
+        sql = (
+            'SELECT doc_id, created_at, status, item_count, total_amount FROM orders '
+            f"WHERE {' AND '.join(conditions)} "
+            f'ORDER BY created_at {sql_direction}, doc_id {sql_direction}'
+        )
+        if limit:
+            sql += ' LIMIT ?'
+            params.append(limit)
+
+        rows = connection.execute(sql, params).fetchall()
+        # Orders are keyed by orderId, so the document ID is the orderId
+        return (
+            (doc_id, {
+                'orderId': doc_id,
+                'status': status,
+                'createdAt': decode_timestamp(created_at),
+                'itemCount': item_count,
+                'totalAmount': total_amount,
+            })
+            for doc_id, created_at, status, item_count, total_amount in rows
+        )
+
+    def summarize_orders(self, email, statuses=ORDER_STATUSES):
+        rows = self._connection().execute(
+            'SELECT status, COUNT(*), TOTAL(total_amount) FROM orders WHERE user_email = ? GROUP BY status',
+            (email,),
+        ).fetchall()
+        by_status = {status: {'count': 0, 'totalAmount': 0.0} for status in statuses}
+        for status, count, total_amount in rows:
+            by_status[status] = {'count': count, 'totalAmount': round(total_amount, 2)}
+        summary = {
+            'count': sum(count for _, count, _ in rows),
+            'totalAmount': round(sum(total_amount for _, _, total_amount in rows), 2),
+        }
+        return summary, by_status
+
+    def update_order(self, order_doc, updates, reindex_items=False):
+        with self._transaction() as connection:
+            current = self._read_order(connection, order_doc.id)
+            if current.version != order_doc.version:
+                raise WriteConflict(order_doc.id)
+            current_data = current.to_dict()
+            email = current_data.get('userEmail')
+            connection.executemany(
+                'DELETE FROM order_items WHERE entry_id = ?',
+                [(item_index_id(email, order_doc.id, product_id),) for product_id in removed_product_ids(current_data, updates)],
+            )
+            data = {**current_data, **updates}
+            self._write_order(connection, order_doc.id, data, current.version + 1)
+            if reindex_items:
+                for item in data.get('items') or []:
+                    if email and item.get('productId'):
+                        self._write_item_entry(connection, build_item_index_entry(data, item))
+        self._notify(('orders', email), [('MODIFIED', order_doc.id, data)])
+
+    def scan_orders(self, start=None, end=None, after=None, limit=500):
+        conditions = []
+        params = []
+        for condition, value in [('doc_id >= ?', start), ('doc_id < ?', end), ('doc_id > ?', after)]:
+            if value is not None:
+                conditions.append(condition)
+                params.append(value)
+        where = f"WHERE {' AND '.join(conditions)} " if conditions else ''
+        rows = self._connection().execute(
+            f'SELECT doc_id, created_at, data, version FROM orders {where}ORDER BY doc_id LIMIT ?', [*params, limit]
+        ).fetchall()
+        return [
+            Document(doc_id, decode_document(created_at, body, 'createdAt'), version)
+            for doc_id, created_at, body, version in rows
+        ]
+
+    def add_orders(self, orders):
+        changes = {}
+        with self._transaction() as connection:
+            for order_data in orders:
+                order_data = {'createdAt': now(), **order_data}
+                doc_id = order_data['orderId']
+                if self._read_order(connection, doc_id).exists:
+                    # Rolls back the whole call, like a Firestore batch of create()s
+                    raise OrderExists(doc_id)
+                self._write_order(connection, doc_id, order_data, 1)
+                email = order_data.get('userEmail')
+                for item in order_data.get('items') or []:
+                    if email and item.get('productId'):
+                        self._write_item_entry(connection, build_item_index_entry(order_data, item))
+                changes.setdefault(email, []).append(('ADDED', doc_id, order_data))
+        for email, email_changes in changes.items():
+            self._notify(('orders', email), email_changes)
+
+    def _write_order(self, connection, doc_id, data, version):
+        created_at, body = encode_document(data, 'createdAt')
+        item_count = data.get('itemCount')
+        if item_count is None:
+            item_count = len(data.get('items') or [])
+        connection.execute(
+            'INSERT OR REPLACE INTO orders '
+            '(doc_id, user_email, status, created_at, item_count, total_amount, version, data) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            (doc_id, data.get('userEmail'), data.get('status'), created_at, item_count,
+             data.get('totalAmount'), version, body),
+        )
+
+    def _user_orders(self, email):
+        rows = self._connection().execute(
+            'SELECT doc_id, created_at, data FROM orders WHERE user_email = ?', (email,)
+        ).fetchall()
+        return [(doc_id, decode_document(created_at, body, 'createdAt')) for doc_id, created_at, body in rows]
+
+    # Items index
+
+    def stream_items(self, email, status=None, since=None, direction='desc', limit=None):
+        conditions = ['user_email = ?']
+        params = [email]
+        if status:
+            conditions.append('status = ?')
+            params.append(status)
+        if since:
+            conditions.append('order_created_at >= ?')
+            params.append(encode_timestamp(since))
+
+        sql_direction = 'DESC' if direction == 'desc' else 'ASC'
+        sql = (
+            'SELECT order_created_at, data FROM order_items '
+            f"WHERE {' AND '.join(conditions)} "
+            f'ORDER BY order_created_at {sql_direction}, entry_id {sql_direction}'
+        )
+        if limit:
+            sql += ' LIMIT ?'
+            params.append(limit)
+
+        rows = self._connection().execute(sql, params).fetchall()
+        return (index_entry_to_item(decode_body(body)) for _, body in rows)
+
+    def get_item(self, email, product_id, order_id=None):
+        if order_id:
+            row = self._connection().execute(
+                'SELECT data FROM order_items WHERE entry_id = ?', (item_index_id(email, order_id, product_id),)
+            ).fetchone()
+        else:
+            # The latest purchase of the product
+            row = self._connection().execute(
+                'SELECT data FROM order_items WHERE user_email = ? AND product_id = ? '
+                'ORDER BY order_created_at DESC LIMIT 1',
+                (email, product_id),
+            ).fetchone()
+        return index_entry_to_item(decode_body(row[0])) if row else None
+
+    def _write_item_entry(self, connection, entry):
+        order_created_at, body = encode_document(entry, 'orderCreatedAt')
+        connection.execute(
+            'INSERT OR REPLACE INTO order_items (entry_id, user_email, product_id, status, order_created_at, data) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            (entry_index_id(entry), entry['userEmail'], entry['productId'], entry.get('status'),
+             order_created_at, body),
+        )
@@ -0,0 +1,19 @@
+import pytest
+
+from payloads import parse_order_by
+
+
+@pytest.mark.parametrize('value, expected', [
+    (None, ('createdAt', 'desc')),
+    ('', ('createdAt', 'desc')),
+    ('createdAt', ('createdAt', 'asc')),
+    ('createdAt DESC', ('createdAt', 'desc')),
+])
+def test_parse_order_by(value, expected):
+    assert parse_order_by(value) == expected
+
+
+@pytest.mark.parametrize('value', [' ', '\t', 'status asc', 'createdAt sideways', 'createdAt desc extra'])
+def test_parse_order_by_rejects_invalid_values(value):
+    with pytest.raises(ValueError):
+        parse_order_by(value)
@@ -0,0 +1,29 @@
+import datetime
+import json
+
+import pytest
+from flask import Flask
+
+import responses
+from config import Config
+
+PAYLOAD = {
+    'createdAt': datetime.datetime(2025, 3, 1, 12, 30, 15, tzinfo=datetime.timezone.utc),
+    'items': [{'shippedAt': datetime.date(2025, 3, 3), 'quantity': 2}],
+}
+EXPECTED = {
+    'createdAt': 'Sat, 01 Mar 2025 12:30:15 GMT',
+    'items': [{'shippedAt': 'Mon, 03 Mar 2025 00:00:00 GMT', 'quantity': 2}],
+}
+
+
+@pytest.mark.parametrize('fast_json', [True, False])
+def test_both_apps_encode_datetimes_the_same(monkeypatch, fast_json):
+    monkeypatch.setattr(Config, 'FAST_JSON_ENABLED', fast_json)
+    app = Flask(__name__)
+    responses.init_json_provider(app)
+
+    # Flask app (jsonify and streamed records) and async app (JsonResponse)
+    assert json.loads(app.json.dumps(PAYLOAD)) == EXPECTED
+    assert json.loads(app.json.encode(PAYLOAD)) == EXPECTED
+    assert json.loads(responses.dumps(PAYLOAD)) == EXPECTED
@@ -0,0 +1,76 @@
+import datetime
+
+import pytest
+
+from storage_memory import MemoryRepository
+from storage_sqlite import SQLiteRepository
+
+EMAIL = 'ana@example.com'
+CREATED_AT = datetime.datetime(2025, 3, 1, 12, 30, 15, 250000, tzinfo=datetime.timezone.utc)
+SHIPPED_AT = datetime.datetime(2025, 3, 3, 8, 0, tzinfo=datetime.timezone.utc)
+DELIVERED_AT = datetime.datetime(2025, 3, 5, 17, 45, 30, tzinfo=datetime.timezone.utc)
+
+
+def order():
+    return {
+        'orderId': 'a1b2c3d4e5f6',
+        'userEmail': EMAIL,
+        'status': 'enviada',
+        'createdAt': CREATED_AT,
+        'itemCount': 2,
+        'totalAmount': 30.0,
+        'items': [
+            {'productId': 'p1', 'productName': 'Lámpara', 'quantity': 1, 'priceAtPurchase': 10.0, 'shippedAt': SHIPPED_AT},
+            {'productId': 'p2', 'productName': 'Silla', 'quantity': 2, 'priceAtPurchase': 10.0, 'shippedAt': ""},
+        ],
+    }
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def repo(request, tmp_path):
+    if request.param == 'memory':
+        return MemoryRepository()
+    return SQLiteRepository(str(tmp_path / 'orders.db'))
+
+
+def read_back(repo):
+    return {
+        'order': repo.get_order(EMAIL, 'a1b2c3d4e5f6').to_dict(),
+        'items': list(repo.stream_items(EMAIL)),
+        'item': repo.get_item(EMAIL, 'p1', 'a1b2c3d4e5f6'),
+        'latest': repo.get_item(EMAIL, 'p1'),
+    }
+
+
+def test_nested_timestamps_round_trip(repo):
+    repo.add_orders([order()])
+    stored = read_back(repo)
+
+    assert stored['order'] == order()
+    assert stored['order']['createdAt'] == CREATED_AT
+    assert isinstance(stored['order']['items'][0]['shippedAt'], datetime.datetime)
+    assert stored['order']['items'][0]['shippedAt'] == SHIPPED_AT
+    assert stored['item']['shippedAt'] == SHIPPED_AT
+    assert stored['latest'] == stored['item']
+    assert {item['productId']: item['shippedAt'] for item in stored['items']} == {'p1': SHIPPED_AT, 'p2': ""}
+
+
+def test_nested_timestamps_survive_updates(repo):
+    repo.add_orders([order()])
+    order_doc = repo.get_order(EMAIL, 'a1b2c3d4e5f6')
+    items = order_doc.to_dict()['items']
+    items[0] = {**items[0], 'deliveredAt': DELIVERED_AT}
+    repo.update_order(order_doc, {'items': items, 'status': 'entregada'}, reindex_items=True)
+
+    stored = read_back(repo)
+    assert stored['order']['items'][0]['deliveredAt'] == DELIVERED_AT
+    assert stored['order']['items'][0]['shippedAt'] == SHIPPED_AT
+    assert stored['item']['deliveredAt'] == DELIVERED_AT
+
+
+def test_engines_return_the_same_payloads(tmp_path):
+    payloads = []
+    for repo in [MemoryRepository(), SQLiteRepository(str(tmp_path / 'orders.db'))]:
+        repo.add_orders([order()])
+        payloads.append(read_back(repo))
+    assert payloads[0] == payloads[1]
@@ -0,0 +1,104 @@
+"""
+Request timing.
+
+Every request accumulates the time spent in each phase:
+    query        storage reads and writes, including fetching streamed results
+    materialize  turning stored documents into response payloads
+    serialize    JSON encoding
+    compress     response compression
+The phases and the total are returned in a `Server-Timing` header and observed
+in Prometheus histograms served on /metrics, labelled by route template.
+
+The current request's timer lives in a context variable, so code anywhere in
+the call stack records phases without passing a timer around. Outside a
+request (scripts, benchmarks, /batch worker threads) recording is a no-op.
+Streamed bodies are produced after the headers are sent: their phases only
+reach the histograms.
+"""
+
+import contextvars
+import time
+
+from prometheus_client import CONTENT_TYPE_LATEST, Histogram, generate_latest
+
+from config import Config
+
+PHASE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+REQUEST_SECONDS = Histogram(
+    'purchase_orders_request_duration_seconds',
+    'Request duration by route.',
+    ['method', 'route', 'status'],
+    buckets=PHASE_BUCKETS,
+)
+PHASE_SECONDS = Histogram(
+    'purchase_orders_request_phase_seconds',
+    'Time spent per request phase by route.',
+    ['route', 'phase'],
+    buckets=PHASE_BUCKETS,
+)
+
+_current_timer = contextvars.ContextVar('request_timer', default=None)
+
+class RequestTimer:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = {}
+
+    def add(self, name, seconds):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def server_timing(self):
+        """Server-Timing header value, durations in milliseconds."""
+        entries = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in self.phases.items()]
+        entries.append(f"total;dur={self.elapsed() * 1000:.2f}")
+        return ', '.join(entries)
+
+class phase:
+    """Context manager adding the time spent in its block to a phase of the current request."""
+    __slots__ = ('name', 'timer', 'started')
+
+    def __init__(self, name):
+        self.name = name
+        self.timer = _current_timer.get()
+
+    def __enter__(self):
+        if self.timer is not None:
+            self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.timer is not None:
+            self.timer.add(self.name, time.perf_counter() - self.started)
+
+def record(name, seconds):
+    """Adds seconds measured elsewhere to a phase of the current request."""
+    timer = _current_timer.get()
+    if timer is not None:
+        timer.add(name, seconds)
+
+def current():
+    return _current_timer.get()
+
+def start_request():
+    """Starts timing the current request. Returns None when metrics are disabled."""
+    if not Config.METRICS_ENABLED:
+        return None
+    timer = RequestTimer()
+    _current_timer.set(timer)
+    return timer
+
+def finish_request(timer, method, route, status):
+    """Observes a finished request in the histograms and stops recording into its timer."""
+    if _current_timer.get() is timer:
+        _current_timer.set(None)
+    REQUEST_SECONDS.labels(method, route, str(status)).observe(timer.elapsed())
+    for name, seconds in timer.phases.items():
+        PHASE_SECONDS.labels(route, name).observe(seconds)
+
+def metrics():
+    """Returns the Prometheus exposition payload and its content type."""
+    return generate_latest(), CONTENT_TYPE_LATEST
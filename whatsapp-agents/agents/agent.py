@@ -9,9 +9,12 @@ from google.adk.models import LlmResponse
 from google.genai import types
 from typing import Dict, Any, Optional
 
-from .services.user import get_user, GetUserRequest
-from .services.order import get_orders, GetOrdersRequest, get_items, GetItemsRequest, get_item, GetItemRequest, get_order, GetOrderRequest, cancel_order, CancelOrderRequest, add_feedback, AddFeedbackRequest, remove_item, RemoveItemRequest
-from .services.whatsapp import send_interactive_list_message, InteractiveListMessage, InteractiveHeader, InteractiveBody, InteractiveFooter, InteractiveAction, InteractiveActionSection, InteractiveActionSectionRow, send_text_message, TextMessage, TextObject, send_image_message, ImageMessage, MediaObject, send_interactive_reply_buttons_message, InteractiveReplyButtonsMessage, InteractiveActionButtonReply, InteractiveActionReplyButton, send_interactive_carousel_message, InteractiveCarouselMessage, InteractiveCarousel, InteractiveCarouselCard, InteractiveCarouselCardHeader
+from .services.user import get_user_cached, GetUserRequest
+from .services.order import get_orders_async, GetOrdersRequest, get_orders_summary_async, GetOrdersSummaryRequest, get_items_async, GetItemsRequest, get_item_async, GetItemRequest, get_order_async, GetOrderRequest, cancel_order_async, CancelOrderRequest, add_feedback_async, AddFeedbackRequest, remove_item_async, RemoveItemRequest, get_date_async
+from .services.whatsapp import send_text_message, TextMessage, TextObject
+from .render import WHATSAPP_LIST_MAX_ROWS, CONFIRM_CANCEL_ORDER_PREFIX, CONFIRM_REMOVE_ITEM_PREFIX, PENDING_CONFIRMATION_KEY, render_tool_result, send_confirmation, send_remove_item_list
+from .router import FastPathRouter, take_confirmation
+from .tool_cache import cached_tool, invalidates_order
 
 # Setup
 LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
@@ -21,7 +24,7 @@ logger = logging.getLogger(__name__)
 agent_path = os.path.dirname(os.path.abspath(__file__))
 
 # Callbacks
-def before_agent_modifier(callback_context: CallbackContext) -> Optional[types.Content]:
+async def before_agent_modifier(callback_context: CallbackContext) -> Optional[types.Content]:
     user_phone_number = None
     if callback_context.state.get('user_phone_number') is None:
         user_phone_number = callback_context.user_id
@@ -38,18 +41,27 @@ def before_agent_modifier(callback_context: CallbackContext) -> Optional[types.C
     user_email = callback_context.state.get('user_email')
     user_name = callback_context.state.get('user_name')
     if user_email is None:
-        userInfo = get_user(GetUserRequest(phone_number=user_phone_number))
+        userInfo = await get_user_cached(GetUserRequest(phone_number=user_phone_number))
         if userInfo:
             callback_context.state['user_email'] = userInfo.userEmail
             callback_context.state['user_name'] = userInfo.userName
         else:
-            success, _ = send_text_message(TextMessage(
+            # Flag the message as sent only once WhatsApp accepted it, so a failed send still gets the model's reply
+            success, _ = await send_text_message(TextMessage(
                 to=user_phone_number,
                 text=TextObject(body="No hemos encontrado tu usuario. Por favor, regístrate en nuestra página web.")
             ))
             callback_context.state['whatsapp_message_sent'] = success
             logger.error(f"User not found: {user_phone_number}")
+            return None
 
+    reply = await fast_path_router.route(callback_context, user_phone_number)
+    if reply:
+        return types.Content(role='model', parts=[types.Part(text=reply)])
+    return None
+
+def after_agent_modifier(callback_context: CallbackContext) -> Optional[types.Content]:
+    fast_path_router.finish_model_turn(callback_context)
     return None
 
 def simple_before_tool_modifier(tool: BaseTool, args: Dict[str, Any], tool_context: ToolContext) -> Optional[Dict]:
@@ -75,120 +87,9 @@ def po_after_model_callback(callback_context: CallbackContext, llm_response: Llm
 
             last_tool_name = callback_context.state.get('last_tool_name')
             last_tool_result = callback_context.state.get('last_tool_result')
-            
-            if last_tool_name == 'get_user_orders' and last_tool_result and last_tool_result.get('orders'):
-                orders = last_tool_result.get('orders')
-                message = InteractiveListMessage(
-                    to=user_phone_number,
-                    header=InteractiveHeader(type="text", text="Órdenes de compra"),
-                    body=InteractiveBody(text='Estas son tus órdenes de compra recientes.'),
-                    footer=InteractiveFooter(text="Estas son tus órdenes de compra recientes."),
-                    action=InteractiveAction(
-                        button="Ver órdenes",
-                        sections=[
-                            InteractiveActionSection(
-                                title="Órdenes recientes",
-                                rows=[
-                                    InteractiveActionSectionRow(
-                                        id=order.get('orderId', ''),
-                                        title=f"Orden: {order.get('orderId', '')}",
-                                        description=f"Estado: {order.get('status', '')} | Fecha: {order.get('createdAt', '')[:10] if order.get('createdAt') else 'N/A'} | Items: {order.get('itemCount', 0)} | Total: ${order.get('totalAmount', 0)}",
-                                    )
-                                    for order in orders
-                                ],
-                            )
-                        ],
-                    ),
-                )
-                success, error_msg = send_interactive_list_message(message)
-                if not success: logger.error(f"Cannot send orders list: {error_msg}")
-
-            elif last_tool_name == 'get_user_items' and last_tool_result and last_tool_result.get('items'):
-                items = last_tool_result.get('items')[:10]
-                
-                if len(items) >= 2:
-                    message = InteractiveListMessage(
-                        to=user_phone_number,
-                        header=InteractiveHeader(type="text", text="Items de compra"),
-                        body=InteractiveBody(text='Estos son los objetos que compraste recientemente.'),
-                        footer=InteractiveFooter(text="Selecciona un item para ver más detalles."),
-                        action=InteractiveAction(
-                            button="Ver items",
-                            sections=[
-                                InteractiveActionSection(
-                                    title="Items recientes",
-                                    rows=[
-                                        InteractiveActionSectionRow(
-                                            id=f"{item.get('productId', '')}",
-                                            title=f"Producto: {item.get('name', '')[:11]}..." if len(item.get('name', '')) > 14 else f"Producto: {item.get('name', '')}",
-                                            description=f"Estado: {item.get('status', '')} | Cantidad: {item.get('quantity', 0)} | Precio: ${item.get('priceAtPurchase', 0)}"[:72],
-                                        )
-                                        for item in items
-                                    ],
-                                )
-                            ],
-                        ),
-                    )
-                success, error_msg = send_interactive_list_message(message)
-                if not success: logger.error(f"Cannot send items list: {error_msg}")
-
-            elif last_tool_name in ['get_user_item', 'identify_available_actions_for_item'] and last_tool_result and last_tool_result.get('item'):
-                item = last_tool_result.get('item')
-                if item.get('image'):
-                    header = InteractiveHeader(type="image", image=MediaObject(link=item.get('image')))
-                else:
-                    header = InteractiveHeader(type="text", text="Detalles del item")
-                
-                button_id = f"add_feedback_{item.get('orderId')}_{item.get('productId')}" if item.get('orderId') else f"add_feedback_{item.get('productId')}"
-                message = InteractiveReplyButtonsMessage(
-                    to=user_phone_number,
-                    header=header,
-                    body=InteractiveBody(text='Este es el objeto al que haces referencia. ¿Qué deseas hacer con él?'),
-                    action=InteractiveAction(
-                        buttons=[
-                            InteractiveActionReplyButton(
-                                reply=InteractiveActionButtonReply(id=button_id, title="Agregar feedback")
-                            )
-                        ]
-                    )
-                )
-                success, error_msg = send_interactive_reply_buttons_message(message)
-                if not success: logger.error(f"Cannot send item reply buttons: {error_msg}")
-
-            elif last_tool_name == 'get_user_order' and last_tool_result and last_tool_result.get('order'):
-                order = last_tool_result.get('order')
-                # Format the order details
-                items_desc = "\n".join([f"- {i.get('quantity')}x {i.get('name')} (${i.get('priceAtPurchase')})" for i in order.get('items', [])])
-                order_details = (
-                    f"Orden: {order.get('orderId')}\n"
-                    f"Estado: {order.get('status')}\n"
-                    f"Fecha: {order.get('createdAt', '')[:10] if order.get('createdAt') else 'N/A'}\n"
-                    f"Total: ${order.get('totalAmount')}\n"
-                    f"Items:\n{items_desc}"
-                )
-                
-                message = InteractiveReplyButtonsMessage(
-                    to=user_phone_number,
-                    header=InteractiveHeader(type="text", text="Detalles de la orden"),
-                    body=InteractiveBody(text=order_details),
-                    action=InteractiveAction(
-                        buttons=[
-                            InteractiveActionReplyButton(
-                                reply=InteractiveActionButtonReply(id=f"cancel_order_{order.get('orderId')}", title="Cancelar orden")
-                            ),
-                            InteractiveActionReplyButton(
-                                reply=InteractiveActionButtonReply(id=f"remove_item_{order.get('orderId')}", title="Remover item")
-                            )
-                        ]
-                    )
-                )
-                success, error_msg = send_interactive_reply_buttons_message(message)
-                if not success: logger.error(f"Cannot send order reply buttons: {error_msg}")
-
-            else:
-                success, error_msg = send_text_message(TextMessage(to=user_phone_number, text=TextObject(body=text_response)))
-                if not success:
-                    logger.error(f"Cannot send text: {error_msg}")
+
+            if not render_tool_result(callback_context.state, user_phone_number, last_tool_name, last_tool_result):
+                send_text_message(TextMessage(to=user_phone_number, text=TextObject(body=text_response)))
 
             # Clear state after sending the message
             if last_tool_name:
@@ -211,9 +112,7 @@ def root_after_model_callback(callback_context: CallbackContext, llm_response: L
         if llm_response.content.parts[0].text:
             text_response = llm_response.content.parts[0].text
             logger.info(f"Response text: {text_response}")
-            success, error_msg = send_text_message(TextMessage(to=user_phone_number, text=TextObject(body=text_response)))
-            if not success:
-                logger.error(f"Cannot send text: {error_msg}")
+            send_text_message(TextMessage(to=user_phone_number, text=TextObject(body=text_response)))
 
         elif llm_response.content.parts[0].function_call:
              logger.info(f"Using tool: {llm_response.content.parts[0].function_call.name}")
@@ -226,6 +125,11 @@ def root_after_model_callback(callback_context: CallbackContext, llm_response: L
     return None
 
 # --- Tools ---
+# Service calls are async, so the function calls of one model turn run concurrently.
+# Read tools are memoized per user for a short TTL, mutations invalidate the orders they change.
+
+# The user's identity is templated into the instruction from state (see the prompt's
+# "Datos del Usuario"), so these are helpers for the tools, not tools of the model.
 
 def get_user_email(tool_context: ToolContext) -> str:
     """Gets the user email from the tool context."""
@@ -234,22 +138,14 @@ def get_user_email(tool_context: ToolContext) -> str:
 def get_user_phone_number(tool_context: ToolContext) -> str:
     return tool_context.state.get('user_phone_number')
 
-def get_user_name(tool_context: ToolContext) -> str:
-    return tool_context.state.get('user_name')
-
-def get_date() -> Dict[str, Any]:
+async def get_date() -> Dict[str, Any]:
     """Fetches the current date from the service."""
-    try:
-        response = requests.get(f'{BASE_URL}/date', headers=_get_headers())
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Error fetching date: {e}")
-        return {"error": str(e)}
-
-def get_user_orders(tool_context: ToolContext) -> Dict[str, Any]:
+    return await get_date_async()
+
+@cached_tool('orders')
+async def get_user_orders(tool_context: ToolContext) -> Dict[str, Any]:
     email = get_user_email(tool_context)
-    orders = get_orders(GetOrdersRequest(email=email))
+    orders = await get_orders_async(GetOrdersRequest(email=email, limit=WHATSAPP_LIST_MAX_ROWS))
     orders_dict = [order.model_dump() for order in orders] if orders else []
     tool_context.state['last_tool_name'] = 'get_user_orders'
     tool_context.state['last_tool_result'] = {"orders": orders_dict}
@@ -258,9 +154,23 @@ def get_user_orders(tool_context: ToolContext) -> Dict[str, Any]:
         return {"message": "No hemos encontrado órdenes de compra para tu usuario."}
     return {"orders": orders_dict}
 
-def get_user_items(tool_context: ToolContext) -> Dict[str, Any]:
+@cached_tool('summary', aggregate=True)
+async def get_user_orders_summary(tool_context: ToolContext) -> Dict[str, Any]:
+    """Gets the number of orders and the total amount per status for the user."""
     email = get_user_email(tool_context)
-    items = get_items(GetItemsRequest(email=email))
+    summary = await get_orders_summary_async(GetOrdersSummaryRequest(email=email))
+    summary_dict = summary.model_dump() if summary else None
+    tool_context.state['last_tool_name'] = 'get_user_orders_summary'
+    tool_context.state['last_tool_result'] = {"summary": summary_dict}
+
+    if not summary:
+        return {"message": "No fue posible obtener el resumen de tus órdenes de compra."}
+    return {"summary": summary_dict}
+
+@cached_tool('items')
+async def get_user_items(tool_context: ToolContext) -> Dict[str, Any]:
+    email = get_user_email(tool_context)
+    items = await get_items_async(GetItemsRequest(email=email, limit=WHATSAPP_LIST_MAX_ROWS))
     items_dict = [item.model_dump() for item in items] if items else []
     tool_context.state['last_tool_name'] = 'get_user_items'
     tool_context.state['last_tool_result'] = {"items": items_dict}
@@ -269,9 +179,10 @@ def get_user_items(tool_context: ToolContext) -> Dict[str, Any]:
         return {"message": "No se encontraron items recientes asociados a tu cuenta."}
     return {"items": items_dict}
 
-def identify_available_actions_for_item(product_id: str, tool_context: ToolContext) -> Dict[str, Any]:
+@cached_tool('item')
+async def identify_available_actions_for_item(product_id: str, tool_context: ToolContext) -> Dict[str, Any]:
     email = get_user_email(tool_context)
-    item = get_item(GetItemRequest(email=email, product_id=product_id))
+    item = await get_item_async(GetItemRequest(email=email, product_id=product_id))
     item_dict = item.model_dump() if item else None
     tool_context.state['last_tool_name'] = 'identify_available_actions_for_item'
     tool_context.state['last_tool_result'] = {"item": item_dict}
@@ -280,9 +191,10 @@ def identify_available_actions_for_item(product_id: str, tool_context: ToolConte
         return {"message": "No se encontraron detalles del item."}
     return {"item": item_dict}
 
-def get_user_item(product_id: str, tool_context: ToolContext) -> Dict[str, Any]:
+@cached_tool('item')
+async def get_user_item(product_id: str, tool_context: ToolContext) -> Dict[str, Any]:
     email = get_user_email(tool_context)
-    item = get_item(GetItemRequest(email=email, product_id=product_id))
+    item = await get_item_async(GetItemRequest(email=email, product_id=product_id))
     item_dict = item.model_dump() if item else None
     tool_context.state['last_tool_name'] = 'get_user_item'
     tool_context.state['last_tool_result'] = {"item": item_dict}
@@ -291,9 +203,10 @@ def get_user_item(product_id: str, tool_context: ToolContext) -> Dict[str, Any]:
         return {"message": "No se encontraron detalles del item."}
     return {"item": item_dict}
 
-def get_user_order(order_id: str, tool_context: ToolContext) -> Dict[str, Any]:
+@cached_tool('order')
+async def get_user_order(order_id: str, tool_context: ToolContext) -> Dict[str, Any]:
     email = get_user_email(tool_context)
-    order = get_order(GetOrderRequest(email=email, order_id=order_id))
+    order = await get_order_async(GetOrderRequest(email=email, order_id=order_id))
     order_dict = order.model_dump() if order else None
     tool_context.state['last_tool_name'] = 'get_user_order'
     tool_context.state['last_tool_result'] = {"order": order_dict}
@@ -302,27 +215,108 @@ def get_user_order(order_id: str, tool_context: ToolContext) -> Dict[str, Any]:
         return {"message": "No se encontraron detalles de la orden."}
     return {"order": order_dict}
 
-def cancel_user_order(order_id: str, tool_context: ToolContext) -> Dict[str, Any]:
+@invalidates_order
+async def cancel_user_order(order_id: str, tool_context: ToolContext) -> Dict[str, Any]:
     email = get_user_email(tool_context)
-    result = cancel_order(CancelOrderRequest(email=email, order_id=order_id))
+    result = await cancel_order_async(CancelOrderRequest(email=email, order_id=order_id))
     tool_context.state['last_tool_name'] = 'cancel_user_order'
     tool_context.state['last_tool_result'] = {"result": result}
     return result
 
-def add_user_feedback(order_id: str, feedback: str, tool_context: ToolContext) -> Dict[str, Any]:
+@invalidates_order
+async def add_user_feedback(order_id: str, feedback: str, tool_context: ToolContext) -> Dict[str, Any]:
     email = get_user_email(tool_context)
-    result = add_feedback(AddFeedbackRequest(email=email, order_id=order_id, feedback=feedback))
+    result = await add_feedback_async(AddFeedbackRequest(email=email, order_id=order_id, feedback=feedback))
     tool_context.state['last_tool_name'] = 'add_user_feedback'
     tool_context.state['last_tool_result'] = {"result": result}
     return result
 
-def remove_user_item(order_id: str, product_id: str, tool_context: ToolContext) -> Dict[str, Any]:
+@invalidates_order
+async def remove_user_item(order_id: str, product_id: str, tool_context: ToolContext) -> Dict[str, Any]:
     email = get_user_email(tool_context)
-    result = remove_item(RemoveItemRequest(email=email, order_id=order_id, product_id=product_id))
+    result = await remove_item_async(RemoveItemRequest(email=email, order_id=order_id, product_id=product_id))
     tool_context.state['last_tool_name'] = 'remove_user_item'
     tool_context.state['last_tool_result'] = {"result": result}
     return result
 
+# --- Fast path ---
+# Taps on the buttons and list rows rendered by render.py, handled without the models.
+# Each handler queues the WhatsApp messages and returns the text recorded as the agent's reply.
+# Like the model (prompt rule 6), cancellations and removals run only once the user confirms them.
+
+def send_text(user_phone_number: str, text: str) -> str:
+    send_text_message(TextMessage(to=user_phone_number, text=TextObject(body=text)))
+    return text
+
+async def fast_path_order(callback_context: CallbackContext, user_phone_number: str, args: Dict[str, str]) -> str:
+    result = await get_user_order(args['order_id'], callback_context)
+    if render_tool_result(callback_context.state, user_phone_number, 'get_user_order', result):
+        return f"Estos son los detalles de la orden {args['order_id']}."
+    return send_text(user_phone_number, result.get('message'))
+
+async def fast_path_item(callback_context: CallbackContext, user_phone_number: str, args: Dict[str, str]) -> str:
+    result = await get_user_item(args['product_id'], callback_context)
+    if render_tool_result(callback_context.state, user_phone_number, 'get_user_item', result):
+        return f"Estos son los detalles del producto {args['product_id']}."
+    return send_text(user_phone_number, result.get('message'))
+
+async def fast_path_cancel_order(callback_context: CallbackContext, user_phone_number: str, args: Dict[str, str]) -> str:
+    text = f"¿Confirmas que deseas cancelar la orden {args['order_id']}? Esta acción no se puede deshacer."
+    send_confirmation(callback_context.state, user_phone_number, text, f"{CONFIRM_CANCEL_ORDER_PREFIX}{args['order_id']}")
+    return text
+
+async def fast_path_cancel_order_confirmed(callback_context: CallbackContext, user_phone_number: str, args: Dict[str, str]) -> str:
+    if not take_confirmation(callback_context.state, f"{CONFIRM_CANCEL_ORDER_PREFIX}{args['order_id']}"):
+        # An old or expired confirmation: ask again
+        return await fast_path_cancel_order(callback_context, user_phone_number, args)
+    result = await cancel_user_order(args['order_id'], callback_context)
+    if result.get('error'):
+        return send_text(user_phone_number, f"No fue posible cancelar la orden {args['order_id']}: {result['error']}")
+    return send_text(user_phone_number, f"La orden {args['order_id']} fue cancelada.")
+
+async def fast_path_remove_item_selection(callback_context: CallbackContext, user_phone_number: str, args: Dict[str, str]) -> str:
+    result = await get_user_order(args['order_id'], callback_context)
+    order = result.get('order')
+    if not order or not order.get('items'):
+        return send_text(user_phone_number, f"No se encontraron items en la orden {args['order_id']}.")
+    send_remove_item_list(user_phone_number, order)
+    return f"Elige el item que deseas remover de la orden {args['order_id']}."
+
+async def fast_path_remove_item(callback_context: CallbackContext, user_phone_number: str, args: Dict[str, str]) -> str:
+    text = f"¿Confirmas que deseas remover el producto {args['product_id']} de la orden {args['order_id']}?"
+    send_confirmation(callback_context.state, user_phone_number, text, f"{CONFIRM_REMOVE_ITEM_PREFIX}{args['order_id']}_{args['product_id']}")
+    return text
+
+async def fast_path_remove_item_confirmed(callback_context: CallbackContext, user_phone_number: str, args: Dict[str, str]) -> str:
+    if not take_confirmation(callback_context.state, f"{CONFIRM_REMOVE_ITEM_PREFIX}{args['order_id']}_{args['product_id']}"):
+        # An old or expired confirmation: ask again
+        return await fast_path_remove_item(callback_context, user_phone_number, args)
+    result = await remove_user_item(args['order_id'], args['product_id'], callback_context)
+    if result.get('error'):
+        return send_text(user_phone_number, f"No fue posible remover el producto {args['product_id']} de la orden {args['order_id']}: {result['error']}")
+    return send_text(user_phone_number, f"El producto {args['product_id']} fue removido de la orden {args['order_id']}.")
+
+async def fast_path_dismiss(callback_context: CallbackContext, user_phone_number: str, args: Dict[str, str]) -> str:
+    callback_context.state[PENDING_CONFIRMATION_KEY] = None
+    return send_text(user_phone_number, "Entendido, no se realizó ningún cambio.")
+
+async def fast_path_add_feedback(callback_context: CallbackContext, user_phone_number: str, args: Dict[str, str]) -> str:
+    # The feedback text comes in the next message, which the model handles with this reply as context
+    order = f" de la orden {args['order_id']}" if args.get('order_id') else ""
+    return send_text(user_phone_number, f"Cuéntanos tu feedback sobre el producto {args['product_id']}{order}. Escríbelo en tu siguiente mensaje.")
+
+fast_path_router = FastPathRouter({
+    'order': fast_path_order,
+    'item': fast_path_item,
+    'cancel_order': fast_path_cancel_order,
+    'cancel_order_confirmed': fast_path_cancel_order_confirmed,
+    'remove_item_selection': fast_path_remove_item_selection,
+    'remove_item': fast_path_remove_item,
+    'remove_item_confirmed': fast_path_remove_item_confirmed,
+    'dismiss': fast_path_dismiss,
+    'add_feedback': fast_path_add_feedback,
+})
+
 # Agents
 
 ## Purchase Orders Agent
@@ -342,10 +336,8 @@ purchase_orders_agent = LlmAgent(
     instruction=purchase_orders_agent_prompt,
     tools=[
         get_date,
-        get_user_phone_number,
-        get_user_email,
-        get_user_name,
         get_user_orders,
+        get_user_orders_summary,
         get_user_items,
         get_user_item,
         get_user_order,
@@ -355,6 +347,7 @@ purchase_orders_agent = LlmAgent(
         identify_available_actions_for_item
     ],
     before_agent_callback=before_agent_modifier,
+    after_agent_callback=after_agent_modifier,
     before_tool_callback=simple_before_tool_modifier,
     after_model_callback=po_after_model_callback
 )
@@ -376,5 +369,6 @@ root_agent = LlmAgent(
     instruction=steering_agent_prompt,
     sub_agents=[purchase_orders_agent],
     before_agent_callback=before_agent_modifier,
+    after_agent_callback=after_agent_modifier,
     after_model_callback=root_after_model_callback
 )
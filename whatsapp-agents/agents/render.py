@@ -0,0 +1,219 @@
+import logging
+import os
+import time
+
+from typing import Dict, Any, List, Optional
+
+from .services.outbox import DeliveryHandle
+from .services.whatsapp import send_interactive_list_message, InteractiveListMessage, InteractiveHeader, InteractiveBody, InteractiveFooter, InteractiveAction, InteractiveActionSection, InteractiveActionSectionRow, MediaObject, send_interactive_reply_buttons_message, InteractiveReplyButtonsMessage, InteractiveActionButtonReply, InteractiveActionReplyButton
+
+# Setup
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+logging.basicConfig(level=LOG_LEVEL)
+logger = logging.getLogger(__name__)
+
+# WhatsApp interactive lists can render at most 10 rows
+WHATSAPP_LIST_MAX_ROWS = 10
+
+# Reply ids of the buttons rendered below. The fast-path router parses them back.
+CANCEL_ORDER_PREFIX = 'cancel_order_'
+REMOVE_ITEM_PREFIX = 'remove_item_'
+ADD_FEEDBACK_PREFIX = 'add_feedback_'
+# Destructive actions run only from the confirmation asked after the tap on their button
+CONFIRM_CANCEL_ORDER_PREFIX = 'confirm_cancel_'
+CONFIRM_REMOVE_ITEM_PREFIX = 'confirm_remove_'
+DISMISS_REPLY_ID = 'dismiss_action'
+
+# State key with the ids of the rows of the last list sent, and what each row is ('order' or 'item')
+REPLY_ROWS_KEY = 'reply_rows'
+
+# State key with the last confirmation asked: {'id': reply id of its confirm button, 'at': epoch seconds}
+PENDING_CONFIRMATION_KEY = 'pending_confirmation'
+
+
+def item_row_title(item: Dict[str, Any]) -> str:
+    name = item.get('name', '')
+    return f"Producto: {name[:11]}..." if len(name) > 14 else f"Producto: {name}"
+
+
+def item_row_description(item: Dict[str, Any]) -> str:
+    return f"Estado: {item.get('status', '')} | Cantidad: {item.get('quantity', 0)} | Precio: ${item.get('priceAtPurchase', 0)}"[:72]
+
+
+def send_orders_list(state, user_phone_number: str, orders: List[Dict[str, Any]]) -> DeliveryHandle:
+    message = InteractiveListMessage(
+        to=user_phone_number,
+        header=InteractiveHeader(type="text", text="Órdenes de compra"),
+        body=InteractiveBody(text='Estas son tus órdenes de compra recientes.'),
+        footer=InteractiveFooter(text="Estas son tus órdenes de compra recientes."),
+        action=InteractiveAction(
+            button="Ver órdenes",
+            sections=[
+                InteractiveActionSection(
+                    title="Órdenes recientes",
+                    rows=[
+                        InteractiveActionSectionRow(
+                            id=order.get('orderId', ''),
+                            title=f"Orden: {order.get('orderId', '')}",
+                            description=f"Estado: {order.get('status', '')} | Fecha: {order.get('createdAt', '')[:10] if order.get('createdAt') else 'N/A'} | Items: {order.get('itemCount', 0)} | Total: ${order.get('totalAmount', 0)}",
+                        )
+                        for order in orders
+                    ],
+                )
+            ],
+        ),
+    )
+    state[REPLY_ROWS_KEY] = {order.get('orderId', ''): 'order' for order in orders}
+    return send_interactive_list_message(message)
+
+
+def send_items_list(state, user_phone_number: str, items: List[Dict[str, Any]]) -> DeliveryHandle:
+    message = InteractiveListMessage(
+        to=user_phone_number,
+        header=InteractiveHeader(type="text", text="Items de compra"),
+        body=InteractiveBody(text='Estos son los objetos que compraste recientemente.'),
+        footer=InteractiveFooter(text="Selecciona un item para ver más detalles."),
+        action=InteractiveAction(
+            button="Ver items",
+            sections=[
+                InteractiveActionSection(
+                    title="Items recientes",
+                    rows=[
+                        InteractiveActionSectionRow(
+                            id=f"{item.get('productId', '')}",
+                            title=item_row_title(item),
+                            description=item_row_description(item),
+                        )
+                        for item in items
+                    ],
+                )
+            ],
+        ),
+    )
+    state[REPLY_ROWS_KEY] = {f"{item.get('productId', '')}": 'item' for item in items}
+    return send_interactive_list_message(message)
+
+
+def send_item_details(user_phone_number: str, item: Dict[str, Any]) -> DeliveryHandle:
+    if item.get('image'):
+        header = InteractiveHeader(type="image", image=MediaObject(link=item.get('image')))
+    else:
+        header = InteractiveHeader(type="text", text="Detalles del item")
+
+    button_id = f"{ADD_FEEDBACK_PREFIX}{item.get('orderId')}_{item.get('productId')}" if item.get('orderId') else f"{ADD_FEEDBACK_PREFIX}{item.get('productId')}"
+    message = InteractiveReplyButtonsMessage(
+        to=user_phone_number,
+        header=header,
+        body=InteractiveBody(text='Este es el objeto al que haces referencia. ¿Qué deseas hacer con él?'),
+        action=InteractiveAction(
+            buttons=[
+                InteractiveActionReplyButton(
+                    reply=InteractiveActionButtonReply(id=button_id, title="Agregar feedback")
+                )
+            ]
+        )
+    )
+    return send_interactive_reply_buttons_message(message)
+
+
+def send_order_details(user_phone_number: str, order: Dict[str, Any]) -> DeliveryHandle:
+    items_desc = "\n".join([f"- {i.get('quantity')}x {i.get('name')} (${i.get('priceAtPurchase')})" for i in order.get('items', [])])
+    order_details = (
+        f"Orden: {order.get('orderId')}\n"
+        f"Estado: {order.get('status')}\n"
+        f"Fecha: {order.get('createdAt', '')[:10] if order.get('createdAt') else 'N/A'}\n"
+        f"Total: ${order.get('totalAmount')}\n"
+        f"Items:\n{items_desc}"
+    )
+
+    message = InteractiveReplyButtonsMessage(
+        to=user_phone_number,
+        header=InteractiveHeader(type="text", text="Detalles de la orden"),
+        body=InteractiveBody(text=order_details),
+        action=InteractiveAction(
+            buttons=[
+                InteractiveActionReplyButton(
+                    reply=InteractiveActionButtonReply(id=f"{CANCEL_ORDER_PREFIX}{order.get('orderId')}", title="Cancelar orden")
+                ),
+                InteractiveActionReplyButton(
+                    reply=InteractiveActionButtonReply(id=f"{REMOVE_ITEM_PREFIX}{order.get('orderId')}", title="Remover item")
+                )
+            ]
+        )
+    )
+    return send_interactive_reply_buttons_message(message)
+
+
+def send_remove_item_list(user_phone_number: str, order: Dict[str, Any]) -> DeliveryHandle:
+    """Lists the items of an order; each row id removes its item (remove_item_<orderId>_<productId>)."""
+    items = order.get('items', [])[:WHATSAPP_LIST_MAX_ROWS]
+    message = InteractiveListMessage(
+        to=user_phone_number,
+        header=InteractiveHeader(type="text", text="Remover item"),
+        body=InteractiveBody(text=f"¿Qué item deseas remover de la orden {order.get('orderId')}?"),
+        footer=InteractiveFooter(text="Selecciona el item a remover."),
+        action=InteractiveAction(
+            button="Ver items",
+            sections=[
+                InteractiveActionSection(
+                    title="Items de la orden",
+                    rows=[
+                        InteractiveActionSectionRow(
+                            id=f"{REMOVE_ITEM_PREFIX}{order.get('orderId')}_{item.get('productId', '')}",
+                            title=item_row_title(item),
+                            description=item_row_description(item),
+                        )
+                        for item in items
+                    ],
+                )
+            ],
+        ),
+    )
+    return send_interactive_list_message(message)
+
+
+def send_confirmation(state, user_phone_number: str, text: str, confirm_id: str) -> DeliveryHandle:
+    """Asks to confirm a destructive action. Only the latest confirmation asked can be confirmed."""
+    message = InteractiveReplyButtonsMessage(
+        to=user_phone_number,
+        body=InteractiveBody(text=text),
+        action=InteractiveAction(
+            buttons=[
+                InteractiveActionReplyButton(
+                    reply=InteractiveActionButtonReply(id=confirm_id, title="Sí, confirmar")
+                ),
+                InteractiveActionReplyButton(
+                    reply=InteractiveActionButtonReply(id=DISMISS_REPLY_ID, title="No, conservar")
+                )
+            ]
+        )
+    )
+    state[PENDING_CONFIRMATION_KEY] = {'id': confirm_id, 'at': time.time()}
+    return send_interactive_reply_buttons_message(message)
+
+
+def render_tool_result(state, user_phone_number: str, tool_name: Optional[str], tool_result: Optional[Dict[str, Any]]) -> bool:
+    """
+    Queues the WhatsApp rendering of a tool result (lists, reply buttons).
+    Returns False when the result has none, so the caller sends plain text instead.
+    """
+    if not tool_result:
+        return False
+
+    if tool_name == 'get_user_orders' and tool_result.get('orders'):
+        send_orders_list(state, user_phone_number, tool_result.get('orders'))
+        return True
+
+    if tool_name == 'get_user_items' and len(tool_result.get('items') or []) >= 2:
+        send_items_list(state, user_phone_number, tool_result.get('items')[:WHATSAPP_LIST_MAX_ROWS])
+        return True
+
+    if tool_name in ['get_user_item', 'identify_available_actions_for_item'] and tool_result.get('item'):
+        send_item_details(user_phone_number, tool_result.get('item'))
+        return True
+
+    if tool_name == 'get_user_order' and tool_result.get('order'):
+        send_order_details(user_phone_number, tool_result.get('order'))
+        return True
+
+    return False
@@ -0,0 +1,205 @@
+import logging
+import os
+import re
+import threading
+import time
+
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from .render import (
+    ADD_FEEDBACK_PREFIX, CANCEL_ORDER_PREFIX, CONFIRM_CANCEL_ORDER_PREFIX, CONFIRM_REMOVE_ITEM_PREFIX, DISMISS_REPLY_ID,
+    PENDING_CONFIRMATION_KEY, REMOVE_ITEM_PREFIX, REPLY_ROWS_KEY,
+)
+
+# Setup
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+logging.basicConfig(level=LOG_LEVEL)
+logger = logging.getLogger(__name__)
+
+# Taps on the buttons and list rows we render skip the model when enabled
+FAST_PATH_ENABLED = os.environ.get('FAST_PATH_ENABLED', 'TRUE').upper() == 'TRUE'
+# Duration assumed for a turn through the models until one has been measured
+FAST_PATH_MODEL_TURN_SECONDS = float(os.environ.get('FAST_PATH_MODEL_TURN_SECONDS', 4))
+# Weight of the latest measured model turn in the running average
+MODEL_TURN_EWMA_ALPHA = 0.1
+# A confirmation of a destructive action is accepted for this long after it was asked
+CONFIRMATION_TTL_SECONDS = float(os.environ.get('CONFIRMATION_TTL_SECONDS', 300))
+
+# Order and product ids are alphanumeric, free text never matches
+ID_PATTERN = re.compile(r'[A-Za-z0-9-]+')
+# State key holding the invocation and start of the current turn, not persisted with the session
+TURN_KEY = 'temp:fast_path_turn'
+
+Route = Tuple[str, Dict[str, str]]
+Handler = Callable[[Any, str, Dict[str, str]], Awaitable[str]]
+
+
+def _ids(text: str, count: int) -> Optional[list]:
+    parts = text.split('_', count - 1)
+    if len(parts) == count and all(ID_PATTERN.fullmatch(part) for part in parts):
+        return parts
+    return None
+
+
+def parse_reply_id(text: str, reply_rows: Optional[Dict[str, str]] = None) -> Optional[Route]:
+    """
+    Parses the id of a tapped reply button or list row into (route, arguments).
+    Returns None for anything else, which goes through the models as before.
+
+        cancel_order_<orderId>                -> cancel_order (asks for confirmation)
+        confirm_cancel_<orderId>              -> cancel_order_confirmed
+        remove_item_<orderId>                 -> remove_item_selection
+        remove_item_<orderId>_<productId>     -> remove_item (asks for confirmation)
+        confirm_remove_<orderId>_<productId>  -> remove_item_confirmed
+        dismiss_action                        -> dismiss
+        add_feedback_<orderId>_<productId>    -> add_feedback
+        add_feedback_<productId>              -> add_feedback
+        <orderId> / <productId> list rows     -> order / item
+    """
+    text = (text or '').strip()
+    if text == DISMISS_REPLY_ID:
+        return 'dismiss', {}
+    if text.startswith(CONFIRM_CANCEL_ORDER_PREFIX):
+        ids = _ids(text[len(CONFIRM_CANCEL_ORDER_PREFIX):], 1)
+        return ('cancel_order_confirmed', {'order_id': ids[0]}) if ids else None
+    if text.startswith(CONFIRM_REMOVE_ITEM_PREFIX):
+        ids = _ids(text[len(CONFIRM_REMOVE_ITEM_PREFIX):], 2)
+        return ('remove_item_confirmed', {'order_id': ids[0], 'product_id': ids[1]}) if ids else None
+    if text.startswith(CANCEL_ORDER_PREFIX):
+        ids = _ids(text[len(CANCEL_ORDER_PREFIX):], 1)
+        return ('cancel_order', {'order_id': ids[0]}) if ids else None
+    if text.startswith(REMOVE_ITEM_PREFIX):
+        rest = text[len(REMOVE_ITEM_PREFIX):]
+        ids = _ids(rest, 2)
+        if ids:
+            return 'remove_item', {'order_id': ids[0], 'product_id': ids[1]}
+        ids = _ids(rest, 1)
+        return ('remove_item_selection', {'order_id': ids[0]}) if ids else None
+    if text.startswith(ADD_FEEDBACK_PREFIX):
+        rest = text[len(ADD_FEEDBACK_PREFIX):]
+        ids = _ids(rest, 2)
+        if ids:
+            return 'add_feedback', {'order_id': ids[0], 'product_id': ids[1]}
+        ids = _ids(rest, 1)
+        return ('add_feedback', {'product_id': ids[0]}) if ids else None
+
+    kind = (reply_rows or {}).get(text)
+    if kind == 'order':
+        return 'order', {'order_id': text}
+    if kind == 'item':
+        return 'item', {'product_id': text}
+    return None
+
+
+def take_confirmation(state, confirm_id: str) -> bool:
+    """
+    True when `confirm_id` answers the last confirmation asked, within
+    CONFIRMATION_TTL_SECONDS. Consumes it, so a confirmation runs its action once
+    and taps on older confirmation messages are refused.
+    """
+    pending = state.get(PENDING_CONFIRMATION_KEY)
+    if not pending or pending.get('id') != confirm_id or time.time() - pending.get('at', 0) > CONFIRMATION_TTL_SECONDS:
+        return False
+    state[PENDING_CONFIRMATION_KEY] = None
+    return True
+
+
+class FastPathStats:
+    """
+    Hit rate and latency saved by the fast path. The saving of a hit is the
+    running average of measured model turns minus the time the hit took.
+    """
+    def __init__(self, model_turn_seconds: float = FAST_PATH_MODEL_TURN_SECONDS):
+        self._lock = threading.Lock()
+        self._model_turn_seconds = model_turn_seconds
+        self._turns = 0
+        self._model_turns = 0
+        self._hits: Dict[str, int] = {}
+        self._fast_path_seconds = 0.0
+        self._saved_seconds = 0.0
+
+    def observe_model_turn(self, seconds: float):
+        with self._lock:
+            self._model_turns += 1
+            self._model_turn_seconds += MODEL_TURN_EWMA_ALPHA * (seconds - self._model_turn_seconds)
+
+    def observe_miss(self):
+        with self._lock:
+            self._turns += 1
+
+    def observe_hit(self, route: str, seconds: float) -> float:
+        """Records a hit and returns the latency it saved."""
+        with self._lock:
+            self._turns += 1
+            self._hits[route] = self._hits.get(route, 0) + 1
+            saved = max(self._model_turn_seconds - seconds, 0.0)
+            self._fast_path_seconds += seconds
+            self._saved_seconds += saved
+            return saved
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits = sum(self._hits.values())
+            return {
+                'turns': self._turns,
+                'model_turns': self._model_turns,
+                'hits': hits,
+                'hit_rate': hits / self._turns if self._turns else 0.0,
+                'hits_by_route': dict(self._hits),
+                'model_turn_seconds': self._model_turn_seconds,
+                'fast_path_seconds_avg': self._fast_path_seconds / hits if hits else 0.0,
+                'saved_seconds_total': self._saved_seconds,
+            }
+
+
+class FastPathRouter:
+    """
+    Before-agent interceptor for taps on the buttons and list rows we render.
+    Their ids are structured (see parse_reply_id), so the matching tool call and
+    rendering run directly, skipping the steering and purchase orders models.
+    Handlers send the WhatsApp messages and return the text recorded as the
+    agent's reply, which keeps the session history readable for later turns.
+    """
+    def __init__(self, handlers: Dict[str, Handler], stats: Optional[FastPathStats] = None):
+        self._handlers = handlers
+        self.stats = stats or FastPathStats()
+
+    async def route(self, callback_context, user_phone_number: str) -> Optional[str]:
+        """
+        Handles the turn when its message is a reply id. Returns the reply text,
+        or None on a miss. Every agent of the tree calls it, since later turns
+        start at the last active sub-agent; within a turn only the first call routes.
+        """
+        turn = callback_context.state.get(TURN_KEY)
+        if turn and turn.get('invocation_id') == callback_context.invocation_id:
+            return None
+
+        started = time.perf_counter()
+        content = callback_context.user_content
+        text = content.parts[0].text if content and content.parts else None
+        route = parse_reply_id(text, callback_context.state.get(REPLY_ROWS_KEY)) if FAST_PATH_ENABLED else None
+        handler = self._handlers.get(route[0]) if route else None
+        if handler is None:
+            self.stats.observe_miss()
+            callback_context.state[TURN_KEY] = {'invocation_id': callback_context.invocation_id, 'started': started}
+            return None
+
+        name, arguments = route
+        reply = await handler(callback_context, user_phone_number, arguments)
+        # Results are rendered already, the next model turn must not render them again
+        callback_context.state['last_tool_name'] = None
+        callback_context.state['last_tool_result'] = None
+
+        elapsed = time.perf_counter() - started
+        saved = self.stats.observe_hit(name, elapsed)
+        stats = self.stats.stats()
+        logger.info(f"Fast path {name} in {elapsed * 1000:.0f} ms, saved ~{saved:.2f}s | "
+                    f"hit rate: {stats['hit_rate']:.1%} | saved total: {stats['saved_seconds_total']:.1f}s")
+        return reply
+
+    def finish_model_turn(self, callback_context):
+        """Measures a turn that went through the models, the baseline of the latency saved."""
+        turn = callback_context.state.get(TURN_KEY)
+        if turn and turn.get('invocation_id') == callback_context.invocation_id and not turn.get('finished'):
+            callback_context.state[TURN_KEY] = {**turn, 'finished': True}
+            self.stats.observe_model_turn(time.perf_counter() - turn['started'])
@@ -0,0 +1,154 @@
+import asyncio
+import logging
+import os
+import threading
+from typing import Dict
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Setup
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+logging.basicConfig(level=LOG_LEVEL)
+logger = logging.getLogger(__name__)
+
+# Configuration
+HTTP_CONNECT_TIMEOUT_SECONDS = float(os.environ.get('HTTP_CONNECT_TIMEOUT_SECONDS', 3.05))
+HTTP_READ_TIMEOUT_SECONDS = float(os.environ.get('HTTP_READ_TIMEOUT_SECONDS', 15))
+# Retries of idempotent requests (GET) on connection errors and 502/503/504
+HTTP_MAX_RETRIES = int(os.environ.get('HTTP_MAX_RETRIES', 2))
+# The async clients negotiate HTTP/2 over TLS, so concurrent tool calls share one connection.
+# Needs the h2 package (httpx[http2]); without it the clients fall back to HTTP/1.1.
+HTTP2_ENABLED = os.environ.get('HTTP2_ENABLED', 'TRUE').upper() == 'TRUE'
+
+# Connections kept alive per service. Size them to the number of tool calls
+# that can hit the service at once.
+POOL_SIZES = {
+    'purchase-orders': int(os.environ.get('PURCHASE_ORDERS_POOL_SIZE', 20)),
+    'users': int(os.environ.get('USER_SERVICE_POOL_SIZE', 10)),
+    # One connection per outbox worker
+    'whatsapp': int(os.environ.get('OUTBOX_WORKERS', 8)),
+}
+DEFAULT_POOL_SIZE = 10
+
+TIMEOUT = (HTTP_CONNECT_TIMEOUT_SECONDS, HTTP_READ_TIMEOUT_SECONDS)
+
+_sessions: Dict[str, requests.Session] = {}
+# service -> event loop -> client. Connections and pool locks belong to the loop that
+# opened them, and Agent Engine runs each query on a new loop (asyncio.run), so a
+# client is only reused on its own loop and closed when that loop shuts down.
+_async_clients: Dict[str, Dict[asyncio.AbstractEventLoop, httpx.AsyncClient]] = {}
+# event loop -> the async generator that closes its clients, see _close_on_shutdown
+_shutdown_hooks: Dict[asyncio.AbstractEventLoop, object] = {}
+# Reentrant: closing the hook of a closed loop runs its cleanup with the lock held
+_lock = threading.RLock()
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        logger.warning("HTTP2_ENABLED but the h2 package is not installed, the async clients use HTTP/1.1.")
+        return False
+
+
+_http2 = None
+
+
+def _build_session(pool_size: int) -> requests.Session:
+    retry = Retry(
+        total=HTTP_MAX_RETRIES,
+        backoff_factor=0.1,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset({'GET'}),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_session(service: str) -> requests.Session:
+    """
+    Returns the process-wide keep-alive session of a service, so tool calls reuse
+    open TLS connections instead of handshaking with Cloud Run on every request.
+    Always pass `timeout=TIMEOUT` with requests made through it.
+    """
+    session = _sessions.get(service)
+    if session is None:
+        with _lock:
+            session = _sessions.get(service)
+            if session is None:
+                session = _sessions[service] = _build_session(POOL_SIZES.get(service, DEFAULT_POOL_SIZE))
+    return session
+
+
+async def _close_on_shutdown(loop: asyncio.AbstractEventLoop):
+    """
+    Parked on its first yield for the lifetime of the loop. asyncio.run closes the
+    async generators still open when the loop shuts down (loop.shutdown_asyncgens),
+    which runs the finally block on the loop, while it can still close connections.
+    """
+    try:
+        yield
+    finally:
+        with _lock:
+            _shutdown_hooks.pop(loop, None)
+            clients = [loop_clients.pop(loop) for loop_clients in _async_clients.values() if loop in loop_clients]
+        if not loop.is_closed():
+            for client in clients:
+                await client.aclose()
+
+
+def _watch_loop_shutdown(loop: asyncio.AbstractEventLoop):
+    """Starts _close_on_shutdown on the running loop. Called with _lock held."""
+    # Loops closed without shutting down their async generators leave their clients
+    # behind; their connections can no longer be closed gracefully, just dropped
+    for closed in [hook for closed, hook in _shutdown_hooks.items() if closed.is_closed()]:
+        try:
+            closed.aclose().send(None)
+        except StopIteration:
+            pass
+    hook = _close_on_shutdown(loop)
+    try:
+        # Runs it up to its yield, which registers it with the loop
+        hook.asend(None).send(None)
+    except StopIteration:
+        pass
+    _shutdown_hooks[loop] = hook
+
+
+def get_async_client(service: str) -> httpx.AsyncClient:
+    """
+    Returns the async client of a service for the running event loop, for tools
+    running on the ADK event loop. Must be called from a coroutine, once per call
+    rather than kept: calls on the same loop share its connections. Timeouts and
+    pool limits match the sync sessions; connection failures are retried since
+    the request never reached the service.
+    """
+    global _http2
+    loop = asyncio.get_running_loop()
+    with _lock:
+        clients = _async_clients.setdefault(service, {})
+        client = clients.get(loop)
+        if client is None:
+            if loop not in _shutdown_hooks:
+                _watch_loop_shutdown(loop)
+            if _http2 is None:
+                _http2 = HTTP2_ENABLED and _http2_available()
+            pool_size = POOL_SIZES.get(service, DEFAULT_POOL_SIZE)
+            transport = httpx.AsyncHTTPTransport(
+                http2=_http2,
+                limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+                retries=HTTP_MAX_RETRIES,
+            )
+            client = clients[loop] = httpx.AsyncClient(
+                transport=transport,
+                timeout=httpx.Timeout(HTTP_READ_TIMEOUT_SECONDS, connect=HTTP_CONNECT_TIMEOUT_SECONDS),
+            )
+    return client
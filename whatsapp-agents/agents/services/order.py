@@ -1,9 +1,11 @@
 import json
 import logging
 import os
+import httpx
 import requests
 from typing import List, Dict, Any
-from .utils import get_headers
+from .utils import get_headers, get_headers_async
+from .http_client import TIMEOUT, get_async_client, get_session
 from pydantic import BaseModel, Field, field_validator
 from typing import Optional, Literal
 
@@ -15,6 +17,11 @@ logger = logging.getLogger(__name__)
 # Configuration
 PURCHASE_ORDERS_SERVICE_URL = os.environ.get("PURCHASE_ORDERS_SERVICE_URL")
 
+# Keep-alive connection pool shared by every call to the service
+session = get_session('purchase-orders')
+# Coroutines (the agent tools) use get_async_client('purchase-orders'): one client per
+# event loop, concurrent calls on the loop share its connections
+
 # Models
 class OrderItem(BaseModel):
     orderId: Optional[str] = None
@@ -44,13 +51,31 @@ class Order(BaseModel):
     def set_items_to_empty_list_if_none(cls, v):
         return v or []
 
+class StatusSummary(BaseModel):
+    count: int = 0
+    totalAmount: float = 0.0
+
+class OrdersSummary(BaseModel):
+    email: Optional[str] = None
+    totalOrders: int = 0
+    totalAmount: float = 0.0
+    byStatus: Dict[str, StatusSummary] = {}
+
 class GetOrdersRequest(BaseModel):
     email: str = Field(..., description="Email of the user")
     status: Optional[Literal['creada', 'procesando', 'enviada', 'entregada', 'cancelada']] = Field(None, description="Filter orders by status")
+    limit: Optional[int] = Field(None, description="Maximum number of orders to return, newest first")
+    cursor: Optional[str] = Field(None, description="Cursor returned by the previous page")
+
+class GetOrdersSummaryRequest(BaseModel):
+    email: str = Field(..., description="Email of the user")
 
 class GetItemsRequest(BaseModel):
     email: str = Field(..., description="Email of the user")
     order_id: Optional[str] = Field(None, description="Filter items by order ID")
+    status: Optional[Literal['creada', 'procesando', 'enviada', 'entregada', 'cancelada']] = Field(None, description="Filter items by item status")
+    since: Optional[str] = Field(None, description="Only items of orders created on or after this ISO date")
+    limit: Optional[int] = Field(None, description="Maximum number of items to return, newest first")
 
 class RemoveItemRequest(BaseModel):
     email: str = Field(..., description="Email of the user")
@@ -74,16 +99,41 @@ class GetOrderRequest(BaseModel):
     email: str = Field(..., description="Email of the user")
     order_id: str = Field(..., description="ID of the order")
 
+class BatchOperation(BaseModel):
+    op: Literal['getUser', 'getOrders', 'getOrder', 'getOrdersSummary', 'getItems', 'getItem']
+    params: Dict[str, Any] = Field(default_factory=dict, description="Same parameters as the matching GET endpoint")
+    id: Optional[str] = Field(None, description="Identifier echoed back in the result")
+
+class BatchResult(BaseModel):
+    id: Optional[str] = None
+    op: Optional[str] = None
+    status: int
+    body: Any = None
+    nextCursor: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status == 200
+
 # Methods
 
-def get_orders(request: GetOrdersRequest) -> List[Order]:
-    """Fetches orders for a given email, optionally filtered by status."""
+def _orders_params(request: GetOrdersRequest) -> Dict[str, Any]:
     params = {'email': request.email}
     if request.status:
         params['status'] = request.status
-    
+    if request.limit:
+        params['limit'] = request.limit
+    if request.cursor:
+        params['cursor'] = request.cursor
+    return params
+
+
+def get_orders(request: GetOrdersRequest) -> List[Order]:
+    """Fetches orders for a given email, optionally filtered by status."""
+    params = _orders_params(request)
+
     try:
-        response = requests.get(f'{PURCHASE_ORDERS_SERVICE_URL}/orders', params=params, headers=get_headers(PURCHASE_ORDERS_SERVICE_URL))
+        response = session.get(f'{PURCHASE_ORDERS_SERVICE_URL}/orders', params=params, headers=get_headers(PURCHASE_ORDERS_SERVICE_URL), timeout=TIMEOUT)
         response.raise_for_status()
         return [Order(**order) for order in response.json()]
     except requests.exceptions.RequestException as e:
@@ -91,11 +141,23 @@ def get_orders(request: GetOrdersRequest) -> List[Order]:
         return []
 
 
+def get_orders_summary(request: GetOrdersSummaryRequest) -> Optional[OrdersSummary]:
+    """Fetches order counts and totals per status for a given email."""
+    params = {'email': request.email}
+    try:
+        response = session.get(f'{PURCHASE_ORDERS_SERVICE_URL}/orders/summary', params=params, headers=get_headers(PURCHASE_ORDERS_SERVICE_URL), timeout=TIMEOUT)
+        response.raise_for_status()
+        return OrdersSummary(**response.json())
+    except requests.exceptions.RequestException as e:
+        logger.error(f"Error fetching orders summary: {e}")
+        return None
+
+
 def get_order(request: GetOrderRequest) -> Optional[Order]:
     """Fetches a single order by ID."""
     params = {'email': request.email}
     try:
-        response = requests.get(f'{PURCHASE_ORDERS_SERVICE_URL}/orders/{request.order_id}', params=params, headers=get_headers(PURCHASE_ORDERS_SERVICE_URL))
+        response = session.get(f'{PURCHASE_ORDERS_SERVICE_URL}/orders/{request.order_id}', params=params, headers=get_headers(PURCHASE_ORDERS_SERVICE_URL), timeout=TIMEOUT)
         response.raise_for_status()
         return Order(**response.json())
     except requests.exceptions.RequestException as e:
@@ -103,14 +165,25 @@ def get_order(request: GetOrderRequest) -> Optional[Order]:
         return None
 
 
-def get_items(request: GetItemsRequest) -> List[OrderItem]:
-    """Fetches purchased items for a user, optionally filtered by order ID."""
+def _items_params(request: GetItemsRequest) -> Dict[str, Any]:
     params = {'email': request.email}
     if request.order_id:
         params['orderId'] = request.order_id
+    if request.status:
+        params['status'] = request.status
+    if request.since:
+        params['since'] = request.since
+    if request.limit:
+        params['limit'] = request.limit
+    return params
+
+
+def get_items(request: GetItemsRequest) -> List[OrderItem]:
+    """Fetches the most recent purchased items for a user, optionally filtered by order ID, status and date."""
+    params = _items_params(request)
 
     try:
-        response = requests.get(f'{PURCHASE_ORDERS_SERVICE_URL}/items', params=params, headers=get_headers(PURCHASE_ORDERS_SERVICE_URL))
+        response = session.get(f'{PURCHASE_ORDERS_SERVICE_URL}/items', params=params, headers=get_headers(PURCHASE_ORDERS_SERVICE_URL), timeout=TIMEOUT)
         response.raise_for_status()
         return [OrderItem(**item) for item in response.json()]
     except requests.exceptions.RequestException as e:
@@ -129,7 +202,7 @@ def remove_item(request: RemoveItemRequest) -> Dict[str, Any]:
     headers['Content-Type'] = 'application/json'
 
     try:
-        response = requests.post(f'{PURCHASE_ORDERS_SERVICE_URL}/orders/remove-item', json=payload, headers=headers)
+        response = session.post(f'{PURCHASE_ORDERS_SERVICE_URL}/orders/remove-item', json=payload, headers=headers, timeout=TIMEOUT)
         return response.json()
 
     except requests.exceptions.RequestException as e:
@@ -146,7 +219,7 @@ def get_item(request: GetItemRequest) -> Optional[OrderItem]:
     params = {'email': request.email}
     
     try:
-        response = requests.get(f'{PURCHASE_ORDERS_SERVICE_URL}/items/{request.product_id}', params=params, headers=get_headers(PURCHASE_ORDERS_SERVICE_URL))
+        response = session.get(f'{PURCHASE_ORDERS_SERVICE_URL}/items/{request.product_id}', params=params, headers=get_headers(PURCHASE_ORDERS_SERVICE_URL), timeout=TIMEOUT)
         response.raise_for_status()
         return OrderItem(**response.json())
     except requests.exceptions.RequestException as e:
@@ -164,7 +237,7 @@ def cancel_order(request: CancelOrderRequest) -> Dict[str, Any]:
     headers['Content-Type'] = 'application/json'
 
     try:
-        response = requests.post(f'{PURCHASE_ORDERS_SERVICE_URL}/orders/cancel', json=payload, headers=headers)
+        response = session.post(f'{PURCHASE_ORDERS_SERVICE_URL}/orders/cancel', json=payload, headers=headers, timeout=TIMEOUT)
         return response.json()
     except requests.exceptions.RequestException as e:
         logger.error(f"Error cancelling order: {e}")
@@ -185,7 +258,7 @@ def add_feedback(request: AddFeedbackRequest) -> Dict[str, Any]:
     headers['Content-Type'] = 'application/json'
 
     try:
-        response = requests.post(f'{PURCHASE_ORDERS_SERVICE_URL}/orders/feedback', json=payload, headers=headers)
+        response = session.post(f'{PURCHASE_ORDERS_SERVICE_URL}/orders/feedback', json=payload, headers=headers, timeout=TIMEOUT)
         return response.json()
 
     except requests.exceptions.RequestException as e:
@@ -194,3 +267,158 @@ def add_feedback(request: AddFeedbackRequest) -> Dict[str, Any]:
     except ValueError:
          logger.error(f"Error decoding JSON. Status: {response.status_code}, Body: {response.text}")
          return {"error": "Invalid JSON response"}
+
+
+def get_date() -> Dict[str, Any]:
+    """Fetches the current date from the service."""
+    try:
+        response = session.get(f'{PURCHASE_ORDERS_SERVICE_URL}/date', headers=get_headers(PURCHASE_ORDERS_SERVICE_URL), timeout=TIMEOUT)
+        response.raise_for_status()
+        return response.json()
+    except requests.exceptions.RequestException as e:
+        logger.error(f"Error fetching date: {e}")
+        return {"error": str(e)}
+
+
+# Batch helpers
+
+def get_orders_operation(request: GetOrdersRequest, id: Optional[str] = None) -> BatchOperation:
+    return BatchOperation(op='getOrders', params=_orders_params(request), id=id)
+
+
+def get_order_operation(request: GetOrderRequest, id: Optional[str] = None) -> BatchOperation:
+    return BatchOperation(op='getOrder', params={'email': request.email, 'orderId': request.order_id}, id=id)
+
+
+def get_orders_summary_operation(request: GetOrdersSummaryRequest, id: Optional[str] = None) -> BatchOperation:
+    return BatchOperation(op='getOrdersSummary', params={'email': request.email}, id=id)
+
+
+def get_items_operation(request: GetItemsRequest, id: Optional[str] = None) -> BatchOperation:
+    return BatchOperation(op='getItems', params=_items_params(request), id=id)
+
+
+def get_item_operation(request: GetItemRequest, id: Optional[str] = None) -> BatchOperation:
+    return BatchOperation(op='getItem', params={'email': request.email, 'productId': request.product_id}, id=id)
+
+
+def batch(operations: List[BatchOperation]) -> List[BatchResult]:
+    """Runs several read operations in a single round trip. Results keep the request order."""
+    payload = {'operations': [operation.model_dump(exclude_none=True) for operation in operations]}
+    headers = get_headers(PURCHASE_ORDERS_SERVICE_URL)
+    headers['Content-Type'] = 'application/json'
+
+    try:
+        response = session.post(f'{PURCHASE_ORDERS_SERVICE_URL}/batch', json=payload, headers=headers, timeout=TIMEOUT)
+        response.raise_for_status()
+        return [BatchResult(**result) for result in response.json().get('results', [])]
+    except requests.exceptions.RequestException as e:
+        logger.error(f"Error running batch: {e}")
+        return [BatchResult(id=operation.id, op=operation.op, status=500, body={"error": str(e)}) for operation in operations]
+
+
+# Async methods, same contracts as the methods above. They await the service
+# instead of blocking the event loop, so the agent can run tool calls concurrently.
+
+async def _post_async(path: str, payload: Dict[str, Any], action: str) -> Dict[str, Any]:
+    headers = await get_headers_async(PURCHASE_ORDERS_SERVICE_URL)
+    headers['Content-Type'] = 'application/json'
+
+    try:
+        response = await get_async_client('purchase-orders').post(f'{PURCHASE_ORDERS_SERVICE_URL}{path}', json=payload, headers=headers)
+        return response.json()
+    except httpx.HTTPError as e:
+        logger.error(f"Error {action}: {e}")
+        return {"error": str(e)}
+    except ValueError:
+        logger.error(f"Error decoding JSON. Status: {response.status_code}, Body: {response.text}")
+        return {"error": "Invalid JSON response"}
+
+
+async def get_orders_async(request: GetOrdersRequest) -> List[Order]:
+    try:
+        response = await get_async_client('purchase-orders').get(f'{PURCHASE_ORDERS_SERVICE_URL}/orders', params=_orders_params(request), headers=await get_headers_async(PURCHASE_ORDERS_SERVICE_URL))
+        response.raise_for_status()
+        return [Order(**order) for order in response.json()]
+    except httpx.HTTPError as e:
+        logger.error(f"Error fetching orders: {e}")
+        return []
+
+
+async def get_orders_summary_async(request: GetOrdersSummaryRequest) -> Optional[OrdersSummary]:
+    try:
+        response = await get_async_client('purchase-orders').get(f'{PURCHASE_ORDERS_SERVICE_URL}/orders/summary', params={'email': request.email}, headers=await get_headers_async(PURCHASE_ORDERS_SERVICE_URL))
+        response.raise_for_status()
+        return OrdersSummary(**response.json())
+    except httpx.HTTPError as e:
+        logger.error(f"Error fetching orders summary: {e}")
+        return None
+
+
+async def get_order_async(request: GetOrderRequest) -> Optional[Order]:
+    try:
+        response = await get_async_client('purchase-orders').get(f'{PURCHASE_ORDERS_SERVICE_URL}/orders/{request.order_id}', params={'email': request.email}, headers=await get_headers_async(PURCHASE_ORDERS_SERVICE_URL))
+        response.raise_for_status()
+        return Order(**response.json())
+    except httpx.HTTPError as e:
+        logger.error(f"Error fetching order: {e}")
+        return None
+
+
+async def get_items_async(request: GetItemsRequest) -> List[OrderItem]:
+    try:
+        response = await get_async_client('purchase-orders').get(f'{PURCHASE_ORDERS_SERVICE_URL}/items', params=_items_params(request), headers=await get_headers_async(PURCHASE_ORDERS_SERVICE_URL))
+        response.raise_for_status()
+        return [OrderItem(**item) for item in response.json()]
+    except httpx.HTTPError as e:
+        logger.error(f"Error fetching items: {e}")
+        return []
+
+
+async def get_item_async(request: GetItemRequest) -> Optional[OrderItem]:
+    try:
+        response = await get_async_client('purchase-orders').get(f'{PURCHASE_ORDERS_SERVICE_URL}/items/{request.product_id}', params={'email': request.email}, headers=await get_headers_async(PURCHASE_ORDERS_SERVICE_URL))
+        response.raise_for_status()
+        return OrderItem(**response.json())
+    except httpx.HTTPError as e:
+        logger.error(f"Error fetching item: {e}")
+        return None
+
+
+async def remove_item_async(request: RemoveItemRequest) -> Dict[str, Any]:
+    payload = {'email': request.email, 'orderId': request.order_id, 'productId': request.product_id}
+    return await _post_async('/orders/remove-item', payload, 'removing item')
+
+
+async def cancel_order_async(request: CancelOrderRequest) -> Dict[str, Any]:
+    payload = {'email': request.email, 'orderId': request.order_id}
+    return await _post_async('/orders/cancel', payload, 'cancelling order')
+
+
+async def add_feedback_async(request: AddFeedbackRequest) -> Dict[str, Any]:
+    payload = {'email': request.email, 'orderId': request.order_id, 'feedback': request.feedback}
+    return await _post_async('/orders/feedback', payload, 'adding feedback')
+
+
+async def get_date_async() -> Dict[str, Any]:
+    try:
+        response = await get_async_client('purchase-orders').get(f'{PURCHASE_ORDERS_SERVICE_URL}/date', headers=await get_headers_async(PURCHASE_ORDERS_SERVICE_URL))
+        response.raise_for_status()
+        return response.json()
+    except httpx.HTTPError as e:
+        logger.error(f"Error fetching date: {e}")
+        return {"error": str(e)}
+
+
+async def batch_async(operations: List[BatchOperation]) -> List[BatchResult]:
+    payload = {'operations': [operation.model_dump(exclude_none=True) for operation in operations]}
+    headers = await get_headers_async(PURCHASE_ORDERS_SERVICE_URL)
+    headers['Content-Type'] = 'application/json'
+
+    try:
+        response = await get_async_client('purchase-orders').post(f'{PURCHASE_ORDERS_SERVICE_URL}/batch', json=payload, headers=headers)
+        response.raise_for_status()
+        return [BatchResult(**result) for result in response.json().get('results', [])]
+    except httpx.HTTPError as e:
+        logger.error(f"Error running batch: {e}")
+        return [BatchResult(id=operation.id, op=operation.op, status=500, body={"error": str(e)}) for operation in operations]
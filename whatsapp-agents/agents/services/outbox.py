@@ -0,0 +1,155 @@
+import asyncio
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+# Setup
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+logging.basicConfig(level=LOG_LEVEL)
+logger = logging.getLogger(__name__)
+
+# Configuration
+OUTBOX_WORKERS = int(os.environ.get('OUTBOX_WORKERS', 8))
+OUTBOX_MAX_ATTEMPTS = int(os.environ.get('OUTBOX_MAX_ATTEMPTS', 4))
+OUTBOX_BACKOFF_SECONDS = float(os.environ.get('OUTBOX_BACKOFF_SECONDS', 0.5))
+OUTBOX_MAX_BACKOFF_SECONDS = float(os.environ.get('OUTBOX_MAX_BACKOFF_SECONDS', 8))
+# Time given to queued messages when the process exits
+OUTBOX_FLUSH_TIMEOUT_SECONDS = float(os.environ.get('OUTBOX_FLUSH_TIMEOUT_SECONDS', 5))
+
+
+class DeliveryError(Exception):
+    """Raised by a deliver function on a failed attempt. Only retryable failures are attempted again."""
+    def __init__(self, message: str, retryable: bool, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.message = message
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+class DeliveryHandle:
+    """
+    Outcome of a queued message: `(success, message)` like the former
+    synchronous senders. Block on it with `result()`, or `await` it.
+    """
+    def __init__(self, future: Optional[Future] = None):
+        self._future = future or Future()
+
+    @classmethod
+    def resolved(cls, success: bool, message: str) -> 'DeliveryHandle':
+        handle = cls()
+        handle._future.set_result((success, message))
+        return handle
+
+    def done(self) -> bool:
+        return self._future.done()
+
+    def result(self, timeout: Optional[float] = None) -> Tuple[bool, str]:
+        return self._future.result(timeout=timeout)
+
+    def __await__(self):
+        return asyncio.wrap_future(self._future).__await__()
+
+
+class Outbox:
+    """
+    Delivers messages from background worker threads.
+
+    `enqueue` returns at once. Messages to the same recipient are delivered one
+    at a time in the order they were queued, messages to different recipients
+    in parallel on up to `workers` threads. Failed attempts flagged retryable
+    are retried with exponential backoff and jitter (or the server's
+    Retry-After), holding back the recipient's later messages meanwhile.
+    """
+    def __init__(
+        self,
+        deliver: Callable[[Dict[str, Any]], str],
+        workers: int = OUTBOX_WORKERS,
+        max_attempts: int = OUTBOX_MAX_ATTEMPTS,
+        backoff: float = OUTBOX_BACKOFF_SECONDS,
+        max_backoff: float = OUTBOX_MAX_BACKOFF_SECONDS,
+    ):
+        self._deliver = deliver
+        self._workers = workers
+        self._max_attempts = max_attempts
+        self._backoff = backoff
+        self._max_backoff = max_backoff
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        # recipient -> messages not yet delivered. A recipient is present while a
+        # worker owns it or it waits in `_ready`, so it is never delivered to twice at once.
+        self._pending: Dict[str, Deque[Tuple[Dict[str, Any], Future]]] = {}
+        self._ready: 'queue.Queue[str]' = queue.Queue()
+        self._threads: List[threading.Thread] = []
+        self._stats = {'queued': 0, 'delivered': 0, 'failed': 0, 'retries': 0}
+
+    def enqueue(self, recipient: str, payload: Dict[str, Any]) -> DeliveryHandle:
+        future = Future()
+        with self._lock:
+            self._start_workers()
+            self._stats['queued'] += 1
+            messages = self._pending.get(recipient)
+            schedule = messages is None
+            if schedule:
+                messages = self._pending[recipient] = deque()
+            messages.append((payload, future))
+        if schedule:
+            self._ready.put(recipient)
+        return DeliveryHandle(future)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Waits until every queued message was delivered or failed. Returns False on timeout."""
+        with self._idle:
+            return self._idle.wait_for(lambda: not self._pending, timeout=timeout)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._stats, 'pending': sum(len(messages) for messages in self._pending.values())}
+
+    def _start_workers(self):
+        if not self._threads:
+            for index in range(self._workers):
+                thread = threading.Thread(target=self._work, name=f'outbox-{index}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _work(self):
+        while True:
+            recipient = self._ready.get()
+            with self._lock:
+                payload, future = self._pending[recipient].popleft()
+
+            outcome = self._deliver_with_retries(payload)
+            with self._lock:
+                self._stats['delivered' if outcome[0] else 'failed'] += 1
+                if self._pending[recipient]:
+                    self._ready.put(recipient)
+                else:
+                    del self._pending[recipient]
+                    if not self._pending:
+                        self._idle.notify_all()
+            future.set_result(outcome)
+
+    def _deliver_with_retries(self, payload: Dict[str, Any]) -> Tuple[bool, str]:
+        for attempt in range(1, self._max_attempts + 1):
+            try:
+                return True, self._deliver(payload)
+            except DeliveryError as e:
+                if not e.retryable or attempt == self._max_attempts:
+                    logger.error(f"Message delivery failed after {attempt} attempt(s): {e.message}")
+                    return False, e.message
+                delay = e.retry_after
+            except Exception as e:
+                logger.exception("Unexpected error delivering message")
+                return False, str(e)
+
+            if delay is None:
+                delay = min(self._backoff * 2 ** (attempt - 1), self._max_backoff) * random.uniform(0.5, 1)
+            with self._lock:
+                self._stats['retries'] += 1
+            time.sleep(delay)
@@ -1,11 +1,19 @@
+import asyncio
+import httpx
 import logging
 import os
 import requests
+import threading
+import time
 
-from typing import Optional
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Awaitable, Callable, Dict, Optional, Tuple
 from pydantic import BaseModel, Field
 
-from .utils import get_headers
+from .utils import get_headers, get_headers_async
+from .http_client import TIMEOUT, get_async_client, get_session
+from .order import BatchOperation
 
 
 # Setup
@@ -15,6 +23,14 @@ logger = logging.getLogger(__name__)
 
 # Configuration
 USER_SERVICE_URL = os.environ.get("USER_SERVICE_URL")
+# Profiles are reused for this long before they are looked up again
+USER_PROFILE_CACHE_TTL_SECONDS = float(os.environ.get('USER_PROFILE_CACHE_TTL_SECONDS', 600))
+# Unknown phone numbers are remembered for this long, a user who just signed up waits at most this
+USER_PROFILE_CACHE_NEGATIVE_TTL_SECONDS = float(os.environ.get('USER_PROFILE_CACHE_NEGATIVE_TTL_SECONDS', 60))
+USER_PROFILE_CACHE_MAX_ENTRIES = int(os.environ.get('USER_PROFILE_CACHE_MAX_ENTRIES', 10000))
+
+# Keep-alive connection pool shared by every call to the service
+session = get_session('users')
 
 # Models
 
@@ -30,14 +46,17 @@ class GetUserRequest(BaseModel):
 
 # Methods
 
+def normalize_phone_number(phone_number: str) -> str:
+    if not phone_number.startswith("+"):
+        phone_number = f"+{phone_number}"
+    return phone_number
+
 def get_user(request: GetUserRequest) -> Optional[User]:
     """Fetches user information using their phone number."""
     try:
-        phone_number = request.phone_number
-        if not phone_number.startswith("+"):
-            phone_number = f"+{phone_number}"
+        phone_number = normalize_phone_number(request.phone_number)
         params = {'phoneNumber': phone_number}
-        response = requests.get(f'{USER_SERVICE_URL}/users', params=params, headers=get_headers(USER_SERVICE_URL))
+        response = session.get(f'{USER_SERVICE_URL}/users', params=params, headers=get_headers(USER_SERVICE_URL), timeout=TIMEOUT)
         response.raise_for_status()
         return User(**response.json())
     except requests.exceptions.RequestException as e:
@@ -46,3 +65,137 @@ def get_user(request: GetUserRequest) -> Optional[User]:
     except ValueError:
         logger.error(f"Error decoding JSON. Status: {response.status_code}, Body: {response.text}")
         return None
+
+
+async def fetch_user_async(phone_number: str) -> Optional[User]:
+    """Returns None when the service does not know the phone number, raises on any other failure."""
+    response = await get_async_client('users').get(f'{USER_SERVICE_URL}/users', params={'phoneNumber': phone_number}, headers=await get_headers_async(USER_SERVICE_URL))
+    if response.status_code == 404:
+        return None
+    response.raise_for_status()
+    return User(**response.json())
+
+
+async def get_user_async(request: GetUserRequest) -> Optional[User]:
+    """get_user for coroutines."""
+    try:
+        return await fetch_user_async(normalize_phone_number(request.phone_number))
+    except httpx.HTTPError as e:
+        logger.error(f"Error fetching user: {e}")
+        return None
+    except ValueError as e:
+        logger.error(f"Error decoding user: {e}")
+        return None
+
+
+# Result handed to waiters when the lookup they joined was cancelled
+_RETRY = object()
+
+
+class UserProfileCache:
+    """
+    Process-wide cache of user profiles keyed by normalized phone number.
+
+    Profiles live for `ttl` seconds and unknown phone numbers for `negative_ttl`;
+    lookup failures are not cached. Concurrent misses for the same phone number,
+    from any thread or event loop, share one lookup (single-flight). Least
+    recently used entries are evicted beyond `max_entries`.
+    """
+    def __init__(
+        self,
+        load: Callable[[str], Awaitable[Optional[User]]] = fetch_user_async,
+        ttl: float = USER_PROFILE_CACHE_TTL_SECONDS,
+        negative_ttl: float = USER_PROFILE_CACHE_NEGATIVE_TTL_SECONDS,
+        max_entries: int = USER_PROFILE_CACHE_MAX_ENTRIES,
+    ):
+        self._load = load
+        self._ttl = ttl
+        self._negative_ttl = negative_ttl
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, Tuple[float, Optional[User]]] = OrderedDict()
+        self._inflight: Dict[str, Future] = {}
+        self._stats = {'hits': 0, 'negative_hits': 0, 'misses': 0, 'coalesced': 0, 'loads': 0, 'errors': 0, 'evictions': 0}
+
+    async def get(self, phone_number: str) -> Optional[User]:
+        """Returns the profile, or None for unknown phone numbers. Lookup failures are raised."""
+        while True:
+            with self._lock:
+                entry = self._entries.get(phone_number)
+                if entry is not None and entry[0] > time.monotonic():
+                    self._entries.move_to_end(phone_number)
+                    self._stats['hits' if entry[1] is not None else 'negative_hits'] += 1
+                    return entry[1]
+
+                future = self._inflight.get(phone_number)
+                leader = future is None
+                if leader:
+                    self._stats['misses'] += 1
+                    future = self._inflight[phone_number] = Future()
+                else:
+                    self._stats['coalesced'] += 1
+
+            if leader:
+                await self._run_load(phone_number, future)
+            # Shielded so a waiter's own cancellation does not cancel the shared lookup
+            user = await asyncio.shield(asyncio.wrap_future(future))
+            if user is not _RETRY:
+                return user
+
+    async def _run_load(self, phone_number: str, future: Future):
+        try:
+            user = await self._load(phone_number)
+        except Exception as e:
+            with self._lock:
+                self._stats['errors'] += 1
+                self._inflight.pop(phone_number, None)
+            future.set_exception(e)
+            return
+        except BaseException:
+            # The leader was cancelled: free the slot and wake the waiters so the
+            # first of them to get back in starts the lookup again
+            with self._lock:
+                self._inflight.pop(phone_number, None)
+            future.set_result(_RETRY)
+            raise
+
+        with self._lock:
+            self._stats['loads'] += 1
+            ttl = self._ttl if user is not None else self._negative_ttl
+            self._entries[phone_number] = (time.monotonic() + ttl, user)
+            self._entries.move_to_end(phone_number)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+            self._inflight.pop(phone_number, None)
+        future.set_result(user)
+
+    def invalidate(self, phone_number: str):
+        with self._lock:
+            self._entries.pop(phone_number, None)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._stats, 'entries': len(self._entries)}
+
+
+user_profile_cache = UserProfileCache()
+
+
+async def get_user_cached(request: GetUserRequest) -> Optional[User]:
+    """get_user_async through the process-wide profile cache."""
+    try:
+        return await user_profile_cache.get(normalize_phone_number(request.phone_number))
+    except httpx.HTTPError as e:
+        logger.error(f"Error fetching user: {e}")
+        return None
+    except ValueError as e:
+        logger.error(f"Error decoding user: {e}")
+        return None
+
+
+# Batch helpers
+
+def get_user_operation(request: GetUserRequest, id: Optional[str] = None) -> BatchOperation:
+    """Builds a /batch operation equivalent to get_user. Run it with order.batch()."""
+    return BatchOperation(op='getUser', params={'phoneNumber': normalize_phone_number(request.phone_number)}, id=id)
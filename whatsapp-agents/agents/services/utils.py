@@ -1,29 +1,230 @@
 import google.auth.transport.requests
+from google.auth import jwt
 from google.oauth2 import id_token
-from google.cloud import secretmanager
+from concurrent.futures import Future
+import asyncio
 import logging
 import os
-from typing import Dict
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
 
 # Setup
 LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
 logging.basicConfig(level=LOG_LEVEL)
 logger = logging.getLogger(__name__)
 
+# ID tokens are refreshed in the background once they expire within this margin
+ID_TOKEN_REFRESH_MARGIN_SECONDS = float(os.environ.get('ID_TOKEN_REFRESH_MARGIN_SECONDS', 300))
+# Tokens this close to expiry are never sent, callers wait for a fresh one instead
+ID_TOKEN_MIN_VALIDITY_SECONDS = float(os.environ.get('ID_TOKEN_MIN_VALIDITY_SECONDS', 30))
+# Validity assumed for tokens whose expiry cannot be read
+ID_TOKEN_DEFAULT_TTL_SECONDS = float(os.environ.get('ID_TOKEN_DEFAULT_TTL_SECONDS', 600))
+# Secret Manager values are re-read in the background once older than this
+SECRET_REFRESH_SECONDS = float(os.environ.get('SECRET_REFRESH_SECONDS', 3600))
+# Directory with one file per secret, named by secret id (e.g. mounted secrets, local runs)
+SECRETS_DIR = os.environ.get('SECRETS_DIR')
+
+
+def fetch_id_token(audience: str) -> Tuple[str, float]:
+    """Mints an ID token for the audience. Returns the token and its expiry as a UNIX timestamp."""
+    auth_req = google.auth.transport.requests.Request()
+    token = id_token.fetch_id_token(auth_req, audience)
+    try:
+        expires_at = float(jwt.decode(token, verify=False)['exp'])
+    except Exception:
+        expires_at = time.time() + ID_TOKEN_DEFAULT_TTL_SECONDS
+    return token, expires_at
+
+
+class IdTokenCache:
+    """
+    Thread-safe ID token cache keyed by audience.
+
+    Tokens are reused until they come within `refresh_margin` seconds of expiry;
+    from then on the cached token is still returned while a single background
+    fetch replaces it. Only when no usable token is cached do callers block, and
+    concurrent callers for the same audience share one fetch (single-flight).
+    """
+    def __init__(
+        self,
+        fetch: Callable[[str], Tuple[str, float]] = fetch_id_token,
+        refresh_margin: float = ID_TOKEN_REFRESH_MARGIN_SECONDS,
+        min_validity: float = ID_TOKEN_MIN_VALIDITY_SECONDS,
+    ):
+        self._fetch = fetch
+        self._refresh_margin = refresh_margin
+        self._min_validity = min_validity
+        self._lock = threading.Lock()
+        self._tokens: Dict[str, Tuple[str, float]] = {}
+        self._inflight: Dict[str, Future] = {}
+        self._stats = {'hits': 0, 'misses': 0, 'fetches': 0, 'background_refreshes': 0, 'errors': 0}
+
+    def get(self, audience: str, timeout: Optional[float] = None, wait: bool = True) -> Optional[str]:
+        """
+        Returns a valid token for the audience, fetching one if needed. With
+        `wait=False` returns None instead of blocking when no token is cached.
+        """
+        now = time.time()
+        with self._lock:
+            cached = self._tokens.get(audience)
+            if cached is not None and cached[1] - now > self._min_validity:
+                self._stats['hits'] += 1
+                if cached[1] - now <= self._refresh_margin and audience not in self._inflight:
+                    self._stats['background_refreshes'] += 1
+                    future = self._inflight[audience] = Future()
+                    threading.Thread(target=self._run_fetch, args=(audience, future), daemon=True).start()
+                return cached[0]
+            if not wait:
+                return None
+
+            self._stats['misses'] += 1
+            future = self._inflight.get(audience)
+            leader = future is None
+            if leader:
+                future = self._inflight[audience] = Future()
+
+        if leader:
+            self._run_fetch(audience, future)
+        return future.result(timeout=timeout)
+
+    def _run_fetch(self, audience: str, future: Future):
+        try:
+            token, expires_at = self._fetch(audience)
+        except Exception as e:
+            with self._lock:
+                self._stats['errors'] += 1
+                self._inflight.pop(audience, None)
+            future.set_exception(e)
+            return
+
+        with self._lock:
+            self._stats['fetches'] += 1
+            self._tokens[audience] = (token, expires_at)
+            self._inflight.pop(audience, None)
+        future.set_result(token)
+
+    def invalidate(self, audience: str):
+        """Drops the cached token, e.g. after the audience rejected it."""
+        with self._lock:
+            self._tokens.pop(audience, None)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats)
+
+
+id_token_cache = IdTokenCache()
+
+
 def get_headers(audience: str) -> Dict[str, str]:
     headers = {}
     try:
-        auth_req = google.auth.transport.requests.Request()
-        token = id_token.fetch_id_token(auth_req, audience)
+        token = id_token_cache.get(audience)
         headers["Authorization"] = f"Bearer {token}"
     except Exception as e:
         logger.error(f"Error fetching ID token: {e}")
     return headers
 
 
+async def get_headers_async(audience: str) -> Dict[str, str]:
+    """get_headers for coroutines: cached tokens are returned inline, fetches run on a worker thread."""
+    token = id_token_cache.get(audience, wait=False)
+    if token is None:
+        return await asyncio.to_thread(get_headers, audience)
+    return {"Authorization": f"Bearer {token}"}
+
+
+class SecretProvider:
+    """
+    Secrets resolved on first use, so importing a module never blocks on them.
+
+    A secret comes from the environment variable of the same name, else from
+    `secrets_dir/<secret_id>`, else from Secret Manager. Secret Manager values
+    share one client, are cached, and once older than `refresh_seconds` are
+    re-read in the background while the cached value keeps being served.
+    Concurrent first reads of a secret share one RPC; `prefetch` starts
+    several in parallel.
+    """
+    def __init__(self, refresh_seconds: float = SECRET_REFRESH_SECONDS, secrets_dir: Optional[str] = SECRETS_DIR):
+        self._refresh_seconds = refresh_seconds
+        self._secrets_dir = secrets_dir
+        self._lock = threading.Lock()
+        self._client_lock = threading.Lock()
+        self._client = None
+        self._project_id = None
+        self._values: Dict[str, Tuple[str, float]] = {}
+        self._inflight: Dict[str, Future] = {}
+
+    def get(self, secret_id: str, timeout: Optional[float] = None) -> str:
+        value = os.environ.get(secret_id) or self._read_file(secret_id)
+        if value:
+            return value
+
+        now = time.time()
+        with self._lock:
+            cached = self._values.get(secret_id)
+            if cached is not None:
+                if now - cached[1] > self._refresh_seconds and secret_id not in self._inflight:
+                    self._start_fetch(secret_id)
+                return cached[0]
+            future = self._inflight.get(secret_id) or self._start_fetch(secret_id)
+        return future.result(timeout=timeout)
+
+    def prefetch(self, *secret_ids: str):
+        """Starts loading secrets in the background without waiting for them."""
+        for secret_id in secret_ids:
+            if os.environ.get(secret_id) or self._read_file(secret_id):
+                continue
+            with self._lock:
+                if secret_id not in self._values and secret_id not in self._inflight:
+                    self._start_fetch(secret_id)
+
+    def _read_file(self, secret_id: str) -> Optional[str]:
+        if not self._secrets_dir:
+            return None
+        path = os.path.join(self._secrets_dir, secret_id)
+        if not os.path.isfile(path):
+            return None
+        with open(path) as f:
+            return f.read().strip()
+
+    def _start_fetch(self, secret_id: str) -> Future:
+        # Called with the lock held
+        future = self._inflight[secret_id] = Future()
+        threading.Thread(target=self._run_fetch, args=(secret_id, future), daemon=True).start()
+        return future
+
+    def _run_fetch(self, secret_id: str, future: Future):
+        try:
+            value = self._access(secret_id)
+        except Exception as e:
+            logger.error(f"Error reading secret {secret_id}: {e}")
+            with self._lock:
+                self._inflight.pop(secret_id, None)
+            future.set_exception(e)
+            return
+
+        with self._lock:
+            self._values[secret_id] = (value, time.time())
+            self._inflight.pop(secret_id, None)
+        future.set_result(value)
+
+    def _access(self, secret_id: str) -> str:
+        with self._client_lock:
+            if self._client is None:
+                # Imported here: the client library is slow to import and unused when secrets come from env or files
+                from google.cloud import secretmanager
+                self._client = secretmanager.SecretManagerServiceClient()
+                _, self._project_id = google.auth.default()
+            client, project_id = self._client, self._project_id
+        name = f"projects/{project_id}/secrets/{secret_id}/versions/latest"
+        response = client.access_secret_version(request={"name": name})
+        return response.payload.data.decode("UTF-8").strip()
+
+
+secrets = SecretProvider()
+
+
 def get_secret(secret_id: str) -> str:
-    client = secretmanager.SecretManagerServiceClient()
-    _, project_id = google.auth.default()
-    name = f"projects/{project_id}/secrets/{secret_id}/versions/latest"
-    response = client.access_secret_version(request={"name": name})
-    return response.payload.data.decode("UTF-8").strip()
+    return secrets.get(secret_id)
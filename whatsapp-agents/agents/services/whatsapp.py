@@ -5,7 +5,10 @@ import requests
 import google.auth
 from typing import Optional, List, Dict, Any, Union, Literal, Tuple
 from pydantic import BaseModel, Field
-from .utils import get_secret
+from .utils import secrets
+from .http_client import TIMEOUT, get_session
+from .outbox import OUTBOX_FLUSH_TIMEOUT_SECONDS, DeliveryError, DeliveryHandle, Outbox
+import atexit
 
 # Setup
 LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
@@ -170,31 +173,73 @@ class InteractiveCarouselMessage(BaseModel):
     carousel: InteractiveCarousel
 
 
-WHATSAPP_API_TOKEN = get_secret("WHATSAPP_API_TOKEN")
-WHATSAPP_PHONE_NUMBER_ID = get_secret("WHATSAPP_PHONE_NUMBER_ID")
 WHATSAPP_API_VERSION = os.environ.get('WHATSAPP_API_VERSION', 'v24.0')
-BASE_URL = f"https://graph.facebook.com/{WHATSAPP_API_VERSION}/{WHATSAPP_PHONE_NUMBER_ID}/messages"
+# Secrets read on the first send; loading starts in the background at import
+WHATSAPP_SECRETS = ("WHATSAPP_API_TOKEN", "WHATSAPP_PHONE_NUMBER_ID")
+
+def messages_url() -> str:
+    return f"https://graph.facebook.com/{WHATSAPP_API_VERSION}/{secrets.get('WHATSAPP_PHONE_NUMBER_ID')}/messages"
+
+# Graph API answers that leave the message unsent and are worth retrying
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Keep-alive connection pool shared by the outbox workers
+session = get_session('whatsapp')
 
-def send_message(payload: Dict[str, Any]) -> Tuple[bool, str]:
-    is_enabled = os.environ.get('WHATSAPP_INTEGRATION_ENABLED', 'true').lower() == 'true'
-    if not is_enabled:
-        return False, "WhatsApp integration is not enabled."
+
+def post_message(payload: Dict[str, Any]) -> str:
+    """Posts a message to the Graph API. Raises DeliveryError when it was not accepted."""
+    try:
+        token, url = secrets.get('WHATSAPP_API_TOKEN'), messages_url()
+    except Exception as e:
+        raise DeliveryError(f"Error reading WhatsApp secrets: {e}", retryable=True)
 
     headers = {
-        "Authorization": f"Bearer {WHATSAPP_API_TOKEN}",
+        "Authorization": f"Bearer {token}",
         "Content-Type": "application/json"
     }
     try:
-        response = requests.post(BASE_URL, headers=headers, json=payload)
-        response.raise_for_status()
-        return True, "Message sent successfully"
+        response = session.post(url, headers=headers, json=payload, timeout=TIMEOUT)
+    except requests.exceptions.ConnectionError as e:
+        # Includes connect timeouts: the request never reached the API
+        logger.warning(f'Error sending WhatsApp message: {e}')
+        raise DeliveryError(f"Error sending WhatsApp message: {e}", retryable=True)
     except requests.exceptions.RequestException as e:
-        error_msg = e.response.text if e.response else str(e)
-        logger.error(f'Error sending WhatsApp message: {error_msg} | Payload: {json.dumps(payload)}')
-        return False, f"Error sending WhatsApp message: {error_msg}"
+        # A read timeout may follow an accepted message, retrying could send it twice
+        logger.error(f'Error sending WhatsApp message: {e} | Payload: {json.dumps(payload)}')
+        raise DeliveryError(f"Error sending WhatsApp message: {e}", retryable=False)
+
+    if response.status_code >= 400:
+        retry_after = response.headers.get('Retry-After')
+        logger.warning(f'Error sending WhatsApp message: {response.status_code} {response.text} | Payload: {json.dumps(payload)}')
+        raise DeliveryError(
+            f"Error sending WhatsApp message: {response.text}",
+            retryable=response.status_code in RETRYABLE_STATUS_CODES,
+            retry_after=float(retry_after) if retry_after and retry_after.isdigit() else None,
+        )
+    return "Message sent successfully"
+
+
+outbox = Outbox(post_message)
+atexit.register(outbox.flush, OUTBOX_FLUSH_TIMEOUT_SECONDS)
+
+if os.environ.get('WHATSAPP_INTEGRATION_ENABLED', 'true').lower() == 'true':
+    secrets.prefetch(*WHATSAPP_SECRETS)
+
+
+def send_message(payload: Dict[str, Any]) -> DeliveryHandle:
+    """
+    Queues a message for delivery and returns at once. Messages to one user
+    arrive in the order they were queued. The handle resolves to
+    `(success, message)`: await it, or call `result()`, when the outcome matters.
+    """
+    is_enabled = os.environ.get('WHATSAPP_INTEGRATION_ENABLED', 'true').lower() == 'true'
+    if not is_enabled:
+        return DeliveryHandle.resolved(False, "WhatsApp integration is not enabled.")
+    return outbox.enqueue(payload['to'], payload)
 
 
-def send_audio_message(message: AudioMessage) -> Tuple[bool, str]:
+def send_audio_message(message: AudioMessage) -> DeliveryHandle:
     """Sends an audio message to a WhatsApp user."""
     payload = {
         "messaging_product": "whatsapp",
@@ -205,7 +250,7 @@ def send_audio_message(message: AudioMessage) -> Tuple[bool, str]:
     }
     return send_message(payload)
 
-def send_contact_message(message: ContactMessage) -> Tuple[bool, str]:
+def send_contact_message(message: ContactMessage) -> DeliveryHandle:
     """Sends a contact message to a WhatsApp user."""
     payload = {
         "messaging_product": "whatsapp",
@@ -216,7 +261,7 @@ def send_contact_message(message: ContactMessage) -> Tuple[bool, str]:
     }
     return send_message(payload)
 
-def send_document_message(message: DocumentMessage) -> Tuple[bool, str]:
+def send_document_message(message: DocumentMessage) -> DeliveryHandle:
     """Sends a document message to a WhatsApp user."""
     payload = {
         "messaging_product": "whatsapp",
@@ -227,7 +272,7 @@ def send_document_message(message: DocumentMessage) -> Tuple[bool, str]:
     }
     return send_message(payload)
 
-def send_image_message(message: ImageMessage) -> Tuple[bool, str]:
+def send_image_message(message: ImageMessage) -> DeliveryHandle:
     """Sends an image message to a WhatsApp user."""
     payload = {
         "messaging_product": "whatsapp",
@@ -238,7 +283,7 @@ def send_image_message(message: ImageMessage) -> Tuple[bool, str]:
     }
     return send_message(payload)
 
-def send_interactive_cta_button_message(message: InteractiveCtaButtonMessage) -> Tuple[bool, str]:
+def send_interactive_cta_button_message(message: InteractiveCtaButtonMessage) -> DeliveryHandle:
     """Sends an interactive CTA button message to a WhatsApp user."""
     interactive = {
         "type": "cta_url",
@@ -259,7 +304,7 @@ def send_interactive_cta_button_message(message: InteractiveCtaButtonMessage) ->
     }
     return send_message(payload)
 
-def send_interactive_flow_message(message: InteractiveFlowMessage) -> Tuple[bool, str]:
+def send_interactive_flow_message(message: InteractiveFlowMessage) -> DeliveryHandle:
     """Sends an interactive flow message to a WhatsApp user."""
     interactive = {
         "type": "flow",
@@ -280,7 +325,7 @@ def send_interactive_flow_message(message: InteractiveFlowMessage) -> Tuple[bool
     }
     return send_message(payload)
 
-def send_interactive_carousel_message(message: InteractiveCarouselMessage) -> Tuple[bool, str]:
+def send_interactive_carousel_message(message: InteractiveCarouselMessage) -> DeliveryHandle:
     """Sends an interactive carousel message to a WhatsApp user."""
     interactive = {
         "type": "carousel",
@@ -299,7 +344,7 @@ def send_interactive_carousel_message(message: InteractiveCarouselMessage) -> Tu
     }
     return send_message(payload)
 
-def send_interactive_list_message(message: InteractiveListMessage) -> Tuple[bool, str]:
+def send_interactive_list_message(message: InteractiveListMessage) -> DeliveryHandle:
     """Sends an interactive list message to a WhatsApp user."""
     interactive = {
         "type": "list",
@@ -320,7 +365,7 @@ def send_interactive_list_message(message: InteractiveListMessage) -> Tuple[bool
     }
     return send_message(payload)
 
-def send_interactive_reply_buttons_message(message: InteractiveReplyButtonsMessage) -> Tuple[bool, str]:
+def send_interactive_reply_buttons_message(message: InteractiveReplyButtonsMessage) -> DeliveryHandle:
     """Sends an interactive reply buttons message to a WhatsApp user."""
     interactive = {
         "type": "button",
@@ -341,7 +386,7 @@ def send_interactive_reply_buttons_message(message: InteractiveReplyButtonsMessa
     }
     return send_message(payload)
 
-def send_location_message(message: LocationMessage) -> Tuple[bool, str]:
+def send_location_message(message: LocationMessage) -> DeliveryHandle:
     """Sends a location message to a WhatsApp user."""
     payload = {
         "messaging_product": "whatsapp",
@@ -352,7 +397,7 @@ def send_location_message(message: LocationMessage) -> Tuple[bool, str]:
     }
     return send_message(payload)
 
-def send_video_message(message: VideoMessage) -> Tuple[bool, str]:
+def send_video_message(message: VideoMessage) -> DeliveryHandle:
     """Sends a video message to a WhatsApp user."""
     payload = {
         "messaging_product": "whatsapp",
@@ -363,7 +408,7 @@ def send_video_message(message: VideoMessage) -> Tuple[bool, str]:
     }
     return send_message(payload)
 
-def send_text_message(message: TextMessage) -> Tuple[bool, str]:
+def send_text_message(message: TextMessage) -> DeliveryHandle:
     """Sends a text message to a WhatsApp user."""
     payload = {
         "messaging_product": "whatsapp",
@@ -0,0 +1,152 @@
+import functools
+import inspect
+import logging
+import os
+import threading
+import time
+
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+
+# Setup
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+logging.basicConfig(level=LOG_LEVEL)
+logger = logging.getLogger(__name__)
+
+# Tool results are reused for this long, so repeated calls within a conversation skip the service
+TOOL_CACHE_ENABLED = os.environ.get('TOOL_CACHE_ENABLED', 'TRUE').upper() == 'TRUE'
+TOOL_CACHE_TTL_SECONDS = float(os.environ.get('TOOL_CACHE_TTL_SECONDS', 30))
+TOOL_CACHE_MAX_ENTRIES = int(os.environ.get('TOOL_CACHE_MAX_ENTRIES', 5000))
+
+Key = Tuple[str, str, Tuple[Tuple[str, Any], ...]]
+
+
+def order_ids(value: Any) -> Set[str]:
+    """Every orderId found in a tool result."""
+    found = set()
+    if isinstance(value, dict):
+        if isinstance(value.get('orderId'), str):
+            found.add(value['orderId'])
+        for child in value.values():
+            found |= order_ids(child)
+    elif isinstance(value, list):
+        for child in value:
+            found |= order_ids(child)
+    return found
+
+
+class ToolResultCache:
+    """
+    Results of read tools keyed by tool name, arguments and user email.
+
+    Each entry remembers the orders its result shows, so a mutation of one
+    order only drops the entries showing it. Aggregate entries (e.g. the
+    orders summary) depend on every order of the user and are dropped by any
+    of the user's mutations.
+    """
+    def __init__(self, ttl: float = TOOL_CACHE_TTL_SECONDS, max_entries: int = TOOL_CACHE_MAX_ENTRIES):
+        self._ttl = ttl
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        # key -> (expires_at, result, order ids or None for aggregates)
+        self._entries: OrderedDict[Key, Tuple[float, Dict[str, Any], Optional[Set[str]]]] = OrderedDict()
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def _tool_stats(self, tool: str) -> Dict[str, int]:
+        return self._stats.setdefault(tool, {'hits': 0, 'misses': 0, 'invalidations': 0})
+
+    def get(self, key: Key) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            stats = self._tool_stats(key[0])
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            stats['hits'] += 1
+            return entry[1]
+
+    def set(self, key: Key, result: Dict[str, Any], aggregate: bool = False):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self._ttl, result, None if aggregate else order_ids(result))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_order(self, email: str, order_id: str):
+        """Drops the user's entries that show the order, and the user's aggregates."""
+        with self._lock:
+            stale = [
+                key for key, (_, _, ids) in self._entries.items()
+                if key[1] == email and (ids is None or order_id in ids)
+            ]
+            for key in stale:
+                del self._entries[key]
+                self._tool_stats(key[0])['invalidations'] += 1
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Hits, misses, hit rate and invalidations per tool."""
+        with self._lock:
+            return {
+                tool: {**stats, 'hit_rate': stats['hits'] / (stats['hits'] + stats['misses']) if stats['hits'] + stats['misses'] else 0.0}
+                for tool, stats in self._stats.items()
+            }
+
+
+tool_cache = ToolResultCache()
+
+
+def _call_arguments(signature: inspect.Signature, args, kwargs) -> Tuple[Any, Tuple[Tuple[str, Any], ...]]:
+    """Returns the tool_context and the remaining arguments as a hashable key part."""
+    bound = signature.bind(*args, **kwargs)
+    bound.apply_defaults()
+    arguments = dict(bound.arguments)
+    tool_context = arguments.pop('tool_context')
+    return tool_context, tuple(sorted(arguments.items()))
+
+
+def cached_tool(result_key: str, aggregate: bool = False) -> Callable:
+    """
+    Memoizes an async read tool in `tool_cache`. Only results carrying
+    `result_key` are cached, so "not found" messages and service errors are
+    retried. On a hit the tool's state bookkeeping (last_tool_name and
+    last_tool_result, read by the renderer) is replayed.
+    """
+    def decorator(tool: Callable) -> Callable:
+        signature = inspect.signature(tool)
+
+        @functools.wraps(tool)
+        async def wrapper(*args, **kwargs):
+            if not TOOL_CACHE_ENABLED:
+                return await tool(*args, **kwargs)
+
+            tool_context, arguments = _call_arguments(signature, args, kwargs)
+            key = (tool.__name__, tool_context.state.get('user_email'), arguments)
+            result = tool_cache.get(key)
+            if result is not None:
+                logger.debug(f"Tool cache hit: {tool.__name__} | hit rate: {tool_cache.stats()[tool.__name__]['hit_rate']:.1%}")
+                tool_context.state['last_tool_name'] = tool.__name__
+                tool_context.state['last_tool_result'] = result
+                return result
+
+            result = await tool(*args, **kwargs)
+            if result.get(result_key):
+                tool_cache.set(key, result, aggregate=aggregate)
+            return result
+        return wrapper
+    return decorator
+
+
+def invalidates_order(tool: Callable) -> Callable:
+    """Drops the cached results showing the `order_id` the wrapped mutation changes."""
+    signature = inspect.signature(tool)
+
+    @functools.wraps(tool)
+    async def wrapper(*args, **kwargs):
+        try:
+            return await tool(*args, **kwargs)
+        finally:
+            # Also on errors: the mutation may have been applied before the failure
+            tool_context, arguments = _call_arguments(signature, args, kwargs)
+            tool_cache.invalidate_order(tool_context.state.get('user_email'), dict(arguments)['order_id'])
+    return wrapper
@@ -0,0 +1,106 @@
+"""
+Wall time of a model turn that emits several function calls, with the tools
+awaited one after another (how blocking tools ran) vs concurrently (how ADK
+runs async tools).
+
+Each round calls get_user_orders, get_user_orders_summary, get_user_items,
+get_user_order and get_date against benchmarks.stand_in_service, whose latency
+varies per call, with ID tokens served by benchmarks.fake_metadata_server.
+A concurrent turn should take about as long as its slowest call.
+
+Usage (from whatsapp-agents/):
+    python -m benchmarks.bench_async_tools [rounds] [latency_ms] [--no-tls]
+"""
+
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+from benchmarks.fake_metadata_server import FakeMetadataServer
+from benchmarks.stand_in_service import StandInService
+
+args = [arg for arg in sys.argv[1:] if arg != '--no-tls']
+ROUNDS = int(args[0]) if len(args) >= 1 else 20
+LATENCY_MS = float(args[1]) if len(args) >= 2 else 50
+
+metadata = FakeMetadataServer().start()
+service = StandInService(latency_seconds=LATENCY_MS / 1000, tls='--no-tls' not in sys.argv).start()
+
+# Read by google-auth and the service clients when they are imported
+os.environ['GCE_METADATA_HOST'] = metadata.host
+os.environ['GCE_METADATA_IP'] = metadata.host
+os.environ.pop('GOOGLE_APPLICATION_CREDENTIALS', None)
+os.environ['PURCHASE_ORDERS_SERVICE_URL'] = service.url
+os.environ['USER_SERVICE_URL'] = service.url
+if service.cert_path:
+    os.environ['SSL_CERT_FILE'] = service.cert_path
+
+from agents import agent
+from agents.services.utils import get_headers
+
+class StubToolContext:
+    """The part of ToolContext the tools use."""
+    def __init__(self):
+        self.state = {'user_email': 'cliente@example.com', 'user_phone_number': '+5215555555555'}
+
+def turn_calls(tool_context):
+    return [
+        agent.get_user_orders(tool_context),
+        agent.get_user_orders_summary(tool_context),
+        agent.get_user_items(tool_context),
+        agent.get_user_order('a1b2c3d4e5f6', tool_context),
+        agent.get_date(),
+    ]
+
+async def timed(coroutine):
+    start = time.perf_counter()
+    await coroutine
+    return time.perf_counter() - start
+
+async def sequential_turn():
+    started = time.perf_counter()
+    durations = [await timed(call) for call in turn_calls(StubToolContext())]
+    return time.perf_counter() - started, durations
+
+async def concurrent_turn():
+    started = time.perf_counter()
+    durations = await asyncio.gather(*[timed(call) for call in turn_calls(StubToolContext())])
+    return time.perf_counter() - started, durations
+
+async def run(turn):
+    walls, slowest, sums = [], [], []
+    for index in range(ROUNDS):
+        # Vary the service latency between rounds, so the slowest call changes
+        service.latency_seconds = LATENCY_MS / 1000 * (0.5 + (index % 4) / 3)
+        wall, durations = await turn()
+        walls.append(wall)
+        slowest.append(max(durations))
+        sums.append(sum(durations))
+    return walls, slowest, sums
+
+def report(name, walls, slowest, sums):
+    print(f"{name:<11} wall p50: {statistics.median(walls) * 1000:7.1f} ms | "
+          f"slowest call p50: {statistics.median(slowest) * 1000:7.1f} ms | "
+          f"sum of calls p50: {statistics.median(sums) * 1000:7.1f} ms | "
+          f"wall / slowest: {statistics.median(w / s for w, s in zip(walls, slowest)):.2f}")
+
+async def main():
+    print(f"Stand-in service on {service.url}, base latency {LATENCY_MS:.0f} ms, {ROUNDS} rounds of 5 tool calls")
+    await asyncio.to_thread(get_headers, service.url)  # warm the ID token cache
+    await concurrent_turn()  # warm the connection pool
+
+    report('sequential', *await run(sequential_turn))
+    report('concurrent', *await run(concurrent_turn))
+
+async def new_loop_turn():
+    """A turn on a fresh event loop, as Agent Engine runs each query: it must get its own clients."""
+    wall, durations = await concurrent_turn()
+    print(f"new loop    wall: {wall * 1000:7.1f} ms | slowest call: {max(durations) * 1000:7.1f} ms")
+
+if __name__ == "__main__":
+    asyncio.run(main())
+    asyncio.run(new_loop_turn())
+    service.stop()
+    metadata.stop()
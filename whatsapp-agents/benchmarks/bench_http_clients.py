@@ -0,0 +1,110 @@
+"""
+Tool-call latency of the service clients with bare requests calls (one new
+connection per call, the previous behaviour) vs the pooled keep-alive sessions.
+
+Runs a mix of get_orders / get_order / get_items / get_user calls against
+benchmarks.stand_in_service (TLS by default, like Cloud Run), sequentially and
+from several threads, with ID tokens served by benchmarks.fake_metadata_server.
+Reports latency percentiles and the connections the stand-in accepted.
+
+Usage (from whatsapp-agents/):
+    python -m benchmarks.bench_http_clients [calls] [threads] [latency_ms] [--no-tls]
+"""
+
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+
+from benchmarks.fake_metadata_server import FakeMetadataServer
+from benchmarks.stand_in_service import StandInService
+
+args = [arg for arg in sys.argv[1:] if arg != '--no-tls']
+CALLS = int(args[0]) if len(args) >= 1 else 200
+THREADS = int(args[1]) if len(args) >= 2 else 8
+LATENCY_MS = float(args[2]) if len(args) >= 3 else 5
+
+metadata = FakeMetadataServer().start()
+service = StandInService(latency_seconds=LATENCY_MS / 1000, tls='--no-tls' not in sys.argv).start()
+
+# Read by google-auth and the service clients when they are imported
+os.environ['GCE_METADATA_HOST'] = metadata.host
+os.environ['GCE_METADATA_IP'] = metadata.host
+os.environ.pop('GOOGLE_APPLICATION_CREDENTIALS', None)
+os.environ['PURCHASE_ORDERS_SERVICE_URL'] = service.url
+os.environ['USER_SERVICE_URL'] = service.url
+if service.cert_path:
+    os.environ['REQUESTS_CA_BUNDLE'] = service.cert_path
+
+import requests
+
+from agents.services import order, user
+from agents.services.utils import get_headers
+
+EMAIL = 'cliente@example.com'
+
+def unpooled_call(kind):
+    """The previous client code: a bare requests call per tool call."""
+    url = service.url
+    paths = {
+        'orders': ('/orders', {'email': EMAIL}),
+        'order': ('/orders/a1b2c3d4e5f6', {'email': EMAIL}),
+        'items': ('/items', {'email': EMAIL}),
+        'user': ('/users', {'phoneNumber': '+5215555555555'}),
+    }
+    path, params = paths[kind]
+    response = requests.get(f'{url}{path}', params=params, headers=get_headers(url))
+    response.raise_for_status()
+    return response.json()
+
+def pooled_call(kind):
+    if kind == 'orders':
+        return order.get_orders(order.GetOrdersRequest(email=EMAIL))
+    if kind == 'order':
+        return order.get_order(order.GetOrderRequest(email=EMAIL, order_id='a1b2c3d4e5f6'))
+    if kind == 'items':
+        return order.get_items(order.GetItemsRequest(email=EMAIL))
+    return user.get_user(user.GetUserRequest(phone_number='+5215555555555'))
+
+def run(call, calls, threads):
+    latencies = []
+    lock = threading.Lock()
+    per_thread = calls // threads
+
+    def worker():
+        local = []
+        for _ in range(per_thread):
+            kind = random.choice(['orders', 'order', 'items', 'user'])
+            start = time.perf_counter()
+            call(kind)
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    connections_before = service.connections
+    started = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return latencies, time.perf_counter() - started, service.connections - connections_before
+
+def report(name, threads, latencies, elapsed, connections):
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(f"{name:<9} threads={threads:<3} {len(latencies) / elapsed:8.1f} calls/s | "
+          f"p50: {quantiles[49] * 1000:7.2f} ms | p99: {quantiles[98] * 1000:7.2f} ms | "
+          f"new connections: {connections}")
+
+if __name__ == "__main__":
+    print(f"Stand-in service on {service.url}, latency {LATENCY_MS:.0f} ms, {CALLS} calls per run")
+    get_headers(service.url)  # warm the ID token cache, both variants use it
+
+    for threads in sorted({1, THREADS}):
+        for name, call in [('unpooled', unpooled_call), ('pooled', pooled_call)]:
+            report(name, threads, *run(call, CALLS, threads))
+
+    service.stop()
+    metadata.stop()
@@ -0,0 +1,99 @@
+"""
+ID token cache check against the fake metadata server.
+
+Starts benchmarks.fake_metadata_server with short-lived tokens and latency,
+then:
+  1. times uncached fetches (one metadata round trip per call, the old behaviour),
+  2. hammers get_headers from many threads over several audiences, through
+     expiry windows, and reports call latency and how many tokens were minted.
+
+With the cache, a cold start mints one token per audience however many threads
+ask at once, and later refreshes happen in the background, so callers only
+see hits.
+
+Usage (from whatsapp-agents/):
+    python -m benchmarks.bench_id_tokens [seconds] [threads] [token_ttl_seconds] [latency_ms]
+"""
+
+import os
+import statistics
+import sys
+import threading
+import time
+
+from benchmarks.fake_metadata_server import FakeMetadataServer
+
+args = sys.argv[1:]
+SECONDS = float(args[0]) if len(args) >= 1 else 15
+THREADS = int(args[1]) if len(args) >= 2 else 32
+TOKEN_TTL_SECONDS = int(args[2]) if len(args) >= 3 else 10
+LATENCY_MS = float(args[3]) if len(args) >= 4 else 50
+AUDIENCES = ['https://orders.example.run.app', 'https://users.example.run.app']
+
+server = FakeMetadataServer(token_ttl_seconds=TOKEN_TTL_SECONDS, latency_seconds=LATENCY_MS / 1000).start()
+
+# google-auth reads these when it is imported
+os.environ['GCE_METADATA_HOST'] = server.host
+os.environ['GCE_METADATA_IP'] = server.host
+os.environ.pop('GOOGLE_APPLICATION_CREDENTIALS', None)
+os.environ.setdefault('ID_TOKEN_REFRESH_MARGIN_SECONDS', str(TOKEN_TTL_SECONDS / 2))
+os.environ.setdefault('ID_TOKEN_MIN_VALIDITY_SECONDS', '1')
+
+from agents.services import utils
+
+def percentiles(latencies):
+    quantiles = statistics.quantiles(latencies, n=100)
+    return f"p50: {quantiles[49] * 1000:7.2f} ms | p99: {quantiles[98] * 1000:7.2f} ms"
+
+def uncached(calls=20):
+    latencies = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        utils.fetch_id_token(AUDIENCES[0])
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+def cached():
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    barrier = threading.Barrier(THREADS)
+    deadline = time.monotonic() + SECONDS
+
+    def worker(index):
+        audience = AUDIENCES[index % len(AUDIENCES)]
+        local = []
+        barrier.wait()  # cold start: every thread asks at once
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            headers = utils.get_headers(audience)
+            local.append(time.perf_counter() - start)
+            if 'Authorization' not in headers:
+                with lock:
+                    errors[0] += 1
+            time.sleep(0.001)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors[0]
+
+if __name__ == "__main__":
+    print(f"Fake metadata server on {server.host}: token TTL {TOKEN_TTL_SECONDS}s, latency {LATENCY_MS:.0f} ms")
+
+    latencies = uncached()
+    print(f"uncached fetch_id_token: {len(latencies)} calls | {percentiles(latencies)}")
+    minted_before = server.total_identity_requests()
+
+    latencies, errors = cached()
+    minted = server.total_identity_requests() - minted_before
+    print(f"cached get_headers:      {len(latencies)} calls from {THREADS} threads over {SECONDS:.0f}s | "
+          f"{percentiles(latencies)} | max: {max(latencies) * 1000:.2f} ms | missing tokens: {errors}")
+    print(f"tokens minted: {minted} for {len(AUDIENCES)} audiences "
+          f"(at most {len(AUDIENCES) * (int(SECONDS // (TOKEN_TTL_SECONDS / 2)) + 1)} expected)")
+    print(f"cache stats: {utils.id_token_cache.stats()}")
+    server.stop()
@@ -0,0 +1,183 @@
+"""
+Model calls per conversation with the user's identity looked up through tools
+(get_user_name, get_user_email, get_user_phone_number, how the purchase
+orders agent used to work) vs templated into its instruction from state.
+
+Replays a scripted conversation through the ADK runner with a stubbed LLM,
+so the callbacks, the instruction templating and the tools run for real
+against benchmarks.stand_in_service. The stub behaves like the model does:
+before answering a message it resolves the identity facts the message needs
+(greeting by name, fetching the email before the user's orders...). A fact
+it finds in its instruction costs nothing; otherwise it calls the lookup
+tool, one extra model call per turn. A fact it can neither find nor look up
+is counted as unanswered, which must stay at 0.
+
+Usage (from whatsapp-agents/):
+    python -m benchmarks.bench_identity_prompt [conversations] [model_latency_ms] [--no-tls]
+"""
+
+import asyncio
+import os
+import re
+import statistics
+import sys
+import time
+
+from benchmarks.fake_metadata_server import FakeMetadataServer
+from benchmarks.stand_in_service import USER, StandInService
+
+args = [arg for arg in sys.argv[1:] if arg != '--no-tls']
+CONVERSATIONS = int(args[0]) if len(args) >= 1 else 5
+MODEL_LATENCY_MS = float(args[1]) if len(args) >= 2 else 300
+
+metadata = FakeMetadataServer().start()
+service = StandInService(latency_seconds=0.02, tls='--no-tls' not in sys.argv).start()
+
+# Read by google-auth and the agent modules when they are imported
+os.environ['GCE_METADATA_HOST'] = metadata.host
+os.environ['GCE_METADATA_IP'] = metadata.host
+os.environ.pop('GOOGLE_APPLICATION_CREDENTIALS', None)
+os.environ['PURCHASE_ORDERS_SERVICE_URL'] = service.url
+os.environ['USER_SERVICE_URL'] = service.url
+os.environ['WHATSAPP_INTEGRATION_ENABLED'] = 'false'
+os.environ['FAST_PATH_ENABLED'] = 'FALSE'
+os.environ['TOOL_CACHE_ENABLED'] = 'FALSE'
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+if service.cert_path:
+    os.environ['SSL_CERT_FILE'] = service.cert_path
+
+from google.adk.agents.llm_agent import LlmAgent
+from google.adk.models import LlmResponse
+from google.adk.models.base_llm import BaseLlm
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.adk.tools.tool_context import ToolContext
+from google.genai import types
+
+from agents import agent
+
+# fact -> (lookup tool, value the user service returns)
+FACTS = {
+    'name': ('get_user_name', USER['userName']),
+    'email': ('get_user_email', USER['userEmail']),
+    'phone': ('get_user_phone_number', USER['phoneNumber']),
+}
+
+# (user message, identity facts needed to answer it, tool called to answer it)
+CONVERSATION = [
+    ("Hola", ['name'], None),
+    ("Muéstrame mis órdenes", ['email'], ('get_user_orders', {})),
+    ("¿Cuántas órdenes tengo pendientes?", ['email'], ('get_user_orders_summary', {})),
+    ("Quiero ver la orden a1b2c3d4e5f6", [], ('get_user_order', {'order_id': 'a1b2c3d4e5f6'})),
+    ("¿Con qué correo estoy registrado?", ['email'], None),
+    ("¿A qué número me van a escribir?", ['phone'], None),
+    ("Gracias", ['name'], None),
+]
+SCRIPT = {message: (needs, tool) for message, needs, tool in CONVERSATION}
+
+
+def get_user_name(tool_context: ToolContext) -> str:
+    """The identity lookup tool the agent used to expose, next to get_user_email and get_user_phone_number."""
+    return tool_context.state.get('user_name')
+
+
+class ReplayModel(BaseLlm):
+    """Stubbed LLM answering the scripted conversation, see the module docstring."""
+    model: str = 'replay'
+    latency_seconds: float = 0.0
+    calls: int = 0
+    identity_lookups: int = 0
+    unanswered: int = 0
+
+    async def generate_content_async(self, llm_request, stream: bool = False):
+        self.calls += 1
+        await asyncio.sleep(self.latency_seconds)
+
+        # Where the current turn stands: the user's message and the tools called since
+        turn_start = max(
+            index for index, content in enumerate(llm_request.contents)
+            if content.role == 'user' and any(part.text for part in content.parts or [])
+        )
+        message = next(part.text for part in llm_request.contents[turn_start].parts if part.text)
+        called = {
+            part.function_call.name
+            for content in llm_request.contents[turn_start + 1:]
+            for part in content.parts or [] if part.function_call
+        }
+        needs, tool = SCRIPT[message]
+        instruction = str(llm_request.config.system_instruction or '')
+
+        missing = [fact for fact in needs if FACTS[fact][1] not in instruction and FACTS[fact][0] not in called]
+        lookups = [FACTS[fact][0] for fact in missing if FACTS[fact][0] in llm_request.tools_dict]
+        if lookups:
+            self.identity_lookups += len(lookups)
+            yield function_calls([(name, {}) for name in lookups])
+        elif tool and tool[0] not in called:
+            yield function_calls([tool])
+        else:
+            self.unanswered += len(missing)
+            yield LlmResponse(content=types.Content(role='model', parts=[types.Part(text=f"Respuesta a: {message}")]))
+
+
+def function_calls(calls) -> LlmResponse:
+    return LlmResponse(content=types.Content(role='model', parts=[
+        types.Part(function_call=types.FunctionCall(name=name, args=arguments)) for name, arguments in calls
+    ]))
+
+
+def build_agent(model: ReplayModel, identity_tools: bool) -> LlmAgent:
+    """The purchase orders agent with the stubbed model, as it is or as it was with the identity lookup tools."""
+    template = agent.purchase_orders_agent
+    instruction, tools = template.instruction, list(template.tools)
+    if identity_tools:
+        instruction = re.sub(r'## Datos del Usuario\n.*?(?=\n## )', '', instruction, flags=re.DOTALL)
+        tools = [agent.get_user_phone_number, agent.get_user_email, get_user_name] + tools
+    return LlmAgent(
+        name=template.name,
+        model=model,
+        instruction=instruction,
+        tools=tools,
+        before_agent_callback=template.before_agent_callback,
+        after_agent_callback=template.after_agent_callback,
+        before_tool_callback=template.before_tool_callback,
+        after_model_callback=template.after_model_callback,
+    )
+
+
+async def replay(identity_tools: bool):
+    """Returns the model calls and wall time of each conversation, the identity lookups and the unanswered facts."""
+    model = ReplayModel(latency_seconds=MODEL_LATENCY_MS / 1000)
+    runner = Runner(agent=build_agent(model, identity_tools), app_name='bench', session_service=InMemorySessionService())
+    calls, walls = [], []
+    for _ in range(CONVERSATIONS):
+        session = await runner.session_service.create_session(app_name='bench', user_id=USER['phoneNumber'])
+        calls_before, started = model.calls, time.perf_counter()
+        for message, _, _ in CONVERSATION:
+            new_message = types.Content(role='user', parts=[types.Part(text=message)])
+            async for _ in runner.run_async(user_id=USER['phoneNumber'], session_id=session.id, new_message=new_message):
+                pass
+        calls.append(model.calls - calls_before)
+        walls.append(time.perf_counter() - started)
+    return calls, walls, model.identity_lookups, model.unanswered
+
+
+def report(name, calls, walls, identity_lookups, unanswered):
+    print(f"{name:<18} model calls / conversation: {statistics.mean(calls):5.1f} | "
+          f"per turn: {statistics.mean(calls) / len(CONVERSATION):4.2f} | "
+          f"identity lookups: {identity_lookups:3d} | unanswered facts: {unanswered} | "
+          f"wall p50: {statistics.median(walls) * 1000:7.1f} ms")
+
+
+async def main():
+    print(f"{CONVERSATIONS} conversations of {len(CONVERSATION)} turns, stubbed model latency {MODEL_LATENCY_MS:.0f} ms")
+    before = await replay(identity_tools=True)
+    after = await replay(identity_tools=False)
+    report('identity tools', *before)
+    report('identity in prompt', *after)
+    saved = statistics.mean(before[0]) - statistics.mean(after[0])
+    print(f"Saved {saved:.1f} model calls per conversation ({saved / statistics.mean(before[0]):.0%})")
+
+if __name__ == "__main__":
+    asyncio.run(main())
+    service.stop()
+    metadata.stop()
@@ -0,0 +1,57 @@
+"""
+Cold-start cost of importing the agent modules, each run in a fresh interpreter.
+
+Secrets come from the environment, as in local runs, so the numbers show the
+import itself: no module may block on Secret Manager or any other RPC while
+being imported (see utils.SecretProvider).
+
+Usage (from whatsapp-agents/):
+    python -m benchmarks.bench_import_time [runs] [module ...]
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+DEFAULT_MODULES = ['agents.services.whatsapp', 'agents.agent']
+
+IMPORT_SNIPPET = """
+import importlib, time
+started = time.perf_counter()
+importlib.import_module({module!r})
+print(time.perf_counter() - started)
+"""
+
+def bench_env():
+    env = dict(os.environ)
+    env.setdefault('WHATSAPP_API_TOKEN', 'bench-token')
+    env.setdefault('WHATSAPP_PHONE_NUMBER_ID', '000000000000000')
+    env.setdefault('PURCHASE_ORDERS_SERVICE_URL', 'http://localhost:8990')
+    env.setdefault('USER_SERVICE_URL', 'http://localhost:8990')
+    env['LOG_LEVEL'] = 'WARNING'
+    return env
+
+def measure(module, runs, env):
+    """Returns the import times and the process wall times, in seconds."""
+    imports, walls = [], []
+    for _ in range(runs):
+        started = time.perf_counter()
+        output = subprocess.run(
+            [sys.executable, '-c', IMPORT_SNIPPET.format(module=module)],
+            env=env, capture_output=True, text=True, check=True,
+        ).stdout
+        walls.append(time.perf_counter() - started)
+        imports.append(float(output.strip().splitlines()[-1]))
+    return imports, walls
+
+if __name__ == "__main__":
+    runs = int(sys.argv[1]) if len(sys.argv) >= 2 else 10
+    modules = sys.argv[2:] or DEFAULT_MODULES
+    env = bench_env()
+    print(f"{runs} fresh interpreters per module, {sys.executable}")
+    for module in modules:
+        imports, walls = measure(module, runs, env)
+        print(f"{module:<28} import p50: {statistics.median(imports) * 1000:7.1f} ms | "
+              f"min: {min(imports) * 1000:7.1f} ms | process p50: {statistics.median(walls) * 1000:7.1f} ms")
@@ -0,0 +1,132 @@
+"""
+Local stand-in for the GCE metadata server, for exercising ID token handling
+without Google Cloud credentials.
+
+Serves the metadata ping and the service account identity endpoint, minting
+unsigned JWTs with a configurable lifetime and an optional artificial latency.
+Counts identity requests per audience on /stats.
+
+Point google-auth at it before it is imported (the hosts are read at import time):
+    GCE_METADATA_HOST=localhost:8989 GCE_METADATA_IP=localhost:8989
+
+Usage (from whatsapp-agents/):
+    python -m benchmarks.fake_metadata_server [port] [token_ttl_seconds] [latency_ms]
+"""
+
+import base64
+import json
+import sys
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+IDENTITY_PATH = '/computeMetadata/v1/instance/service-accounts/default/identity'
+SERVICE_ACCOUNT_PATH = '/computeMetadata/v1/instance/service-accounts/default/'
+PROJECT_ID_PATH = '/computeMetadata/v1/project/project-id'
+SERVICE_ACCOUNT_EMAIL = 'fake-agent@demo-project.iam.gserviceaccount.com'
+
+def b64url(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode()
+
+def mint_token(audience, ttl_seconds):
+    now = int(time.time())
+    header = {'alg': 'RS256', 'typ': 'JWT', 'kid': 'fake'}
+    claims = {
+        'aud': audience,
+        'azp': SERVICE_ACCOUNT_EMAIL,
+        'email': SERVICE_ACCOUNT_EMAIL,
+        'iss': 'https://accounts.google.com',
+        'sub': '000000000000000000000',
+        'iat': now,
+        'exp': now + ttl_seconds,
+    }
+    return '.'.join([
+        b64url(json.dumps(header).encode()),
+        b64url(json.dumps(claims).encode()),
+        b64url(b'fake-signature'),
+    ])
+
+class FakeMetadataServer:
+    def __init__(self, port=0, token_ttl_seconds=3600, latency_seconds=0.0):
+        self.token_ttl_seconds = token_ttl_seconds
+        self.latency_seconds = latency_seconds
+        self.identity_requests = Counter()
+        self.lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', port), self._handler())
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_address[1]
+        self.host = f"127.0.0.1:{self.port}"
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status, body, content_type='text/plain'):
+                data = body.encode()
+                self.send_response(status)
+                self.send_header('Metadata-Flavor', 'Google')
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path == '/':
+                    return self._send(200, '')
+                if self.headers.get('Metadata-Flavor') != 'Google':
+                    return self._send(403, 'Missing Metadata-Flavor header')
+                if url.path == IDENTITY_PATH:
+                    audience = (parse_qs(url.query).get('audience') or [''])[0]
+                    if not audience:
+                        return self._send(400, 'audience is required')
+                    with server.lock:
+                        server.identity_requests[audience] += 1
+                    if server.latency_seconds:
+                        time.sleep(server.latency_seconds)
+                    return self._send(200, mint_token(audience, server.token_ttl_seconds))
+                if url.path == SERVICE_ACCOUNT_PATH:
+                    return self._send(200, json.dumps({
+                        'email': SERVICE_ACCOUNT_EMAIL,
+                        'aliases': ['default'],
+                        'scopes': ['https://www.googleapis.com/auth/cloud-platform'],
+                    }), 'application/json')
+                if url.path == PROJECT_ID_PATH:
+                    return self._send(200, 'demo-project')
+                if url.path == '/stats':
+                    with server.lock:
+                        return self._send(200, json.dumps(dict(server.identity_requests)), 'application/json')
+                return self._send(404, 'Not found')
+
+        return Handler
+
+    def start(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def total_identity_requests(self):
+        with self.lock:
+            return sum(self.identity_requests.values())
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    port = int(args[0]) if len(args) >= 1 else 8989
+    ttl = int(args[1]) if len(args) >= 2 else 3600
+    latency_ms = float(args[2]) if len(args) >= 3 else 0
+
+    server = FakeMetadataServer(port, ttl, latency_ms / 1000)
+    print(f"Fake metadata server on {server.host} (token TTL {ttl}s, latency {latency_ms:.0f} ms)")
+    print(f"export GCE_METADATA_HOST={server.host} GCE_METADATA_IP={server.host}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
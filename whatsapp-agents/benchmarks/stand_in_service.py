@@ -0,0 +1,150 @@
+"""
+Local stand-in for the purchase orders and user services.
+
+Answers the endpoints the agent's service clients call with canned payloads
+after an artificial latency, over HTTP/1.1 keep-alive, optionally over TLS
+with a throwaway self-signed certificate (needs the openssl CLI). Counts the
+TCP connections it accepted, so connection reuse is visible.
+
+Usage (from whatsapp-agents/):
+    python -m benchmarks.stand_in_service [port] [latency_ms] [--tls]
+"""
+
+import json
+import os
+import ssl
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+ORDER = {
+    'orderId': 'a1b2c3d4e5f6',
+    'userEmail': 'cliente@example.com',
+    'status': 'enviada',
+    'totalAmount': 259.97,
+    'createdAt': '2026-01-15T10:30:00+00:00',
+    'itemCount': 2,
+    'items': [
+        {'orderId': 'a1b2c3d4e5f6', 'productId': 'p1', 'name': 'Laptop Pro 15', 'quantity': 1,
+         'priceAtPurchase': 199.99, 'status': 'enviada'},
+        {'orderId': 'a1b2c3d4e5f6', 'productId': 'p2', 'name': 'Mochila Urbana', 'quantity': 2,
+         'priceAtPurchase': 29.99, 'status': 'enviada'},
+    ],
+}
+USER = {'phoneNumber': '+5215555555555', 'userEmail': 'cliente@example.com', 'userName': 'Cliente', 'createdAt': None}
+SUMMARY = {'email': 'cliente@example.com', 'totalOrders': 1, 'totalAmount': 259.97,
+           'byStatus': {'enviada': {'count': 1, 'totalAmount': 259.97}}}
+
+def route(method, path):
+    if method == 'GET':
+        if path == '/orders':
+            return [{key: ORDER[key] for key in ('orderId', 'status', 'createdAt', 'itemCount', 'totalAmount')}] * 10
+        if path == '/orders/summary':
+            return SUMMARY
+        if path.startswith('/orders/'):
+            return ORDER
+        if path == '/items':
+            return ORDER['items'] * 5
+        if path.startswith('/items/'):
+            return ORDER['items'][0]
+        if path == '/users':
+            return USER
+        if path == '/date':
+            return {'iso': '2026-01-15T10:30:00', 'date': '15/01/2026', 'time': '10:30:00'}
+    if method == 'POST':
+        if path == '/batch':
+            return {'results': []}
+        if path in ('/orders/cancel', '/orders/remove-item', '/orders/feedback'):
+            return {'message': 'ok'}
+    return None
+
+def self_signed_certificate(directory):
+    """Generates a certificate for localhost/127.0.0.1. Returns (cert path, key path)."""
+    cert, key = os.path.join(directory, 'cert.pem'), os.path.join(directory, 'key.pem')
+    subprocess.run([
+        'openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1',
+        '-keyout', key, '-out', cert, '-subj', '/CN=localhost',
+        '-addext', 'subjectAltName=DNS:localhost,IP:127.0.0.1',
+    ], check=True, capture_output=True)
+    return cert, key
+
+class StandInService:
+    def __init__(self, port=0, latency_seconds=0.0, tls=False):
+        self.latency_seconds = latency_seconds
+        self.connections = 0
+        self.requests = 0
+        self.lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', port), self._handler())
+        self.httpd.daemon_threads = True
+        self.cert_path = None
+        if tls:
+            self._tmp = tempfile.TemporaryDirectory()
+            self.cert_path, key_path = self_signed_certificate(self._tmp.name)
+            context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+            context.load_cert_chain(self.cert_path, key_path)
+            self.httpd.socket = context.wrap_socket(self.httpd.socket, server_side=True)
+        self.port = self.httpd.server_address[1]
+        self.url = f"{'https' if tls else 'http'}://localhost:{self.port}"
+
+    def _handler(self):
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def setup(self):
+                super().setup()
+                with service.lock:
+                    service.connections += 1
+
+            def log_message(self, format, *args):
+                pass
+
+            def _respond(self, method):
+                length = int(self.headers.get('Content-Length') or 0)
+                if length:
+                    self.rfile.read(length)
+                with service.lock:
+                    service.requests += 1
+                if service.latency_seconds:
+                    time.sleep(service.latency_seconds)
+                payload = route(method, urlparse(self.path).path)
+                body = json.dumps(payload if payload is not None else {'error': 'Not found'}).encode()
+                self.send_response(200 if payload is not None else 404)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                self._respond('GET')
+
+            def do_POST(self):
+                self._respond('POST')
+
+        return Handler
+
+    def start(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if arg != '--tls']
+    port = int(args[0]) if len(args) >= 1 else 8990
+    latency_ms = float(args[1]) if len(args) >= 2 else 0
+    service = StandInService(port, latency_ms / 1000, tls='--tls' in sys.argv)
+    print(f"Stand-in service on {service.url} (latency {latency_ms:.0f} ms)")
+    if service.cert_path:
+        print(f"export REQUESTS_CA_BUNDLE={service.cert_path}")
+    try:
+        service.httpd.serve_forever()
+    except KeyboardInterrupt:
+        service.stop()
@@ -74,6 +74,14 @@ async def health_check():
     return {"status": "OK"}
 
 
+@app.get("/agent_stats")
+async def agent_stats():
+    """Fast path hit rate and latency saved, and tool cache hit rate per tool."""
+    from agents.agent import fast_path_router
+    from agents.tool_cache import tool_cache
+    return {"fast_path": fast_path_router.stats.stats(), "tool_cache": tool_cache.stats()}
+
+
 if __name__ == "__main__":
     # Use the PORT environment variable provided by Cloud Run, defaulting to 8080
     uvicorn.run(app, host="0.0.0.0", port=int(os.environ.get("PORT", 8000)))
@@ -0,0 +1,88 @@
+import asyncio
+import http.server
+import threading
+import time
+
+import pytest
+
+from agents.services import http_client
+
+RUNS = 5
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'{}')
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_address[1]}', server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+
+def open_connections(port):
+    """Established TCP connections from or to the port, both ends counted."""
+    with open('/proc/net/tcp') as table:
+        rows = [line.split() for line in table.readlines()[1:]]
+    return sum(
+        1 for row in rows
+        if row[3] == '01' and port in (int(row[1].split(':')[1], 16), int(row[2].split(':')[1], 16))
+    )
+
+
+def wait_for_no_connections(port, timeout=5):
+    deadline = time.monotonic() + timeout
+    while open_connections(port) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    return open_connections(port)
+
+
+def test_clients_are_closed_with_their_event_loop(server):
+    server_url, port = server
+
+    async def query():
+        # Two calls on the same loop share its client
+        first = await http_client.get_async_client('users').get(server_url)
+        second = await http_client.get_async_client('users').get(server_url)
+        assert first.status_code == second.status_code == 200
+        assert len(http_client._async_clients['users']) == 1
+        return http_client.get_async_client('users')
+
+    clients = [asyncio.run(query()) for _ in range(RUNS)]
+
+    assert len({id(client) for client in clients}) == RUNS
+    assert all(client.is_closed for client in clients)
+    assert http_client._async_clients['users'] == {}
+    assert http_client._shutdown_hooks == {}
+    assert wait_for_no_connections(port) == 0
+
+
+def test_clients_of_a_loop_closed_without_shutdown_are_dropped(server):
+    server_url, _ = server
+
+    async def query():
+        await http_client.get_async_client('users').get(server_url)
+
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(query())
+    loop.close()
+    assert loop in http_client._async_clients['users']
+
+    asyncio.run(query())
+
+    assert loop not in http_client._async_clients['users']
+    assert loop not in http_client._shutdown_hooks
@@ -0,0 +1,55 @@
+import asyncio
+
+import pytest
+
+from agents.services.user import UserProfileCache
+
+
+def test_leader_cancellation_is_not_propagated_to_waiters():
+    calls = []
+
+    async def load(phone_number):
+        calls.append(phone_number)
+        if len(calls) == 1:
+            await asyncio.sleep(10)
+        await asyncio.sleep(0.01)
+        return f'user:{phone_number}'
+
+    cache = UserProfileCache(load=load)
+
+    async def scenario():
+        leader = asyncio.create_task(cache.get('+5491100000000'))
+        await asyncio.sleep(0)
+        waiters = [asyncio.create_task(cache.get('+5491100000000')) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await asyncio.gather(*waiters)
+
+    assert asyncio.run(scenario()) == ['user:+5491100000000'] * 3
+    # One waiter retried the lookup for all of them
+    assert len(calls) == 2
+    assert cache._inflight == {}
+    assert cache.stats()['errors'] == 0
+
+
+def test_waiter_cancellation_does_not_cancel_the_lookup():
+    async def load(phone_number):
+        await asyncio.sleep(0.02)
+        return f'user:{phone_number}'
+
+    cache = UserProfileCache(load=load)
+
+    async def scenario():
+        leader = asyncio.create_task(cache.get('+5491100000000'))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(cache.get('+5491100000000'))
+        await asyncio.sleep(0.005)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        return await leader
+
+    assert asyncio.run(scenario()) == 'user:+5491100000000'
+    assert cache.stats()['loads'] == 1
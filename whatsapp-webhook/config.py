@@ -18,6 +18,8 @@ class Config:
     AGENT_ID = os.environ.get('AGENT_ID')
     AGENT_LANGUAGE_CODE = os.environ.get('AGENT_LANGUAGE_CODE', 'en')
     ROUTING_TARGET = os.environ.get('ROUTING_TARGET', 'AGENT_ENGINE')
+    # Import the routing target's client library in the background at startup
+    PRELOAD_CLIENTS = os.environ.get('PRELOAD_CLIENTS', 'TRUE').upper() == 'TRUE'
 
     # WhatsApp
     WHATSAPP_VERIFY_TOKEN = os.environ.get('WHATSAPP_VERIFY_TOKEN')
@@ -1,15 +1,11 @@
 import logging
 import hmac
 import hashlib
+import os
 import threading
 import time
 from concurrent.futures import ThreadPoolExecutor
 from flask import Flask, request, jsonify, abort
-from google.cloud.dialogflowcx_v3.services.sessions.client import SessionsClient
-from google.cloud.dialogflowcx_v3.types.session import DetectIntentRequest, TextInput, QueryInput, QueryParameters
-import vertexai
-from vertexai import agent_engines
-from google.protobuf import struct_pb2
 import requests
 
 from whatsapp_models import parse_webhook_payload
@@ -30,8 +26,10 @@ except ValueError as e:
 
 logger.info(f"Using Project ID: {Config.PROJECT_ID} and Region: {Config.LOCATION}")
 
-# Global clients (Lazy loading)
+# Global clients (Lazy loading). The client libraries are imported on first use too:
+# only the one of ROUTING_TARGET is ever needed, and each takes seconds to import.
 _dialogflow_session_client = None
+_dialogflow_session_client_lock = threading.Lock()
 
 # ThreadPool for handling webhook tasks
 # Adjust max_workers based on expected load and CPU/Memory limits.
@@ -47,6 +45,7 @@ def get_vertex_agent():
     
     logger.info(f"Initializing Vertex AI Agent Engine: {agent_engine_resource_name}")
     try:
+        import vertexai
         # Always create a fresh client to ensure it binds to the current (background) asyncio loop
         vertex_client = vertexai.Client(project=Config.PROJECT_ID, location=Config.LOCATION)
         return vertex_client.agent_engines.get(name=agent_engine_resource_name)
@@ -63,9 +62,13 @@ def get_dialogflow_session_client():
         logger.error("AGENT_ID environment variable not set (required for Dialogflow Agent ID)")
         raise ValueError("AGENT_ID not set")
 
-    logger.info("Initializing Dialogflow CX Session Client")
-    api_endpoint = f"{Config.LOCATION}-dialogflow.googleapis.com"
-    _dialogflow_session_client = SessionsClient(client_options={"api_endpoint": api_endpoint})
+    # The preload thread and request threads can get here at the same time
+    with _dialogflow_session_client_lock:
+        if not _dialogflow_session_client:
+            logger.info("Initializing Dialogflow CX Session Client")
+            from google.cloud.dialogflowcx_v3.services.sessions.client import SessionsClient
+            api_endpoint = f"{Config.LOCATION}-dialogflow.googleapis.com"
+            _dialogflow_session_client = SessionsClient(client_options={"api_endpoint": api_endpoint})
     return _dialogflow_session_client
 
 
@@ -262,6 +265,9 @@ def forward_to_dialogflow_cx(user_phone_number: str, query: str, phone_number_id
     """
     Detects Intent in Dialogflow CX and sends response back to WhatsApp.
     """
+    from google.cloud.dialogflowcx_v3.types.session import DetectIntentRequest, TextInput, QueryInput, QueryParameters
+    from google.protobuf import struct_pb2
+
     try:
         session_client = get_dialogflow_session_client()
         session_path = session_client.session_path(
@@ -400,6 +406,22 @@ def forward_to_adk_agent_engine(user_phone_number: str, query: str, phone_number
                 logger.error(f"[{mask_phone_number(user_phone_number)}] All retries failed.")
 
 
+def preload_routing_client() -> None:
+    """
+    Imports the client library of the routing target in the background once the
+    app is up, so the first message usually does not pay for it.
+    """
+    try:
+        if Config.ROUTING_TARGET == 'AGENT_ENGINE':
+            import vertexai
+        elif Config.ROUTING_TARGET == 'DIALOGFLOW':
+            get_dialogflow_session_client()
+    except Exception as e:
+        logger.warning(f"Failed to preload the {Config.ROUTING_TARGET} client: {e}")
+
+if Config.PRELOAD_CLIENTS:
+    threading.Thread(target=preload_routing_client, daemon=True).start()
+
 
 if __name__ == '__main__':
     # Used for local development only